@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import base64
+import hashlib
+import mimetypes
+import urllib.request
+from urllib.parse import urljoin
+from pathlib import Path
+from rich.console import Console
+from config import Config
+from output_writer import atomic_write
+
+console = Console()
+
+ASSET_DIR = "assets"
+VENDOR_MANIFEST = "vendor.json"
+
+# Third-party libraries shared by the reports and the dashboard: name -> (kind, CDN url)
+VENDOR = {
+    'fonts': ("css", "https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700;800"
+                     "&family=Inter:wght@400;500;600&family=JetBrains+Mono&display=swap"),
+    'font-awesome': ("css", "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css"),
+    'chart.js': ("js", "https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js"),
+}
+
+# Google Fonts only serves woff2 to browsers it recognises
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+CSS_URL_RE = re.compile(r"url\((['\"]?)([^'\")]+)\1\)")
+
+
+def content_hash(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:10]
+
+
+class AssetBundle:
+    """
+    Content-hashed static assets under research_output/assets/.
+    Pages link to name.<hash>.ext files, so unchanged CSS/JS is written once
+    and cached by the browser across every report. Third-party fonts and
+    libraries are vendored into assets/vendor/ by vendor_all(); until then
+    (or if the download fails) pages fall back to the CDN. A failed download
+    is not retried for the rest of the process, so offline sessions do not
+    wait on timeouts at every save. Standalone pages inline everything instead.
+    """
+
+    _unavailable = set()  # Vendor names whose download failed in this process
+
+    def __init__(self, output_dir=None):
+        self.dir = Path(output_dir or Config.OUTPUT_DIR) / ASSET_DIR
+        self._written = {}
+        self._vendor = None
+
+    # --- First-party CSS/JS ---
+
+    def add(self, name, content, ext):
+        """Write content as name.<hash>.ext (once) and return its path"""
+        key = (name, ext, content_hash(content))
+        if key not in self._written:
+            path = self.dir / f"{name}.{key[2]}.{ext}"
+            if not path.exists():
+                self.dir.mkdir(parents=True, exist_ok=True)
+                atomic_write(path, content)  # Workers and server threads may write the same asset at once
+            self._written[key] = path
+        return self._written[key]
+
+    def _href(self, path, page_dir):
+        return Path(os.path.relpath(path, page_dir)).as_posix()
+
+    def style(self, name, css, page_dir, standalone=False):
+        if standalone:
+            return f"<style>\n{css}\n    </style>"
+        return f'<link rel="stylesheet" href="{self._href(self.add(name, css, "css"), page_dir)}">'
+
+    def script(self, name, js, page_dir, standalone=False):
+        if standalone:
+            return f"<script>\n{js}\n    </script>"
+        return f'<script src="{self._href(self.add(name, js, "js"), page_dir)}"></script>'
+
+    # --- Vendored libraries ---
+
+    def _vendored(self):
+        if self._vendor is None:
+            try:
+                with open(self.dir / VENDOR_MANIFEST, "r", encoding="utf-8") as f:
+                    self._vendor = json.load(f)
+            except (OSError, ValueError):
+                self._vendor = {}
+        return self._vendor
+
+    def vendor_tags(self, names, page_dir, standalone=False):
+        """<link>/<script> tags for third-party libraries: local copies when vendored, else the CDN"""
+        tags = []
+        for name in names:
+            kind, url = VENDOR[name]
+            local = self._vendored().get(name)
+            path = self.dir / local if local else None
+            if path and path.exists():
+                if standalone:
+                    text = path.read_text(encoding="utf-8")
+                    if kind == "css":
+                        text = self._inline_urls(text, path.parent)
+                        tags.append(f"<style>{text}</style>")
+                    else:
+                        tags.append(f"<script>{text}</script>")
+                    continue
+                url = self._href(path, page_dir)
+            tags.append(f'<link rel="stylesheet" href="{url}">' if kind == "css" else f'<script src="{url}"></script>')
+        return "\n    ".join(tags)
+
+    @staticmethod
+    def _inline_urls(css, base_dir):
+        def data_uri(match):
+            target = base_dir / match.group(2)
+            if not target.exists():
+                return match.group(0)
+            mime = mimetypes.guess_type(target.name)[0] or "font/woff2"
+            return f"url(data:{mime};base64,{base64.b64encode(target.read_bytes()).decode('ascii')})"
+        return CSS_URL_RE.sub(data_uri, css)
+
+    @staticmethod
+    def _download(url):
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+        with urllib.request.urlopen(request, timeout=15) as response:
+            return response.read()
+
+    def _vendor_css(self, name, url):
+        """Download a stylesheet and every file it references, rewriting url()s to the local copies"""
+        css = self._download(url).decode("utf-8")
+        files_dir = self.dir / "vendor" / "files"
+        files_dir.mkdir(parents=True, exist_ok=True)
+
+        def localize(match):
+            ref = match.group(2)
+            if ref.startswith("data:"):
+                return match.group(0)
+            data = self._download(urljoin(url, ref))
+            suffix = Path(ref.split("?")[0].split("#")[0]).suffix
+            file_name = f"{content_hash(data)}{suffix}"
+            (files_dir / file_name).write_bytes(data)
+            return f"url(files/{file_name})"
+
+        return CSS_URL_RE.sub(localize, css)
+
+    def vendor_all(self):
+        """Fetch missing third-party assets into assets/vendor/. Returns the names that are now local."""
+        vendored = self._vendored()
+        changed = False
+        for name, (kind, url) in VENDOR.items():
+            if name in vendored and (self.dir / vendored[name]).exists():
+                continue
+            if name in AssetBundle._unavailable:
+                continue
+            try:
+                data = self._vendor_css(name, url) if kind == "css" else self._download(url).decode("utf-8")
+            except Exception as e:
+                console.print(f"[yellow]Could not vendor {name} ({e}); pages will use the CDN.[/yellow]")
+                AssetBundle._unavailable.add(name)
+                continue
+            path = self.dir / "vendor" / f"{name}.{content_hash(data)}.{kind}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(data, encoding="utf-8")
+            vendored[name] = path.relative_to(self.dir).as_posix()
+            changed = True
+        if changed:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            with open(self.dir / VENDOR_MANIFEST, "w", encoding="utf-8") as f:
+                json.dump(vendored, f, indent=2)
+        return [name for name in VENDOR if name in vendored]
+
+
+if __name__ == "__main__":
+    local = AssetBundle().vendor_all()
+    console.print(f"[green]Vendored assets:[/green] {', '.join(local) or 'none'}")
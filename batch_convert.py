@@ -1,107 +1,166 @@
 import os
-import re
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+import html_generator
 from html_generator import HTMLGenerator
+from markdown_renderer import RENDERER_VERSION
 from dashboard_generator import DashboardGenerator
+from run_store import RunStore
+from run_exports import export_path
+from search_index import SearchIndex
+from asset_bundle import AssetBundle
+from output_writer import atomic_write
+from config import Config
 from rich.console import Console
 
 console = Console()
 
-def parse_txt_to_data(filepath):
-    """Parses .txt logs back into raw data for the HTML generator"""
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
-        
-    topic_match = re.search(r"Topic: (.+)", content)
-    topic = topic_match.group(1) if topic_match else "Unknown Topic"
-    
-    # Extract iterations
-    iterations = []
-    # Split by big iteration markers
-    parts = re.split(r"={40}\nITERATION \d+\n={40}", content)
-    
-    # The first part is the header, subsequent parts are iterations
-    for i, part in enumerate(parts[1:]):
-        findings_match = re.search(r"FINDINGS:\n(.*?)(?:\n-{40}|$)", part, re.DOTALL)
-        prompt_match = re.search(r"RESEARCH PROMPT:\n(.*?)(?:\n\nFINDINGS:|$)", part, re.DOTALL)
-        
-        prompt = prompt_match.group(1).strip() if prompt_match else "No prompt recorded."
-        findings = findings_match.group(1).strip() if findings_match else "No findings recorded."
-        
-        # Try to find quality score in the part (if it was logged)
-        # Note: older logs might not have it, so we estimate
-        quality = 0.85 # Default
-        quality_match = re.search(r"Quality Score: (\d+(?:\.\d+)?)%", part)
-        if quality_match:
-            quality = float(quality_match.group(1)) / 100.0
-        else:
-            # Estimate quality based on content length and structure
-            word_count = len(findings.split())
-            has_lists = '-' in findings or '*' in findings or '1.' in findings
-            has_code = '```' in findings or '    ' in findings
-            
-            score = 0.5
-            if word_count > 500: score += 0.2
-            if has_lists: score += 0.1
-            if has_code: score += 0.1
-            quality = min(score, 0.95)
-
-        iterations.append({
-            'prompt': prompt,
-            'response': findings,
-            'quality': quality
-        })
-    
-    # Extract final synthesis
-    synthesis = ""
-    syn_match = re.search(r"FINAL SYNTHESIS REPORT\n={40}\n\n(.*?)$", content, re.DOTALL)
-    if syn_match:
-        synthesis = syn_match.group(1).strip()
-    else:
-        # Fallback if the above fails
-        syn_start = content.find("FINAL SYNTHESIS REPORT")
-        if syn_start != -1:
-            synthesis = content[syn_start:].split('='*40)[-1].strip()
-        
-    return {
-        'initial_query': topic,
-        'responses': [i['response'] for i in iterations],
-        'research_prompts': [i['prompt'] for i in iterations],
-        'quality_history': [{'iteration': i+1, 'quality': iter_data['quality']} for i, iter_data in enumerate(iterations)],
-        'final_report': synthesis
-    }
-
-def batch_convert():
+STATE_NAME = "convert_state.json"
+
+# Per-process store handle for pool workers
+_worker_store = None
+
+
+def _init_worker():
+    # Never reuse SQLite connections inherited from the parent over fork()
+    global _worker_store
+    _worker_store = None
+    HTMLGenerator._renderers = {}
+
+
+def _convert_one(db_path, run_id, output_dir, standalone, payload):
+    """Render one run's HTML report (runs in a worker process). Returns (run_id, path, markdown stats)."""
+    global _worker_store
+    if _worker_store is None or _worker_store.path != Path(db_path):
+        _worker_store = RunStore(db_path)
+    renderer = HTMLGenerator.renderer_for(output_dir)
+    before = dict(renderer.stats)
+    path = export_path(output_dir, "html", run_id)
+    HTMLGenerator.generate(_worker_store.get_run(run_id), path, standalone=standalone, payload=payload,
+                           output_dir=output_dir)
+    return run_id, path, {k: renderer.stats[k] - before[k] for k in before}
+
+
+def _generator_signature(output_dir):
+    """Changes whenever the report template, renderer or vendored assets change"""
+    source = Path(html_generator.__file__).read_bytes()
+    vendored = ",".join(sorted(AssetBundle(output_dir)._vendored()))
+    return hashlib.sha1(source + RENDERER_VERSION.encode() + vendored.encode()).hexdigest()[:12]
+
+
+def _load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get('runs', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path, runs):
+    atomic_write(path, json.dumps({'runs': runs}))
+
+
+def batch_convert(standalone=False, payload=None, workers=None, changed_only=True, output_dir=None):
+    """
+    Regenerate report_*.html for every stored run on a process pool.
+    With changed_only, runs whose data, options and generator are unchanged
+    since the last conversion (recorded in convert_state.json) are skipped.
+    """
     console.rule("[bold cyan]DeepSeek Batch Report Converter[/bold cyan]")
-    output_dir = Path("research_output")
+    output_dir = Path(output_dir or Config.OUTPUT_DIR)
     
     if not output_dir.exists():
         console.print("[red]No research output directory found.[/red]")
         return
+    
+    # Logs from before the run store existed are imported once, then read from the store
+    store = RunStore(output_dir / "runs.db")
+    imported = store.import_legacy(output_dir)
+    if imported:
+        console.print(f"Imported {imported} legacy logs into the run store.")
         
-    data_files = list(output_dir.glob("research_data_*.txt"))
-    if not data_files:
-        console.print("[yellow]No log files found to convert.[/yellow]")
+    runs = store.list_runs()
+    if not runs:
+        console.print("[yellow]No runs found to convert.[/yellow]")
         return
-        
-    console.print(f"Found {len(data_files)} reports to convert...")
-    
+
+    if Config.VENDOR_ASSETS and not standalone:
+        AssetBundle(output_dir).vendor_all()
+
+    state_path = output_dir / STATE_NAME
+    state = _load_state(state_path)
+    signature = f"{_generator_signature(output_dir)}|{int(standalone)}|{payload or Config.REPORT_PAYLOAD}"
+    keys = {run['run_id']: f"{run['updated_at']}|{signature}" for run in runs}
+    pending = [
+        run['run_id'] for run in runs
+        if not changed_only
+        or state.get(run['run_id']) != keys[run['run_id']]
+        or not export_path(output_dir, "html", run['run_id']).exists()
+    ]
+    skipped = len(runs) - len(pending)
+    workers = max(1, workers or Config.CONVERT_WORKERS or os.cpu_count() or 1)
+    workers = min(workers, max(len(pending), 1))
+    console.print(f"Found {len(runs)} reports: {len(pending)} to convert, {skipped} unchanged "
+                  f"({workers} worker{'s' if workers > 1 else ''})...")
+
     success_count = 0
-    for f in data_files:
-        html_path = output_dir / f.name.replace(".txt", ".html").replace("research_data_", "report_")
-        
-        # Skip if already exists unless user wants override (always override for this batch)
-        try:
-            data = parse_txt_to_data(f)
-            HTMLGenerator.generate(data, html_path)
-            console.print(f"[green]DONE:[/green] {f.name} -> {html_path.name}")
-            success_count += 1
-        except Exception as e:
-            console.print(f"[red]FAIL:[/red] {f.name}: {e}")
+    markdown = {'rendered': 0, 'hits': 0}
+    started = time.perf_counter()
+
+    def finished(run_id, html_path, stats):
+        nonlocal success_count
+        store.record_file(run_id, "html", html_path)
+        state[run_id] = keys[run_id]
+        for k in markdown:
+            markdown[k] += stats[k]
+        success_count += 1
+        console.print(f"[green]DONE:[/green] {run_id} -> {html_path.name}")
+
+    job_args = [(str(store.path), run_id, output_dir, standalone, payload) for run_id in pending]
+    if workers == 1:
+        for args in job_args:
+            try:
+                finished(*_convert_one(*args))
+            except Exception as e:
+                console.print(f"[red]FAIL:[/red] {args[1]}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {pool.submit(_convert_one, *args): args[1] for args in job_args}
+            for future in as_completed(futures):
+                try:
+                    finished(*future.result())
+                except Exception as e:
+                    console.print(f"[red]FAIL:[/red] {futures[future]}: {e}")
+    elapsed = time.perf_counter() - started
+
+    # Forget runs that no longer exist
+    _save_state(state_path, {run_id: key for run_id, key in state.items() if run_id in keys})
+    SearchIndex(store).update()
+    freed = store.collect_garbage()  # Text of replaced or re-imported runs
+    if freed:
+        console.print(f"[dim]Freed {freed} unreferenced blobs.[/dim]")
+    store.close()
             
-    DashboardGenerator.generate()
-    console.print(f"\n[bold green]Success![/bold green] Converted {success_count} reports.")
+    DashboardGenerator.generate(output_dir)
+    rate = success_count / elapsed if elapsed > 0 else 0.0
+    console.print(f"\n[bold green]Success![/bold green] Converted {success_count} reports, skipped {skipped} unchanged "
+                  f"in {elapsed:.2f}s ({rate:.1f} files/s).")
+    console.print(f"[dim]Markdown sections: {markdown['rendered']} rendered, {markdown['hits']} from cache[/dim]")
     console.print("[cyan]Master dashboard updated: dashboard.html[/cyan]")
+    return success_count
 
 if __name__ == "__main__":
-    batch_convert()
+    parser = argparse.ArgumentParser(description="Regenerate HTML reports and the dashboard from the run store")
+    parser.add_argument("--standalone", action="store_true", help="Inline all CSS/JS/libraries into each report for sharing")
+    parser.add_argument("--payload", choices=["inline", "gzip", "sidecar"],
+                        help="How report data is embedded (default: Config.REPORT_PAYLOAD)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: Config.CONVERT_WORKERS or CPU count)")
+    parser.add_argument("--changed-only", dest="changed_only", action="store_true", default=True,
+                        help="Only convert runs that changed since the last conversion (default)")
+    parser.add_argument("--all", dest="changed_only", action="store_false", help="Reconvert every run")
+    args = parser.parse_args()
+    batch_convert(standalone=args.standalone, payload=args.payload, workers=args.workers, changed_only=args.changed_only)
@@ -0,0 +1,140 @@
+import re
+import sys
+import time
+import random
+import tempfile
+import tracemalloc
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+from log_parser import parse_txt_to_data
+from run_exports import render_txt
+
+console = Console()
+
+SIZES = [10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 50 * 1024 ** 2]
+WORDS = "qubit decoder latency surface code fidelity logical physical threshold error syndrome".split()
+
+
+def regex_parse_txt_to_data(filepath):
+    """The previous whole-file regex parser, kept as the baseline"""
+    with open(filepath, "r", encoding="utf-8") as f:
+        content = f.read()
+        
+    topic_match = re.search(r"Topic: (.+)", content)
+    topic = topic_match.group(1) if topic_match else "Unknown Topic"
+    
+    # Extract iterations
+    iterations = []
+    # Split by big iteration markers
+    parts = re.split(r"={40}\nITERATION \d+\n={40}", content)
+    
+    # The first part is the header, subsequent parts are iterations
+    for i, part in enumerate(parts[1:]):
+        findings_match = re.search(r"FINDINGS:\n(.*?)(?:\n-{40}|$)", part, re.DOTALL)
+        prompt_match = re.search(r"RESEARCH PROMPT:\n(.*?)(?:\n\nFINDINGS:|$)", part, re.DOTALL)
+        
+        prompt = prompt_match.group(1).strip() if prompt_match else "No prompt recorded."
+        findings = findings_match.group(1).strip() if findings_match else "No findings recorded."
+        
+        # Try to find quality score in the part (if it was logged)
+        # Note: older logs might not have it, so we estimate
+        quality = 0.85 # Default
+        quality_match = re.search(r"Quality Score: (\d+(?:\.\d+)?)%", part)
+        if quality_match:
+            quality = float(quality_match.group(1)) / 100.0
+        else:
+            # Estimate quality based on content length and structure
+            word_count = len(findings.split())
+            has_lists = '-' in findings or '*' in findings or '1.' in findings
+            has_code = '```' in findings or '    ' in findings
+            
+            score = 0.5
+            if word_count > 500: score += 0.2
+            if has_lists: score += 0.1
+            if has_code: score += 0.1
+            quality = min(score, 0.95)
+
+        iterations.append({
+            'prompt': prompt,
+            'response': findings,
+            'quality': quality
+        })
+    
+    # Extract final synthesis
+    synthesis = ""
+    syn_match = re.search(r"FINAL SYNTHESIS REPORT\n={40}\n\n(.*?)$", content, re.DOTALL)
+    if syn_match:
+        synthesis = syn_match.group(1).strip()
+    else:
+        # Fallback if the above fails
+        syn_start = content.find("FINAL SYNTHESIS REPORT")
+        if syn_start != -1:
+            synthesis = content[syn_start:].split('='*40)[-1].strip()
+        
+    return {
+        'initial_query': topic,
+        'responses': [i['response'] for i in iterations],
+        'research_prompts': [i['prompt'] for i in iterations],
+        'quality_history': [{'iteration': i+1, 'quality': iter_data['quality']} for i, iter_data in enumerate(iterations)],
+        'final_report': synthesis
+    }
+
+
+def make_log(path, size):
+    """Write a synthetic research_data log of roughly the given size"""
+    rng = random.Random(size)
+    paragraph = lambda n: " ".join(rng.choice(WORDS) for _ in range(n))
+    run = {'initial_query': "Benchmark topic", 'responses': [], 'research_prompts': [],
+           'final_report': "## Synthesis\n\n" + paragraph(200), 'finished_at': "2026-01-01T00:00:00"}
+    while len(render_txt(run)) < size:
+        body = "\n\n".join(f"- {paragraph(60)}" for _ in range(max(1, min(size // 4000, 60))))
+        run['research_prompts'].append(paragraph(30))
+        run['responses'].append(f"## Findings\n\n{body}\n\n```\ncode {paragraph(10)}\n```")
+    path.write_text(render_txt(run), encoding="utf-8")
+
+
+def measure(parser, path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parser(path)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    parser(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    sizes = SIZES if "--full" in sys.argv else SIZES[:4]
+    parsers = [("regex", regex_parse_txt_to_data), ("stream", parse_txt_to_data),
+               ("stream+mmap", lambda p: parse_txt_to_data(p, use_mmap=True))]
+    table = Table(title="research_data TXT parsers", header_style="bold magenta")
+    table.add_column("Log size", justify="right")
+    for name, _ in parsers:
+        table.add_column(f"{name} ms", justify="right")
+        table.add_column(f"{name} peak MB", justify="right")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = Path(tmp) / f"research_data_{size}.txt"
+            make_log(path, size)
+            repeat = 5 if size <= 1024 ** 2 else 2
+            row = [f"{path.stat().st_size / 1024:,.0f} KB"]
+            results = []
+            for name, parser in parsers:
+                result, seconds, peak = measure(parser, path, repeat)
+                results.append(result)
+                row += [f"{seconds * 1000:,.1f}", f"{peak / 1024 ** 2:,.1f}"]
+            if any(r != results[0] for r in results[1:]):
+                console.print(f"[red]Parsers disagree on the {size}-byte log[/red]")
+            table.add_row(*row)
+    console.print(table)
+    if "--full" not in sys.argv:
+        console.print("[dim]Pass --full to include the 50 MB log.[/dim]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import zlib
+import hashlib
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+COMPRESS_LEVEL = 6
+BATCH = 500  # Hashes per SELECT ... IN (...), well under SQLite's variable limit
+
+
+class BlobStore:
+    """
+    Content-addressed text storage inside the run store database.
+    Each distinct text is kept once, zlib-compressed, under the sha1 of its
+    contents; rows elsewhere reference it by hash. The empty text is the
+    empty hash and is never stored. Callers hold the store's lock.
+    The blob_text(hash) SQL function exposes the texts to queries and views.
+    It is a Python function registered on each connection RunStore opens;
+    other SQLite clients (the sqlite3 shell, a plain sqlite3.connect) get
+    "no such function" from anything that calls it, such as the
+    search_content view and FTS snippets. They can still read every table,
+    and page-level backups (.backup, the backup API) are unaffected.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        conn.executescript(SCHEMA)
+        conn.create_function("blob_text", 1, self.get, deterministic=True)
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest() if text else ""
+
+    def put(self, text):
+        """Store text (once) and return its hash"""
+        digest = self.key(text)
+        if digest and not self.conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone():
+            raw = text.encode("utf-8")
+            self.conn.execute(
+                "INSERT INTO blobs (hash, size, data) VALUES (?, ?, ?)",
+                (digest, len(raw), zlib.compress(raw, COMPRESS_LEVEL))
+            )
+        return digest
+
+    def get(self, digest):
+        """The text stored under digest, or None if it is not stored"""
+        if not digest:
+            return ""
+        row = self.conn.execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def get_many(self, hashes):
+        """{hash: text} for the given hashes ('' maps to the empty text)"""
+        wanted = list({h for h in hashes if h})
+        texts = {"": ""}
+        for start in range(0, len(wanted), BATCH):
+            chunk = wanted[start:start + BATCH]
+            rows = self.conn.execute(
+                f"SELECT hash, data FROM blobs WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for digest, data in rows:
+                texts[digest] = zlib.decompress(data).decode("utf-8")
+        return texts
+
+    def collect_garbage(self, referenced_sql):
+        """Delete blobs no longer referenced; referenced_sql selects every live hash. Returns the count."""
+        return self.conn.execute(f"DELETE FROM blobs WHERE hash NOT IN ({referenced_sql})").rowcount
+
+    def stats(self):
+        """{'blobs', 'bytes' (uncompressed), 'stored' (compressed)}"""
+        count, size, stored = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+        ).fetchone()
+        return {'blobs': count, 'bytes': size, 'stored': stored}
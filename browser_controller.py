@@ -283,8 +283,11 @@ class BrowserController:
                     console.print(f"[red]Interaction failure: {e}[/red]")
         return None
     
-    def send_message(self, message):
-        """Send a message to DeepSeek and return response"""
+    def send_message(self, message, on_progress=None):
+        """
+        Send a message to DeepSeek and return response.
+        on_progress(partial_text) is called whenever the streamed answer grows.
+        """
         console.print(f"[yellow]💬 Sending message ({len(message)} chars)...[/yellow]")
         
         # 1. Type the message
@@ -340,7 +343,7 @@ class BrowserController:
                 time.sleep(2)
                 
                 # Wait for response to complete, passing the baseline
-                return self.wait_for_response(baseline=baseline_text)
+                return self.wait_for_response(baseline=baseline_text, on_progress=on_progress)
             except Exception as e:
                 console.print(f"[red]Failed to finalize message send: {e}[/red]")
         else:
@@ -348,7 +351,7 @@ class BrowserController:
         
         return ""
     
-    def wait_for_response(self, timeout=300, baseline=None): # Increased total timeout but faster polling
+    def wait_for_response(self, timeout=300, baseline=None, on_progress=None): # Increased total timeout but faster polling
         """Wait for DeepSeek to complete its response with adaptive speed"""
         console.print("[dim]Waiting for DeepSeek to respond...[/dim]")
         
@@ -386,6 +389,13 @@ class BrowserController:
                 if current_response and len(current_response.strip()) > 0:
                     current_length = len(current_response)
                     
+                    # Report streamed text to any listener (e.g. speculative refinement)
+                    if on_progress and current_length != last_length:
+                        try:
+                            on_progress(current_response)
+                        except Exception as e:
+                            console.print(f"[dim]Progress listener error: {e}[/dim]")
+                    
                     # If regenerate button appears and stop button is gone, we are 100% finished
                     if is_done and not is_thinking:
                         # One final verification: if we have a baseline, the response MUST be different 
@@ -22,7 +22,22 @@ class Config:
     MIN_QUALITY_SCORE = 0.8  # Stop when quality reaches this
     REUSE_CHAT = True  # Whether to reuse the same chat for multiple iterations
     MAX_MESSAGES_PER_CHAT = 15  # Limit messages per chat to avoid context length/lag issues
-    
+    PRIOR_RUNS = 3  # Closest earlier runs whose findings may seed a new topic (0 disables)
+    PRIOR_MIN_SIMILARITY = 0.6  # Topic similarity (0-1) needed before an earlier run is reused
+    PRIOR_FINDINGS_TOKENS = 1500  # Budget for the earlier findings in the first refinement prompt
+    FANOUT_CANDIDATES = 1  # >1: ask for this many prompts per refinement and research them on parallel sessions
+    PIPELINE_REFINEMENT = False  # Refine iteration N+1 on a second session while response N streams
+    SPECULATION_MIN_CHARS = 1500  # Streamed chars before the speculative refinement is sent
+    SPECULATION_MIN_COVERAGE = 0.6  # Share of the final response the snapshot must cover to be kept
+    SPECULATION_MAX_SNAPSHOTS = 5  # Re-snapshots as a long response grows (1500 chars covers ~19k after 5)
+
+    # Context budgeting (estimated tokens)
+    CONTEXT_TOKENS = 64000  # DeepSeek context window
+    RESPONSE_RESERVE_TOKENS = 8000  # Always leave room for the model's answer
+    REFINEMENT_HISTORY_TOKENS = 2000  # History summary inside refinement prompts
+    CARRYOVER_TOKENS = 3000  # Findings carried into a fresh chat
+    FOLLOW_UP_TOKENS = 250  # Response excerpt used for follow-up questions
+
     # CAPTCHA handling
     PAUSE_ON_CAPTCHA = True
     CAPTCHA_TIMEOUT = 300  # 5 minutes max to solve CAPTCHA
@@ -30,6 +45,25 @@ class Config:
     # Output
     OUTPUT_DIR = Path("research_output")
     OUTPUT_DIR.mkdir(exist_ok=True)
+    STANDALONE_REPORTS = False  # Inline CSS/JS/libraries into each report instead of linking assets/
+    REPORT_PAYLOAD = "inline"  # "gzip" embeds the report data compressed, "sidecar" writes report_*.json.gz (needs http://)
+    CONVERT_WORKERS = 0  # batch_convert worker processes (0 = one per CPU)
+    VENDOR_ASSETS = True  # Download fonts and libraries into assets/ once so pages work offline
+    BACKGROUND_WRITES = True  # save_results exports on a background thread (flushed on exit)
+    METRICS_FORMAT = "auto"  # Per-iteration metrics export: "parquet" (needs pyarrow), "csv", or "auto" (parquet if available)
+
+    # Report server (report_server.py)
+    SERVER_PORT = 8765
+    SERVER_CACHE_SIZE = 64  # Rendered pages kept in the LRU cache
+    LIVE_REPORTS = False  # Serve the running report while research runs (new iterations appear without a reload)
+    LIVE_POLL_INTERVAL = 1.0  # Seconds between run store checks per open live report
+    LIVE_HEARTBEAT = 15  # Seconds of silence before a keep-alive comment is sent
+    LIVE_RETRY_MS = 3000  # Browser reconnect delay after a dropped stream
+
+    # Dashboard
+    DASHBOARD_MODE = "auto"  # "cards" inlines every card, "virtual" loads a sharded index and renders visible cards only
+    DASHBOARD_VIRTUAL_THRESHOLD = 300  # Runs above which "auto" switches to the virtual dashboard
+    DASHBOARD_SHARD_SIZE = 2000  # Runs per index shard
     
     # Selectors (DeepSeek UI - update if they change their site)
     SELECTORS = {
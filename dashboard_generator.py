@@ -1,54 +1,24 @@
 import os
 import json
+import hashlib
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
-
-class DashboardGenerator:
-    """
-    Generates a premium master dashboard.html to navigate all research reports
-    """
-    
-    @staticmethod
-    def generate(output_dir="research_output"):
-        output_path = Path(output_dir)
-        if not output_path.exists():
-            return None
-            
-        reports = []
-        summaries = list(output_path.glob("summary_*.json"))
-        summaries.sort(reverse=True)
-        
-        for s_path in summaries:
-            try:
-                with open(s_path, "r", encoding="utf-8") as f:
-                    meta = json.load(f)
-                
-                timestamp = s_path.stem.replace("summary_", "")
-                html_file = f"report_{timestamp}.html"
-                
-                if (output_path / html_file).exists():
-                    reports.append({
-                        'topic': meta.get('topic', 'Untitled Research'),
-                        'date': meta.get('timestamp', ''),
-                        'iterations': meta.get('iterations', 0),
-                        'file': html_file,
-                        'timestamp': timestamp,
-                        'is_new': (datetime.now() - datetime.fromisoformat(meta.get('timestamp', ''))).days < 1
-                    })
-            except Exception as e:
-                print(f"Error parsing {s_path}: {e}")
-
-        html_template = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Intelligence Hub</title>
-    <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;600;700&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <style>
-        :root {{
+from config import Config
+from run_store import RunStore
+from asset_bundle import AssetBundle, content_hash
+from run_exports import export_path
+from output_writer import atomic_write
+from summarizer import STOPWORDS, content_words
+
+MANIFEST_NAME = "dashboard_manifest.json"
+MANIFEST_VERSION = 2
+INDEX_DIR = "dashboard_index"
+SEARCH_NAME = "search.js"
+REPORT_KEYWORDS = 40  # Most frequent report words indexed per run
+
+DASHBOARD_CSS = """
+        :root {
             --primary: #00e5ff;
             --secondary: #0081ff;
             --bg: #050a14;
@@ -57,83 +27,83 @@ class DashboardGenerator:
             --text: #ffffff;
             --text-dim: #cbd5e1;
             --accent: #ff007b;
-        }}
+        }
 
-        * {{ box-sizing: border-box; margin: 0; padding: 0; }}
+        * { box-sizing: border-box; margin: 0; padding: 0; }
 
-        body {{
+        body {
             font-family: 'Outfit', sans-serif;
             background-color: var(--bg);
             color: var(--text);
             min-height: 100vh;
             overflow-x: hidden;
-        }}
+        }
 
         /* Animated Blob Background */
-        .blobs {{
+        .blobs {
             position: fixed;
             top: 0; left: 0; width: 100%; height: 100%;
             z-index: -1;
             filter: blur(80px);
             opacity: 0.4;
-        }}
+        }
 
-        .blob {{
+        .blob {
             position: absolute;
             width: 500px; height: 500px;
             border-radius: 50%;
             animation: move 20s infinite alternate;
-        }}
+        }
 
-        .blob-1 {{ background: var(--primary); top: -100px; left: -100px; animation-duration: 25s; }}
-        .blob-2 {{ background: var(--secondary); bottom: -100px; right: -100px; animation-duration: 30s; }}
+        .blob-1 { background: var(--primary); top: -100px; left: -100px; animation-duration: 25s; }
+        .blob-2 { background: var(--secondary); bottom: -100px; right: -100px; animation-duration: 30s; }
 
-        @keyframes move {{
-            0% {{ transform: translate(0, 0) scale(1); }}
-            100% {{ transform: translate(100px, 100px) scale(1.2); }}
-        }}
+        @keyframes move {
+            0% { transform: translate(0, 0) scale(1); }
+            100% { transform: translate(100px, 100px) scale(1.2); }
+        }
 
-        .container {{
+        .container {
             max-width: 1300px;
             margin: 0 auto;
             padding: 80px 24px;
-        }}
+        }
 
-        header {{
+        header {
             text-align: center;
             margin-bottom: 80px;
-        }}
+        }
 
-        .logo-area {{
+        .logo-area {
             display: inline-flex;
             align-items: center;
             gap: 20px;
             margin-bottom: 30px;
-        }}
+        }
 
-        .logo-area i {{
+        .logo-area i {
             font-size: 3.5rem;
             background: linear-gradient(135deg, var(--primary), var(--secondary));
             -webkit-background-clip: text;
             -webkit-text-fill-color: transparent;
-        }}
+        }
 
-        h1 {{
+        h1 {
             font-size: 4rem;
             font-weight: 800;
             letter-spacing: -2px;
             margin-bottom: 15px;
             color: #fff;
             text-shadow: 0 10px 40px rgba(0,0,0,0.5);
-        }}
+        }
 
-        .search-container {{
+        .search-container {
             max-width: 700px;
             margin: 0 auto 60px;
             position: relative;
-        }}
+        }
 
-        .search-bar {{
+        .search-bar {
             width: 100%;
             background: rgba(255, 255, 255, 0.03);
             border: 1px solid var(--border);
@@ -143,30 +113,30 @@ class DashboardGenerator:
             font-size: 1.1rem;
             backdrop-filter: blur(20px);
             transition: all 0.3s ease;
-        }}
+        }
 
-        .search-bar:focus {{
+        .search-bar:focus {
             outline: none;
             border-color: var(--primary);
             box-shadow: 0 0 30px rgba(0, 229, 255, 0.15);
             background: rgba(255, 255, 255, 0.05);
-        }}
+        }
 
-        .search-container i {{
+        .search-container i {
             position: absolute;
             left: 25px; top: 50%;
             transform: translateY(-50%);
             color: var(--text-dim);
             font-size: 1.2rem;
-        }}
+        }
 
-        .grid {{
+        .grid {
             display: grid;
             grid-template-columns: repeat(auto-fill, minmax(380px, 1fr));
             gap: 30px;
-        }}
+        }
 
-        .card {{
+        .card {
             background: var(--card-bg);
             border: 1px solid var(--border);
             border-radius: 32px;
@@ -179,23 +149,23 @@ class DashboardGenerator:
             display: flex;
             flex-direction: column;
             justify-content: space-between;
-        }}
+        }
 
-        .card:hover {{
+        .card:hover {
             transform: translateY(-10px);
             border-color: var(--primary);
             background: rgba(255, 255, 255, 0.06);
             box-shadow: 0 30px 60px rgba(0, 0, 0, 0.5);
-        }}
+        }
 
-        .card-top {{
+        .card-top {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-bottom: 25px;
-        }}
+        }
 
-        .new-tag {{
+        .new-tag {
             background: linear-gradient(135deg, var(--accent), #ff5e00);
             color: #fff;
             padding: 4px 12px;
@@ -203,34 +173,34 @@ class DashboardGenerator:
             font-size: 0.7rem;
             font-weight: 800;
             text-transform: uppercase;
-        }}
+        }
 
-        .cycles {{
+        .cycles {
             font-size: 0.8rem;
             color: var(--primary);
             font-weight: 700;
             letter-spacing: 1px;
             text-transform: uppercase;
-        }}
+        }
 
-        .card h3 {{
+        .card h3 {
             font-size: 1.8rem;
             font-weight: 700;
             line-height: 1.25;
             margin-bottom: 35px;
             color: #fff;
             letter-spacing: -0.5px;
-        }}
+        }
 
-        .card-footer {{
+        .card-footer {
             display: flex;
             justify-content: space-between;
             align-items: center;
             padding-top: 25px;
             border-top: 1px solid var(--border);
-        }}
+        }
 
-        .copy-topic-btn {{
+        .copy-topic-btn {
             background: rgba(255, 255, 255, 0.05);
             border: 1px solid var(--border);
             color: var(--text-dim);
@@ -243,18 +213,18 @@ class DashboardGenerator:
             display: flex;
             align-items: center;
             gap: 8px;
-        }}
+        }
 
-        .copy-topic-btn:hover {{
+        .copy-topic-btn:hover {
             background: rgba(255, 255, 255, 0.1);
             color: #fff;
             border-color: var(--primary);
-        }}
+        }
 
-        .copy-topic-btn i {{ font-size: 0.9rem; }}
+        .copy-topic-btn i { font-size: 0.9rem; }
 
         /* Toast Notification */
-        #toast {{
+        #toast {
             position: fixed;
             bottom: 40px;
             left: 50%;
@@ -268,19 +238,19 @@ class DashboardGenerator:
             z-index: 10000;
             transition: transform 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
             pointer-events: none;
-        }}
+        }
 
-        #toast.active {{ transform: translateX(-50%) translateY(0); }}
+        #toast.active { transform: translateX(-50%) translateY(0); }
 
-        .date-box {{
+        .date-box {
             color: var(--text-dim);
             font-size: 0.9rem;
             display: flex;
             align-items: center;
             gap: 8px;
-        }}
+        }
 
-        .arrow {{
+        .arrow {
             width: 40px; height: 40px;
             border-radius: 50%;
             background: rgba(255, 255, 255, 0.05);
@@ -288,48 +258,275 @@ class DashboardGenerator:
             align-items: center;
             justify-content: center;
             transition: all 0.3s ease;
-        }}
+        }
 
-        .card:hover .arrow {{
+        .card:hover .arrow {
             background: var(--primary);
             color: #000;
-        }}
-    </style>
-</head>
-<body>
-    <div id="toast">Copied to Clipboard!</div>
+        }
 
-    <div class="blobs">
-        <div class="blob blob-1"></div>
-        <div class="blob blob-2"></div>
-    </div>
+        /* Virtual dashboard: fixed-size cards positioned over a sized container */
+        .list-controls {
+            max-width: 700px;
+            margin: -30px auto 40px;
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            color: var(--text-dim);
+        }
 
-    <div class="container">
-        <header>
-            <div class="logo-area">
-                <i class="fas fa-atom"></i>
-                <h1>Intelligence Hub</h1>
-            </div>
-            <p style="color: var(--text-dim); font-size: 1.1rem;">DeepSeek-powered research exploration engine</p>
-        </header>
+        .list-controls select {
+            background: rgba(255, 255, 255, 0.05);
+            border: 1px solid var(--border);
+            color: var(--text);
+            padding: 8px 14px;
+            border-radius: 12px;
+            font-family: inherit;
+        }
 
-        <div class="search-container">
-            <i class="fas fa-search"></i>
-            <input type="text" class="search-bar" placeholder="Search research topics..." onkeyup="filter(this.value)">
-        </div>
+        .vgrid { display: block; position: relative; }
 
-        <div class="grid" id="grid">
-            {"".join([f'''
-            <div class="card" data-topic="{r['topic'].lower()}">
+        .vgrid .card {
+            position: absolute;
+            top: 0; left: 0;
+            backdrop-filter: none;
+            transition: border-color 0.2s ease, background 0.2s ease;
+            overflow: hidden;
+        }
+
+        .vgrid .card:hover { transform: none; box-shadow: none; }
+
+        .vgrid .card h3 {
+            display: -webkit-box;
+            -webkit-line-clamp: 2;
+            -webkit-box-orient: vertical;
+            overflow: hidden;
+        }
+"""
+
+COPY_SCRIPT = """
+        function copyTopic(text) {
+            navigator.clipboard.writeText(text).then(() => {
+                const toast = document.getElementById('toast');
+                toast.classList.add('active');
+                setTimeout(() => {
+                    toast.classList.remove('active');
+                }, 2000);
+            });
+        }
+"""
+
+# Inverted index over topics, prompts and report keywords, fetched on first use.
+# Every query word must match an indexed term as a prefix.
+SEARCH_SCRIPT = """
+        const HubSearch = {
+            runs: null, terms: null, keys: null, stop: null, waiting: [],
+            load(index) {
+                this.runs = index.runs;
+                this.terms = index.terms;
+                this.keys = Object.keys(index.terms).sort();
+                this.stop = new Set(index.stop);
+                this.waiting.forEach(fn => fn());
+                this.waiting = [];
+            },
+            ensure(fn) {
+                if (this.terms) return fn();
+                this.waiting.push(fn);
+                if (this.waiting.length > 1) return;
+                const s = document.createElement('script');
+                s.src = SEARCH_INDEX;
+                document.body.appendChild(s);
+            },
+            postings(prefix) {
+                let lo = 0, hi = this.keys.length;
+                while (lo < hi) {
+                    const mid = (lo + hi) >> 1;
+                    if (this.keys[mid] < prefix) lo = mid + 1; else hi = mid;
+                }
+                const hits = new Set();
+                for (let i = lo; i < this.keys.length && this.keys[i].startsWith(prefix); i++) {
+                    this.terms[this.keys[i]].forEach(r => hits.add(r));
+                }
+                return hits;
+            },
+            query(q) {
+                // Set of matching run ids, or null when the query has no searchable words
+                const words = (q.toLowerCase().match(/[a-z0-9]+(?:'[a-z]+)?/g) || []).filter(w => !this.stop.has(w));
+                let result = null;
+                for (const w of words) {
+                    const hits = this.postings(w);
+                    result = result ? new Set([...result].filter(r => hits.has(r))) : hits;
+                    if (!result.size) break;
+                }
+                return result && new Set([...result].map(i => this.runs[i]));
+            }
+        };
+"""
+
+CARDS_SCRIPT = """
+        let debounce = 0;
+
+        function filter(q) {
+            clearTimeout(debounce);
+            debounce = setTimeout(() => {
+                q = q.trim().toLowerCase();
+                const apply = hits => document.querySelectorAll('.card').forEach(c => {
+                    const match = !q || c.dataset.topic.includes(q) || (hits && hits.has(c.dataset.run));
+                    c.style.display = match ? 'flex' : 'none';
+                });
+                if (!q) return apply(null);
+                apply(null);
+                HubSearch.ensure(() => apply(HubSearch.query(q)));
+            }, 150);
+        }
+"""
+
+# Shards call HubIndex.load(); JSONP rather than fetch() so the page also works from file://
+VIRTUAL_SCRIPT = """
+        const CARD_HEIGHT = 300, GAP = 30, MIN_WIDTH = 380, BUFFER_ROWS = 2;
+        const F = {id: 0, topic: 1, date: 2, iterations: 3, quality: 4, file: 5};
+        const grid = document.getElementById('grid');
+        let all = [], view = [], query = '', sortKey = 'newest', cols = 1, cardWidth = MIN_WIDTH;
+        let rendered = '', frame = 0, debounce = 0, hits = null;
+
+        const HubIndex = {
+            load(shard, rows) {
+                all = all.concat(rows);
+                refresh();
+            }
+        };
+
+        function escapeHtml(s) {
+            return String(s).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+        }
+
+        const sorters = {
+            newest: (a, b) => a[F.id] < b[F.id] ? 1 : -1,
+            oldest: (a, b) => a[F.id] > b[F.id] ? 1 : -1,
+            topic: (a, b) => a[F.topic].localeCompare(b[F.topic]),
+            cycles: (a, b) => b[F.iterations] - a[F.iterations],
+            quality: (a, b) => (b[F.quality] ?? -1) - (a[F.quality] ?? -1)
+        };
+
+        function refresh() {
+            const q = query.toLowerCase();
+            view = q ? all.filter(r => r[F.topic].toLowerCase().includes(q) || (hits && hits.has(r[F.id]))) : all.slice();
+            view.sort(sorters[sortKey]);
+            document.getElementById('count').textContent = `${view.length} of ${all.length} reports`;
+            layout();
+        }
+
+        function layout() {
+            const width = grid.clientWidth;
+            cols = Math.max(1, Math.floor((width + GAP) / (MIN_WIDTH + GAP)));
+            cardWidth = (width - GAP * (cols - 1)) / cols;
+            const rows = Math.ceil(view.length / cols);
+            grid.style.height = Math.max(0, rows * (CARD_HEIGHT + GAP) - GAP) + 'px';
+            rendered = '';
+            render();
+        }
+
+        function renderCard(r, i) {
+            const x = (i % cols) * (cardWidth + GAP), y = Math.floor(i / cols) * (CARD_HEIGHT + GAP);
+            const isNew = Date.now() - new Date(r[F.date]).getTime() < 86400000;
+            return `<div class="card" style="transform: translate(${x}px, ${y}px); width: ${cardWidth}px; height: ${CARD_HEIGHT}px;">
+                <div class="card-top">
+                    <span class="cycles">${r[F.iterations]} Research Cycles</span>
+                    ${isNew ? '<span class="new-tag">New</span>' : ''}
+                </div>
+                <a href="${escapeHtml(r[F.file])}" style="text-decoration: none; color: inherit;">
+                    <h3>${escapeHtml(r[F.topic])}</h3>
+                </a>
+                <div style="margin-bottom: 25px;">
+                    <button class="copy-topic-btn" data-index="${i}">
+                        <i class="far fa-copy"></i> Copy Topic
+                    </button>
+                </div>
+                <div class="card-footer">
+                    <div class="date-box"><i class="far fa-calendar-alt"></i> ${escapeHtml(r[F.date].slice(0, 10))}</div>
+                    <a href="${escapeHtml(r[F.file])}" class="arrow"><i class="fas fa-chevron-right"></i></a>
+                </div>
+            </div>`;
+        }
+
+        function render() {
+            frame = 0;
+            const rowHeight = CARD_HEIGHT + GAP;
+            const top = window.scrollY - (grid.getBoundingClientRect().top + window.scrollY);
+            const first = Math.max(0, Math.floor(top / rowHeight) - BUFFER_ROWS);
+            const last = Math.ceil((top + window.innerHeight) / rowHeight) + BUFFER_ROWS;
+            const start = first * cols, end = Math.min(view.length, last * cols);
+            const key = `${start}:${end}`;
+            if (key === rendered) return;
+            rendered = key;
+            let html = '';
+            for (let i = start; i < end; i++) html += renderCard(view[i], i);
+            grid.innerHTML = html;
+        }
+
+        function schedule() {
+            if (!frame) frame = requestAnimationFrame(render);
+        }
+
+        function filter(q) {
+            clearTimeout(debounce);
+            debounce = setTimeout(() => {
+                query = q.trim();
+                hits = null;
+                refresh();
+                if (query) HubSearch.ensure(() => {
+                    if (query !== q.trim()) return;
+                    hits = HubSearch.query(query);
+                    refresh();
+                });
+            }, 150);
+        }
+
+        function sortBy(key) {
+            sortKey = key;
+            refresh();
+        }
+
+        grid.addEventListener('click', e => {
+            const btn = e.target.closest('.copy-topic-btn');
+            if (btn) copyTopic(view[+btn.dataset.index][F.topic]);
+        });
+        window.addEventListener('scroll', schedule, {passive: true});
+        window.addEventListener('resize', () => requestAnimationFrame(layout));
+
+        // Newest shard first so the default view fills in before older history arrives
+        SHARDS.slice().reverse().forEach(src => {
+            const s = document.createElement('script');
+            s.src = src;
+            s.async = true;
+            document.body.appendChild(s);
+        });
+"""
+
+class DashboardGenerator:
+    """
+    Generates a premium master dashboard.html to navigate all research reports.
+    A manifest keyed by run id caches each card's HTML, so only new or changed
+    runs are rendered and an unchanged archive skips the rewrite entirely.
+    Large archives get a virtual dashboard instead: the run list is written as
+    sharded index files and the page renders only the cards in view.
+    Styles and scripts are linked from the shared assets/ bundle.
+    """
+
+    @staticmethod
+    def _render_card(r):
+        escaped_topic = r['topic'].replace("'", "\\'")
+        return f'''
+            <div class="card" data-topic="{r['topic'].lower()}" data-run="{r['timestamp']}">
                 <div class="card-top">
                     <span class="cycles">{r['iterations']} Research Cycles</span>
                     {f'<span class="new-tag">New</span>' if r['is_new'] else ''}
                 </div>
-                <a href="{(output_path / r['file']).relative_to(Path('.')).as_posix()}" style="text-decoration: none; color: inherit;">
+                <a href="{r['file']}" style="text-decoration: none; color: inherit;">
                     <h3>{r['topic']}</h3>
                 </a>
                 <div style="margin-bottom: 25px;">
-                    <button class="copy-topic-btn" onclick="copyTopic(\'{r['topic'].replace("'", "\\'")}\')">
+                    <button class="copy-topic-btn" onclick="copyTopic(\'{escaped_topic}\')">
                         <i class="far fa-copy"></i> Copy Topic
                     </button>
                 </div>
@@ -338,44 +535,248 @@ class DashboardGenerator:
                         <i class="far fa-calendar-alt"></i>
                         {r['date'][:10]}
                     </div>
-                    <a href="{(output_path / r['file']).relative_to(Path('.')).as_posix()}" class="arrow">
+                    <a href="{r['file']}" class="arrow">
                         <i class="fas fa-chevron-right"></i>
                     </a>
                 </div>
             </div>
-            ''' for r in reports])}
+            '''
+    
+    @staticmethod
+    def generate(output_dir="research_output", standalone=None, served=False):
+        """
+        Writes dashboard.html and returns its name. served=True lists every
+        run, linking reports at their export path for the report server to
+        render on demand, and returns the page HTML instead of writing it.
+        """
+        output_path = Path(output_dir)
+        if not output_path.exists():
+            return None
+            
+        reports = []
+        store = RunStore(output_path / "runs.db")
+        # Logs from before the run store existed, or copied in since
+        store.import_legacy(output_path)
+        
+        runs = store.list_runs() if served else store.list_exported("html")
+        for run in runs:
+            if served:
+                run['path'] = export_path(output_path, "html", run['run_id'])
+            try:
+                date = run['finished_at'] or run['started_at']
+                reports.append({
+                    'topic': run['topic'] or 'Untitled Research',
+                    'date': date,
+                    'iterations': run['iterations'],
+                    'quality': run['avg_quality'],
+                    'file': Path(os.path.relpath(run['path'])).as_posix(),
+                    'timestamp': run['run_id'],
+                    'updated_at': run['updated_at'],
+                    'is_new': (datetime.now() - datetime.fromisoformat(date)).days < 1
+                })
+            except Exception as e:
+                print(f"Error listing run {run['run_id']}: {e}")
+
+        if standalone is None:
+            standalone = Config.STANDALONE_REPORTS
+        mode = Config.DASHBOARD_MODE
+        if mode == "auto":
+            mode = "virtual" if len(reports) > Config.DASHBOARD_VIRTUAL_THRESHOLD else "cards"
+
+        # Reuse cached card HTML and search terms for runs that have not changed since the last build
+        # The served page has its own manifest and index so it never clobbers the static one
+        suffix = "_served" if served else ""
+        manifest_path = output_path / MANIFEST_NAME.replace(".json", f"{suffix}.json")
+        index_dir = output_path / f"{INDEX_DIR}{suffix}"
+        manifest = DashboardGenerator._load_manifest(manifest_path)
+        cached = manifest['runs']
+        entries = {}
+        cards = []
+        for r in reports:
+            key = f"{r['updated_at']}|{r['file']}|{int(r['is_new'])}"
+            entry = cached.get(r['timestamp'], {})
+            fresh = {'key': key}
+            if mode == "cards":
+                if entry.get('key') == key and 'card' in entry:
+                    fresh['card'] = entry['card']
+                else:
+                    fresh['card'] = DashboardGenerator._render_card(r)
+                cards.append(fresh['card'])
+            if entry.get('terms_at') == r['updated_at']:
+                fresh['terms'] = entry['terms']
+            else:
+                fresh['terms'] = DashboardGenerator._run_terms(store.get_run(r['timestamp']))
+            fresh['terms_at'] = r['updated_at']
+            entries[r['timestamp']] = fresh
+        store.close()
+
+        search_path = index_dir / SEARCH_NAME
+        page_format = f"{mode}|{int(standalone)}|{content_hash(DASHBOARD_CSS + DashboardGenerator._page_script(mode))}"
+        page_key = hashlib.sha1((page_format + "".join(e['key'] for e in entries.values())).encode("utf-8")).hexdigest()
+        if not served and page_key == manifest.get('page_key') and Path("dashboard.html").exists() and search_path.exists():
+            return "dashboard.html"
+
+        search_hash = DashboardGenerator._write_search_index(search_path, entries, manifest.get('search'))
+        search_url = Path(os.path.relpath(search_path)).as_posix() + f"?v={search_hash[:12]}"
+
+        shards = manifest.get('shards', [])
+        if mode == "virtual":
+            shards = DashboardGenerator._write_shards(index_dir, reports, shards)
+            shard_urls = [
+                Path(os.path.relpath(index_dir / f"shard-{i:04d}.js")).as_posix() + f"?v={h[:12]}"
+                for i, h in enumerate(shards)
+            ]
+            controls_html = '''
+        <div class="list-controls">
+            <span id="count">Loading index...</span>
+            <select id="sort" onchange="sortBy(this.value)">
+                <option value="newest">Newest first</option>
+                <option value="oldest">Oldest first</option>
+                <option value="topic">Topic A-Z</option>
+                <option value="cycles">Most cycles</option>
+                <option value="quality">Highest quality</option>
+            </select>
+        </div>'''
+            grid_html = ""
+            page_data = f"        const SHARDS = {json.dumps(shard_urls)};\n"
+        else:
+            controls_html = ""
+            grid_html = "".join(cards)
+            page_data = ""
+        page_data += f"        const SEARCH_INDEX = {json.dumps(search_url)};"
+
+        assets = AssetBundle(output_path)
+        vendor_tags = assets.vendor_tags(["fonts", "font-awesome"], ".", standalone)
+        style_tag = assets.style("dashboard", DASHBOARD_CSS, ".", standalone)
+        script_tag = assets.script(f"dashboard-{mode}", DashboardGenerator._page_script(mode), ".", standalone)
+
+        html_template = f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Intelligence Hub</title>
+    {vendor_tags}
+    {style_tag}
+</head>
+<body>
+    <div id="toast">Copied to Clipboard!</div>
+
+    <div class="blobs">
+        <div class="blob blob-1"></div>
+        <div class="blob blob-2"></div>
+    </div>
+
+    <div class="container">
+        <header>
+            <div class="logo-area">
+                <i class="fas fa-atom"></i>
+                <h1>Intelligence Hub</h1>
+            </div>
+            <p style="color: var(--text-dim); font-size: 1.1rem;">DeepSeek-powered research exploration engine</p>
+        </header>
+
+        <div class="search-container">
+            <i class="fas fa-search"></i>
+            <input type="text" class="search-bar" placeholder="Search topics, prompts and reports..." onkeyup="filter(this.value)" onfocus="HubSearch.ensure(() => {{}})">
+        </div>
+
+        {controls_html}
+        <div class="grid{' vgrid' if mode == 'virtual' else ''}" id="grid">
+            {grid_html}
         </div>
     </div>
 
     <script>
-        function filter(q) {{
-            const cards = document.querySelectorAll('.card');
-            q = q.toLowerCase();
-            cards.forEach(c => {{
-                if (c.dataset.topic.includes(q)) {{
-                    c.style.display = 'flex';
-                }} else {{
-                    c.style.display = 'none';
-                }}
-            }});
-        }}
-
-        function copyTopic(text) {{
-            navigator.clipboard.writeText(text).then(() => {{
-                const toast = document.getElementById('toast');
-                toast.classList.add('active');
-                setTimeout(() => {{
-                    toast.classList.remove('active');
-                }}, 2000);
-            }});
-        }}
+{page_data}
     </script>
+    {script_tag}
 </body>
 </html>
 """
-        with open("dashboard.html", "w", encoding="utf-8") as f:
-            f.write(html_template)
+        DashboardGenerator._save_manifest(manifest_path, {'version': MANIFEST_VERSION, 'page_key': page_key, 'runs': entries, 'shards': shards, 'search': search_hash})
+        if served:
+            return html_template
+        atomic_write("dashboard.html", html_template)
         return "dashboard.html"
 
+    @staticmethod
+    def _page_script(mode):
+        return SEARCH_SCRIPT + (VIRTUAL_SCRIPT if mode == "virtual" else CARDS_SCRIPT) + COPY_SCRIPT
+
+    @staticmethod
+    def _run_terms(run):
+        """Search terms for a run: every topic and prompt word plus the report's top keywords"""
+        if not run:
+            return []
+        terms = set(content_words(run['initial_query']))
+        for prompt in run['research_prompts']:
+            terms.update(content_words(prompt))
+        keywords = Counter(content_words(run['final_report'])).most_common(REPORT_KEYWORDS)
+        terms.update(word for word, _ in keywords)
+        return sorted(terms)
+
+    @staticmethod
+    def _write_search_index(path, entries, previous):
+        """
+        Write the inverted index (term -> positions in the run list) as a JSONP
+        script for the page to load on first search. Returns its content hash.
+        """
+        runs = list(entries)
+        postings = {}
+        for i, entry in enumerate(entries.values()):
+            for term in entry['terms']:
+                postings.setdefault(term, []).append(i)
+        index = {'runs': runs, 'terms': dict(sorted(postings.items())), 'stop': sorted(STOPWORDS)}
+        body = f"HubSearch.load({json.dumps(index, separators=(',', ':'))});\n"
+        digest = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        if digest != previous or not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            atomic_write(path, body)
+        return digest
+
+    @staticmethod
+    def _write_shards(index_dir, reports, previous):
+        """
+        Write the run list as JSONP shards, oldest runs first so that new runs
+        only ever touch the last shard. Unchanged shards are left alone.
+        Returns the content hash of every shard.
+        """
+        index_dir.mkdir(exist_ok=True)
+        rows = [
+            [r['timestamp'], r['topic'], r['date'], r['iterations'], r['quality'], r['file']]
+            for r in reversed(reports)
+        ]
+        size = Config.DASHBOARD_SHARD_SIZE
+        hashes = []
+        for i in range(0, len(rows), size):
+            shard = i // size
+            body = f"HubIndex.load({shard}, {json.dumps(rows[i:i + size], separators=(',', ':'))});\n"
+            digest = hashlib.sha1(body.encode("utf-8")).hexdigest()
+            path = index_dir / f"shard-{shard:04d}.js"
+            if shard >= len(previous) or previous[shard] != digest or not path.exists():
+                atomic_write(path, body)
+            hashes.append(digest)
+        for stale in index_dir.glob("shard-*.js"):
+            if int(stale.stem.split("-")[1]) >= len(hashes):
+                stale.unlink()
+        return hashes
+
+    @staticmethod
+    def _load_manifest(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {'version': MANIFEST_VERSION, 'runs': {}}
+
+    @staticmethod
+    def _save_manifest(path, manifest):
+        atomic_write(path, json.dumps(manifest))
+
 if __name__ == "__main__":
     DashboardGenerator.generate()
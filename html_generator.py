@@ -1,58 +1,19 @@
 import os
 import json
+import gzip
+import base64
+from pathlib import Path
 from datetime import datetime
+from config import Config
+from markdown_renderer import MarkdownRenderer
+from asset_bundle import AssetBundle
+from output_writer import atomic_write
+from rich.console import Console
 
-class HTMLGenerator:
-    """
-    Generates a premium, focused 'Intelligence Dossier' HTML report.
-    v3.0 - "Masterclass" Redesign
-    """
-    
-    @staticmethod
-    def generate(research_data, output_path):
-        """
-        research_data structure:
-        {
-            'initial_query': str,
-            'responses': list,
-            'research_prompts': list,
-            'final_report': str,
-            'quality_history': list
-        }
-        """
-        
-        # Prepare data for JS
-        js_data = {
-            'topic': research_data['initial_query'],
-            'date': datetime.now().strftime("%B %d, %Y"),
-            'iterations': []
-        }
-        
-        for i in range(len(research_data['responses'])):
-            js_data['iterations'].append({
-                'id': i + 1,
-                'prompt': research_data['research_prompts'][i] if i < len(research_data['research_prompts']) else "",
-                'content': research_data['responses'][i],
-                'quality': research_data.get('quality_history', [])[i]['quality'] if i < len(research_data.get('quality_history', [])) else 0.85
-            })
-            
-        js_data['final_report'] = research_data['final_report']
-        js_data_str = json.dumps(js_data).replace("</script>", "<\\/script>")
-        
-        # HTML Template - v3.0 Intelligence Dossier
-        html_template = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Dossier: {js_data['topic']}</title>
-    <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700;800&family=Inter:wght@400;500;600&family=JetBrains+Mono&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        :root {{
+console = Console()
+
+REPORT_CSS = """
+        :root {
             --bg: #030712;
             --surface: #0f172a;
             --accent: #38bdf8;
@@ -65,21 +26,21 @@ class HTMLGenerator:
             --shadow: 0 25px 50px -12px rgba(0, 0, 0, 0.5);
             --font-display: 'Outfit', sans-serif;
             --font-body: 'Inter', sans-serif;
-        }}
+        }
 
-        * {{ margin: 0; padding: 0; box-sizing: border-box; -webkit-font-smoothing: antialiased; }}
+        * { margin: 0; padding: 0; box-sizing: border-box; -webkit-font-smoothing: antialiased; }
 
-        body {{
+        body {
             background-color: var(--bg);
             color: var(--text);
             font-family: var(--font-body);
             line-height: 1.7;
             overflow-x: hidden;
             scroll-behavior: smooth;
-        }}
+        }
 
         /* Subtle Noise Texture Overlay */
-        body::before {{
+        body::before {
             content: "";
             position: fixed;
             top: 0; left: 0; width: 100%; height: 100%;
@@ -87,10 +48,10 @@ class HTMLGenerator:
             opacity: 0.03;
             pointer-events: none;
             z-index: 9999;
-        }}
+        }
 
         /* --- IMMERSIVE HERO SECTION --- */
-        .hero {{
+        .hero {
             height: 90vh;
             display: flex;
             flex-direction: column;
@@ -101,9 +62,9 @@ class HTMLGenerator:
             position: relative;
             background: radial-gradient(circle at 50% 50%, rgba(37, 99, 235, 0.08) 0%, transparent 70%);
             margin-bottom: 80px;
-        }}
+        }
 
-        .hero-pattern {{
+        .hero-pattern {
             position: absolute;
             top: 0; left: 0; width: 100%; height: 100%;
             background-image: 
@@ -111,9 +72,9 @@ class HTMLGenerator:
             background-size: 40px 40px;
             mask-image: radial-gradient(circle at 50% 50%, black, transparent);
             z-index: -1;
-        }}
+        }
 
-        .badge-dossier {{
+        .badge-dossier {
             font-family: var(--font-display);
             font-weight: 700;
             text-transform: uppercase;
@@ -126,9 +87,9 @@ class HTMLGenerator:
             padding: 8px 20px;
             border-radius: 100px;
             border: 1px solid rgba(56, 189, 248, 0.2);
-        }}
+        }
 
-        .hero h1 {{
+        .hero h1 {
             font-family: var(--font-display);
             font-size: clamp(2.5rem, 6vw, 4.5rem); /* Reduced slightly from 3-8-6 */
             font-weight: 800;
@@ -147,9 +108,9 @@ class HTMLGenerator:
             -webkit-box-orient: vertical;
             overflow: hidden;
             text-overflow: ellipsis;
-        }}
+        }
 
-        .hero-meta {{
+        .hero-meta {
             display: flex;
             gap: 32px;
             font-family: var(--font-display);
@@ -157,9 +118,9 @@ class HTMLGenerator:
             font-size: 1rem;
             font-weight: 500;
             animation: fadeIn 1.5s ease-out;
-        }}
+        }
 
-        .scroll-indicator {{
+        .scroll-indicator {
             position: absolute;
             bottom: 40px;
             left: 50%;
@@ -167,10 +128,10 @@ class HTMLGenerator:
             animation: bounce 2s infinite;
             color: var(--text-dim);
             font-size: 1.5rem;
-        }}
+        }
 
         /* --- NAVIGATION --- */
-        .floating-nav {{
+        .floating-nav {
             position: fixed;
             top: 24px;
             left: 50%;
@@ -187,11 +148,11 @@ class HTMLGenerator:
             gap: 32px;
             box-shadow: var(--shadow);
             transition: transform 0.6s cubic-bezier(0.2, 0.8, 0.2, 1);
-        }}
+        }
 
-        .floating-nav.active {{ transform: translateX(-50%) translateY(0); }}
+        .floating-nav.active { transform: translateX(-50%) translateY(0); }
 
-        .nav-link {{
+        .nav-link {
             color: var(--text-muted);
             text-decoration: none;
             font-family: var(--font-display);
@@ -200,15 +161,15 @@ class HTMLGenerator:
             text-transform: uppercase;
             letter-spacing: 1px;
             transition: color 0.3s;
-        }}
+        }
 
-        .nav-link:hover {{ color: #fff; }}
+        .nav-link:hover { color: #fff; }
 
-        .nav-link.active-section {{
+        .nav-link.active-section {
             color: #fff;
-        }}
+        }
 
-        .nav-indicator {{
+        .nav-indicator {
             position: absolute;
             background: var(--primary);
             height: 36px;
@@ -219,39 +180,39 @@ class HTMLGenerator:
             left: 0;
             width: 0;
             opacity: 0;
-        }}
+        }
             border-radius: 50%;
             box-shadow: 0 0 10px var(--primary);
-        }}
+        }
 
-        .hub-btn {{
+        .hub-btn {
             background: var(--ultramarine);
             color: #fff;
             padding: 8px 16px;
             border-radius: 100px;
             font-size: 0.8rem;
-        }}
+        }
 
         /* --- MAIN CONTENT LAYOUT --- */
-        .content-container {{
+        .content-container {
             max-width: 900px;
             margin: 0 auto;
             padding: 0 24px 120px;
-        }}
+        }
 
-        section {{
+        section {
             margin-bottom: 120px;
             opacity: 0;
             transform: translateY(30px);
             transition: all 1s cubic-bezier(0.2, 0.8, 0.2, 1);
-        }}
+        }
 
-        section.visible {{
+        section.visible {
             opacity: 1;
             transform: translateY(0);
-        }}
+        }
 
-        .section-label {{
+        .section-label {
             font-family: var(--font-display);
             font-weight: 700;
             font-size: 0.7rem;
@@ -262,23 +223,23 @@ class HTMLGenerator:
             display: flex;
             align-items: center;
             gap: 12px;
-        }}
+        }
 
-        .section-label::after {{
+        .section-label::after {
             content: "";
             height: 1px;
             flex-grow: 1;
             background: linear-gradient(to right, var(--ultramarine), transparent);
-        }}
+        }
 
         /* --- SYNTHESIS REPORT --- */
-        .report-body {{
+        .report-body {
             font-size: 1.15rem; /* Slightly smaller for density */
             color: #cbd5e1;
             line-height: 1.8;
-        }}
+        }
 
-        .report-body h2 {{
+        .report-body h2 {
             font-family: var(--font-display);
             font-size: 2.2rem;
             font-weight: 700;
@@ -287,22 +248,22 @@ class HTMLGenerator:
             color: #fff;
             border-bottom: 1px solid var(--border);
             padding-bottom: 12px;
-        }}
+        }
 
-        .report-body h3 {{
+        .report-body h3 {
             font-family: var(--font-display);
             font-size: 1.5rem;
             font-weight: 600;
             margin: 35px 0 20px;
             color: var(--accent);
-        }}
+        }
 
-        .report-body p {{ margin-bottom: 20px; }}
-        .report-body ul, .report-body ol {{ margin: 0 0 24px 24px; }}
-        .report-body li {{ margin-bottom: 8px; }}
+        .report-body p { margin-bottom: 20px; }
+        .report-body ul, .report-body ol { margin: 0 0 24px 24px; }
+        .report-body li { margin-bottom: 8px; }
 
         /* Table Styling for Data */
-        .report-body table {{
+        .report-body table {
             width: 100%;
             border-collapse: collapse;
             margin: 32px 0;
@@ -310,22 +271,22 @@ class HTMLGenerator:
             border-radius: 12px;
             overflow: hidden;
             border: 1px solid var(--border);
-        }}
+        }
 
-        .report-body th, .report-body td {{
+        .report-body th, .report-body td {
             padding: 16px;
             text-align: left;
             border: 1px solid var(--border);
-        }}
+        }
 
-        .report-body th {{
+        .report-body th {
             background: rgba(255,255,255,0.05);
             color: #fff;
             font-family: var(--font-display);
             font-weight: 600;
-        }}
+        }
 
-        .report-body blockquote {{
+        .report-body blockquote {
             border-left: 4px solid var(--ultramarine);
             background: rgba(37, 99, 235, 0.05);
             padding: 24px 32px;
@@ -333,12 +294,12 @@ class HTMLGenerator:
             font-style: italic;
             border-radius: 0 16px 16px 0;
             color: #fff;
-        }}
+        }
 
         /* --- COPY BUTTONS --- */
-        pre {{ position: relative; }}
+        pre { position: relative; }
         
-        .copy-btn {{
+        .copy-btn {
             position: absolute;
             top: 12px;
             right: 12px;
@@ -355,14 +316,14 @@ class HTMLGenerator:
             transition: all 0.3s;
             opacity: 0;
             z-index: 10;
-        }}
+        }
 
-        pre:hover .copy-btn {{ opacity: 1; }}
-        .copy-btn:hover {{ background: var(--ultramarine); color: #fff; border-color: var(--accent); }}
-        .copy-btn.copied {{ background: #10b981; color: #fff; border-color: #10b981; }}
+        pre:hover .copy-btn { opacity: 1; }
+        .copy-btn:hover { background: var(--ultramarine); color: #fff; border-color: var(--accent); }
+        .copy-btn.copied { background: #10b981; color: #fff; border-color: #10b981; }
 
         /* Toast Notification */
-        #toast {{
+        #toast {
             position: fixed;
             bottom: 40px;
             left: 50%;
@@ -380,11 +341,11 @@ class HTMLGenerator:
             letter-spacing: 1px;
             text-transform: uppercase;
             font-size: 0.8rem;
-        }}
+        }
 
-        #toast.active {{ transform: translateX(-50%) translateY(0); }}
+        #toast.active { transform: translateX(-50%) translateY(0); }
 
-        .action-container {{
+        .action-container {
             max-width: 900px;
             margin: -80px auto 120px; /* Pull up to sit below synthesis */
             display: flex;
@@ -393,10 +354,10 @@ class HTMLGenerator:
             width: fit-content;
             position: relative;
             z-index: 100;
-        }}
+        }
 
         /* Floating state for the summary button */
-        .action-container.floating {{
+        .action-container.floating {
             position: fixed;
             bottom: 32px;
             left: 50%;
@@ -408,15 +369,15 @@ class HTMLGenerator:
             border: 1px solid var(--accent);
             box-shadow: 0 15px 35px rgba(0,0,0,0.4);
             margin: 0;
-        }}
+        }
 
-        .action-container.hidden {{
+        .action-container.hidden {
             transform: translateX(-50%) translateY(100px);
             opacity: 0;
             pointer-events: none;
-        }}
+        }
 
-        .btn-action {{
+        .btn-action {
             background: rgba(255, 255, 255, 0.05);
             border: 1px solid var(--border);
             color: var(--text-muted);
@@ -430,62 +391,62 @@ class HTMLGenerator:
             display: flex;
             align-items: center;
             gap: 10px;
-        }}
+        }
 
-        .btn-action:hover {{
+        .btn-action:hover {
             background: rgba(255, 255, 255, 0.1);
             color: #fff;
             border-color: var(--accent);
-        }}
+        }
 
         /* --- ANALYTICS --- */
-        .analytics-box {{
+        .analytics-box {
             background: var(--surface);
             border: 1px solid var(--border);
             padding: 40px;
             border-radius: 32px;
             box-shadow: var(--shadow);
-        }}
+        }
 
-        .chart-container {{
+        .chart-container {
             height: 300px;
             margin-top: 32px;
-        }}
+        }
 
         /* --- RESEARCH TRAIL (EVIDENCE CARDS) --- */
-        .trail-header {{
+        .trail-header {
             margin-bottom: 48px;
-        }}
+        }
 
-        .evidence-card {{
+        .evidence-card {
             background: rgba(255,255,255,0.02);
             border: 1px solid var(--border);
             border-radius: 24px;
             margin-bottom: 24px;
             overflow: hidden;
             transition: all 0.4s cubic-bezier(0.2, 0.8, 0.2, 1);
-        }}
+        }
 
-        .evidence-card:hover {{
+        .evidence-card:hover {
             background: rgba(255,255,255,0.04);
             border-color: var(--accent);
-        }}
+        }
 
-        .card-trigger {{
+        .card-trigger {
             padding: 32px;
             cursor: pointer;
             display: flex;
             justify-content: space-between;
             align-items: center;
-        }}
+        }
 
-        .card-topic {{
+        .card-topic {
             display: flex;
             align-items: center;
             gap: 24px;
-        }}
+        }
 
-        .node-num {{
+        .node-num {
             width: 48px; height: 48px;
             background: var(--surface);
             border: 1px solid var(--border);
@@ -497,30 +458,30 @@ class HTMLGenerator:
             font-weight: 800;
             font-size: 1.25rem;
             color: var(--accent);
-        }}
+        }
 
-        .node-info h4 {{
+        .node-info h4 {
             font-family: var(--font-display);
             font-size: 1.25rem;
             margin-bottom: 4px;
-        }}
+        }
 
-        .node-info p {{
+        .node-info p {
             font-size: 0.85rem;
             color: var(--text-dim);
-        }}
+        }
 
-        .card-content {{
+        .card-content {
             display: none;
             padding: 0 32px 32px;
             border-top: 1px solid var(--border);
             animation: fadeIn 0.5s ease-out;
-        }}
+        }
 
-        .evidence-card.active .card-content {{ display: block; }}
-        .evidence-card.active .chevron i {{ transform: rotate(180deg); }}
+        .evidence-card.active .card-content { display: block; }
+        .evidence-card.active .chevron i { transform: rotate(180deg); }
 
-        .prompt-box {{
+        .prompt-box {
             background: rgba(0,0,0,0.3);
             border-radius: 16px;
             padding: 24px;
@@ -529,9 +490,9 @@ class HTMLGenerator:
             font-size: 0.9rem;
             color: var(--accent);
             border: 1px dashed rgba(56, 189, 248, 0.2);
-        }}
+        }
 
-        .footer-dossier {{
+        .footer-dossier {
             text-align: center;
             padding: 80px 0;
             border-top: 1px solid var(--border);
@@ -539,273 +500,267 @@ class HTMLGenerator:
             font-family: var(--font-display);
             font-size: 0.85rem;
             letter-spacing: 2px;
-        }}
+        }
 
         /* --- ANIMATIONS --- */
-        @keyframes slideUp {{
-            from {{ opacity: 0; transform: translateY(40px); }}
-            to {{ opacity: 1; transform: translateY(0); }}
-        }}
-
-        @keyframes fadeIn {{
-            from {{ opacity: 0; }}
-            to {{ opacity: 1; }}
-        }}
-
-        @keyframes bounce {{
-            0%, 20%, 50%, 80%, 100% {{ transform: translateX(-50%) translateY(0); }}
-            40% {{ transform: translateX(-50%) translateY(-10px); }}
-            60% {{ transform: translateX(-50%) translateY(-5px); }}
-        }}
-
-        @media (max-width: 768px) {{
-            .hero h1 {{ font-size: 2.5rem; }}
-            .floating-nav {{ width: 90%; gap: 16px; padding: 10px 20px; justify-content: space-between; }}
-            .nav-link {{ font-size: 0.75rem; }}
-            .report-body {{ font-size: 1.1rem; }}
-        }}
-    </style>
-</head>
-<body>
-
-    <nav class="floating-nav" id="main-nav">
-        <div class="nav-indicator" id="nav-indicator"></div>
-        <a href="../dashboard.html" class="nav-link hub-btn">
-            <i class="fas fa-chevron-left"></i> Hub
-        </a>
-        <a href="#synthesis" class="nav-link">Intelligence</a>
-        <a href="#analytics" class="nav-link">Analysis</a>
-        <a href="#trail" class="nav-link">Trail</a>
-    </nav>
-
-    <div id="toast">Copied to Clipboard!</div>
-
-    <div class="hero">
-        <div class="hero-pattern"></div>
-        <a href="../dashboard.html" class="nav-link" style="position: absolute; top: 40px; left: 40px; display: flex; align-items: center; gap: 8px; font-size: 0.8rem; letter-spacing: 2px;">
-            <i class="fas fa-arrow-left"></i> BACK TO HUB
-        </a>
-        <div class="badge-dossier">Intelligence Dossier // v3.0</div>
-        <h1 id="hero-title">{js_data['topic']}</h1>
-        <div class="hero-meta">
-            <span><i class="far fa-calendar-alt"></i> {js_data['date']}</span>
-            <span><i class="fas fa-fingerprint"></i> DEEPSEEK CORE</span>
-            <span><i class="fas fa-shield-halved"></i> VERIFIED</span>
-        </div>
-        <div class="scroll-indicator">
-            <i class="fas fa-chevron-down"></i>
-        </div>
-    </div>
-
-    <div class="content-container">
-        <!-- SYNTHESIS -->
-        <section id="synthesis">
-            <div class="section-label">Executive Findings</div>
-            <div id="synthesis-md" class="report-body"></div>
-            <div id="synthesis-anchor" style="height: 1px; margin-top: 24px;"></div>
-        </section>
+        @keyframes slideUp {
+            from { opacity: 0; transform: translateY(40px); }
+            to { opacity: 1; transform: translateY(0); }
+        }
 
-        <!-- NO-SECTION WRAPPER FOR PERSISTENT UI -->
-        <div class="action-container hidden">
-            <button class="btn-action" onclick="copySynthesis()">
-                <i class="far fa-copy"></i> Copy Executive Summary
-            </button>
-        </div>
+        @keyframes fadeIn {
+            from { opacity: 0; }
+            to { opacity: 1; }
+        }
 
-        <!-- ANALYTICS -->
-        <section id="analytics">
-            <div class="section-label">Quality Metrics</div>
-            <div class="analytics-box">
-                <h3 style="font-family: var(--font-display); margin-bottom: 8px;">Neural Search Depth</h3>
-                <p style="color: var(--text-muted); font-size: 0.9rem;">Visualizing the cognitive progression of the intelligence cycles.</p>
-                <div class="chart-container">
-                    <canvas id="qualityChart"></canvas>
-                </div>
-            </div>
-        </section>
+        @keyframes bounce {
+            0%, 20%, 50%, 80%, 100% { transform: translateX(-50%) translateY(0); }
+            40% { transform: translateX(-50%) translateY(-10px); }
+            60% { transform: translateX(-50%) translateY(-5px); }
+        }
 
-        <!-- RESEARCH TRAIL -->
-        <section id="trail">
-            <div class="section-label">Evidence Repository</div>
-            <div class="trail-header">
-                <h2 style="font-family: var(--font-display); font-size: 2.5rem; margin-bottom: 12px;">The Research Trail</h2>
-                <p style="color: var(--text-muted);">Explore the raw data nodes and chronological evolution of this dossier.</p>
-            </div>
-            <div id="evidence-trail"></div>
-        </section>
+        @media (max-width: 768px) {
+            .hero h1 { font-size: 2.5rem; }
+            .floating-nav { width: 90%; gap: 16px; padding: 10px 20px; justify-content: space-between; }
+            .nav-link { font-size: 0.75rem; }
+            .report-body { font-size: 1.1rem; }
+        }
+"""
 
-        <footer class="footer-dossier">
-            <a href="../dashboard.html" class="nav-link" style="display: inline-flex; align-items: center; gap: 10px; margin-bottom: 30px; color: var(--accent);">
-                <i class="fas fa-arrow-left"></i> RETURN TO INTELLIGENCE HUB
-            </a>
-            <div style="opacity: 0.5;">AUTHENTICATED BY DEEPSEEK RESEARCH ENGINE &bull; 2026</div>
-        </footer>
-    </div>
+REPORT_SCRIPT = """
+        let rawData;
+        let qualityChart;
+
+        // PAYLOAD is inline JSON, gzip+base64 text, or a .json.gz sidecar (sidecars need http://, not file://)
+        function loadData() {
+            if (PAYLOAD.json) return Promise.resolve(PAYLOAD.json);
+            const body = PAYLOAD.src
+                ? fetch(PAYLOAD.src).then(r => r.body)
+                : Promise.resolve(new Blob([Uint8Array.from(atob(PAYLOAD.gzip), c => c.charCodeAt(0))]).stream());
+            return body.then(stream => new Response(stream.pipeThrough(new DecompressionStream('gzip'))).json());
+        }
 
-    <script>
-        const rawData = {js_data_str};
+        function init() {
+            // Render Trail
+            rawData.iterations.forEach(addCard);
 
-        function init() {{
-            // Render Synthesis
-            document.getElementById('synthesis-md').innerHTML = marked.parse(rawData.final_report);
+            initLazyChart();
+            initScrollEffects();
+            initCopyButtons(document.getElementById('synthesis-md'));
+            initLive();
+        }
 
-            // Render Trail
-            const trail = document.getElementById('evidence-trail');
-            rawData.iterations.forEach(iter => {{
-                const wordCount = iter.content.split(/\\s+/).length;
-                const card = document.createElement('div');
-                card.className = 'evidence-card';
-                card.innerHTML = `
-                    <div class="card-trigger" onclick="this.parentElement.classList.toggle('active')">
-                        <div class="card-topic">
-                            <div class="node-num">${{iter.id}}</div>
-                            <div class="node-info">
-                                <h4>Data Node ${{iter.id}}</h4>
-                                <p>Quality Index: ${{ (iter.quality * 100).toFixed(0) }}% // Words: ${{wordCount}} // Status: Finalized</p>
-                            </div>
+        function addCard(iter) {
+            const card = document.createElement('div');
+            card.className = 'evidence-card';
+            card.innerHTML = `
+                <div class="card-trigger" onclick="toggleCard(this.parentElement, ${iter.id - 1})">
+                    <div class="card-topic">
+                        <div class="node-num">${iter.id}</div>
+                        <div class="node-info">
+                            <h4>Data Node ${iter.id}</h4>
+                            <p>Quality Index: ${ (iter.quality * 100).toFixed(0) }% // Words: ${iter.words} // Status: Finalized</p>
                         </div>
-                        <div class="chevron"><i class="fas fa-chevron-down"></i></div>
                     </div>
-                    <div class="card-content">
-                        ${{iter.prompt ? `
-                            <div class="prompt-box">
-                                <span style="font-size: 0.7rem; color: var(--text-dim); display: block; margin-bottom: 8px;">// NEURAL PROMPT</span>
-                                ${{marked.parse(iter.prompt)}}
-                            </div>
-                        ` : ''}}
-                        <div class="report-body" style="font-size: 1.1rem; color: var(--text-muted)">
-                            ${{marked.parse(iter.content)}}
+                    <div class="chevron"><i class="fas fa-chevron-down"></i></div>
+                </div>
+                <div class="card-content"></div>
+            `;
+            document.getElementById('evidence-trail').appendChild(card);
+        }
+
+        // Runs still in progress stream new iterations from report_server.py (PAYLOAD.live)
+        function initLive() {
+            if (!PAYLOAD.live || !window.EventSource) return;
+            const source = new EventSource(`${PAYLOAD.live}?after=${rawData.iterations.length}`);
+            source.addEventListener('iteration', e => {
+                const iter = JSON.parse(e.data);
+                if (iter.id <= rawData.iterations.length) return;  // Already shown (reconnects resend from Last-Event-ID)
+                rawData.iterations.push(iter);
+                addCard(iter);
+                if (qualityChart) {
+                    qualityChart.data.labels.push(`NODE ${iter.id}`);
+                    qualityChart.data.datasets[0].data.push(iter.quality * 100);
+                    qualityChart.update();
+                }
+                showToast(`Node ${iter.id} Received`);
+            });
+            source.addEventListener('complete', e => {
+                source.close();
+                const synthesis = document.getElementById('synthesis-md');
+                synthesis.innerHTML = JSON.parse(e.data).synthesis_html;
+                initCopyButtons(synthesis);
+                showToast("Research Complete");
+            });
+        }
+
+        // Card bodies are only built the first time a card is opened
+        function toggleCard(card, index) {
+            if (!card.dataset.loaded) {
+                const iter = rawData.iterations[index];
+                const content = card.querySelector('.card-content');
+                content.innerHTML = `
+                    ${iter.prompt_html ? `
+                        <div class="prompt-box">
+                            <span style="font-size: 0.7rem; color: var(--text-dim); display: block; margin-bottom: 8px;">// NEURAL PROMPT</span>
+                            ${iter.prompt_html}
                         </div>
+                    ` : ''}
+                    <div class="report-body" style="font-size: 1.1rem; color: var(--text-muted)">
+                        ${iter.content_html}
                     </div>
                 `;
-                trail.appendChild(card);
-            }});
-
-            initChart();
-            initScrollEffects();
-            initCopyButtons();
-        }}
+                initCopyButtons(content);
+                card.dataset.loaded = '1';
+            }
+            card.classList.toggle('active');
+        }
 
-        function showToast(text = "Copied to Clipboard!") {{
+        function showToast(text = "Copied to Clipboard!") {
             const toast = document.getElementById('toast');
             toast.innerText = text;
             toast.classList.add('active');
-            setTimeout(() => {{
+            setTimeout(() => {
                 toast.classList.remove('active');
-            }}, 2000);
-        }}
+            }, 2000);
+        }
 
-        function copySynthesis() {{
+        function copySynthesis() {
             const text = document.getElementById('synthesis-md').innerText;
-            navigator.clipboard.writeText(text).then(() => {{
+            navigator.clipboard.writeText(text).then(() => {
                 showToast("Summary Copied!");
-            }});
-        }}
+            });
+        }
 
-        function initCopyButtons() {{
-            document.querySelectorAll('pre').forEach(block => {{
+        function initCopyButtons(root = document) {
+            root.querySelectorAll('pre').forEach(block => {
                 if (block.querySelector('.copy-btn')) return;
                 
                 const btn = document.createElement('button');
                 btn.className = 'copy-btn';
                 btn.innerHTML = '<i class="far fa-copy"></i> Copy';
                 
-                btn.onclick = () => {{
+                btn.onclick = () => {
                     const code = block.querySelector('code') ? block.querySelector('code').innerText : block.innerText;
-                    navigator.clipboard.writeText(code).then(() => {{
+                    navigator.clipboard.writeText(code).then(() => {
                         btn.innerHTML = '<i class="fas fa-check"></i> Copied';
                         btn.classList.add('copied');
-                        setTimeout(() => {{
+                        setTimeout(() => {
                             btn.innerHTML = '<i class="far fa-copy"></i> Copy';
                             btn.classList.remove('copied');
-                        }}, 2000);
+                        }, 2000);
                         showToast("Code Copied!");
-                    }});
-                }};
+                    });
+                };
                 
                 block.appendChild(btn);
-            }});
-        }}
+            });
+        }
 
-        function initScrollEffects() {{
+        function initScrollEffects() {
             const nav = document.getElementById('main-nav');
             const sections = document.querySelectorAll('section');
             const actionContainer = document.querySelector('.action-container');
             const synthesisSection = document.getElementById('synthesis');
             
-            window.addEventListener('scroll', () => {{
+            let ticking = false;
+            const anchor = document.getElementById('synthesis-anchor');
+            const onScroll = () => {
+                ticking = false;
+                // Read all geometry before any class changes so layout is computed once
+                const anchorRect = anchor ? anchor.getBoundingClientRect() : null;
+                const rects = Array.from(sections, sec => sec.getBoundingClientRect());
+
                 // Floating Nav Visibility
                 if (window.scrollY > 400) nav.classList.add('active');
                 else nav.classList.remove('active');
 
                 // Intelligent Floating Copy Button
-                if (actionContainer && synthesisSection) {{
-                    const anchor = document.getElementById('synthesis-anchor');
-                    const rect = anchor.getBoundingClientRect();
+                if (actionContainer && synthesisSection && anchorRect) {
                     const triggerPoint = window.innerHeight - 80;
                     
-                    if (rect.top > triggerPoint) {{
+                    if (anchorRect.top > triggerPoint) {
                         // Natural home is below screen
                         actionContainer.classList.add('floating');
                         
                         // Show floating only if we've scrolled away from title
-                        if (window.scrollY > 100) {{
+                        if (window.scrollY > 100) {
                             actionContainer.classList.remove('hidden');
-                        }} else {{
+                        } else {
                             actionContainer.classList.add('hidden');
-                        }}
-                    }} else {{
+                        }
+                    } else {
                         // Docked in natural position
                         actionContainer.classList.remove('floating');
                         actionContainer.classList.remove('hidden');
-                    }}
-                }}
+                    }
+                }
 
                 // Section Entry Animations
-                sections.forEach(sec => {{
-                    const rect = sec.getBoundingClientRect();
+                sections.forEach((sec, i) => {
+                    const rect = rects[i];
                     
                     // Active Navigation Highlight
-                    if (rect.top < window.innerHeight * 0.4 && rect.bottom > window.innerHeight * 0.4) {{
+                    if (rect.top < window.innerHeight * 0.4 && rect.bottom > window.innerHeight * 0.4) {
                         const id = sec.id;
                         const indicator = document.getElementById('nav-indicator');
-                        document.querySelectorAll('.nav-link').forEach(link => {{
+                        document.querySelectorAll('.nav-link').forEach(link => {
                             link.classList.remove('active-section');
-                            if (link.getAttribute('href') === '#' + id) {{
+                            if (link.getAttribute('href') === '#' + id) {
                                 link.classList.add('active-section');
                                 
                                 // Move Indicator
                                 indicator.style.opacity = '1';
                                 indicator.style.width = link.offsetWidth + 24 + 'px';
                                 indicator.style.left = link.offsetLeft - 12 + 'px';
-                            }}
-                        }});
-                    }}
+                            }
+                        });
+                    }
 
-                    if (rect.top < window.innerHeight * 0.8) {{
+                    if (rect.top < window.innerHeight * 0.8) {
                         sec.classList.add('visible');
-                    }}
-                }});
-            }});
-            
+                    }
+                });
+            };
+
+            // Layout is read at most once per frame, however fast scroll events arrive
+            window.addEventListener('scroll', () => {
+                if (!ticking) {
+                    ticking = true;
+                    requestAnimationFrame(onScroll);
+                }
+            }, { passive: true });
+
             // Initial call for visible sections
-            window.dispatchEvent(new Event('scroll'));
-        }}
+            onScroll();
+        }
+
+        function initLazyChart() {
+            const canvas = document.getElementById('qualityChart');
+            if (!('IntersectionObserver' in window)) return initChart();
+            const observer = new IntersectionObserver(entries => {
+                if (entries.some(e => e.isIntersecting)) {
+                    observer.disconnect();
+                    initChart();
+                }
+            }, { rootMargin: '200px' });
+            observer.observe(canvas);
+        }
 
-        function initChart() {{
+        function initChart() {
             const ctx = document.getElementById('qualityChart').getContext('2d');
             const qData = rawData.iterations.map(i => i.quality * 100);
-            const labels = rawData.iterations.map(i => `NODE ${{i.id}}`);
+            const labels = rawData.iterations.map(i => `NODE ${i.id}`);
 
             const gradient = ctx.createLinearGradient(0, 0, 0, 400);
             gradient.addColorStop(0, 'rgba(37, 99, 235, 0.4)');
             gradient.addColorStop(1, 'rgba(37, 99, 235, 0)');
 
-            new Chart(ctx, {{
+            qualityChart = new Chart(ctx, {
                 type: 'line',
-                data: {{
+                data: {
                     labels: labels,
-                    datasets: [{{
+                    datasets: [{
                         label: 'Quality Score',
                         data: qData,
                         borderColor: '#38bdf8',
@@ -818,30 +773,252 @@ class HTMLGenerator:
                         pointBorderWidth: 4,
                         pointRadius: 6,
                         pointHoverRadius: 8
-                    }}]
-                }},
-                options: {{
+                    }]
+                },
+                options: {
                     responsive: true,
                     maintainAspectRatio: false,
-                    plugins: {{ legend: {{ display: false }} }},
-                    scales: {{
-                        y: {{ 
+                    plugins: { legend: { display: false } },
+                    scales: {
+                        y: { 
                             beginAtZero: true, max: 100,
-                            grid: {{ color: 'rgba(255,255,255,0.03)' }},
-                            ticks: {{ color: '#64748b', font: {{ family: 'Outfit', weight: 600 }} }}
-                        }},
-                        x: {{ grid: {{ display: false }}, ticks: {{ color: '#64748b', font: {{ family: 'Outfit', weight: 600 }} }} }}
-                    }}
-                }}
-            }});
-        }}
-
-        window.onload = init;
+                            grid: { color: 'rgba(255,255,255,0.03)' },
+                            ticks: { color: '#64748b', font: { family: 'Outfit', weight: 600 } }
+                        },
+                        x: { grid: { display: false }, ticks: { color: '#64748b', font: { family: 'Outfit', weight: 600 } } }
+                    }
+                }
+            });
+        }
+
+        window.onload = () => loadData().then(data => {
+            rawData = data;
+            init();
+        });
+"""
+
+class HTMLGenerator:
+    """
+    Generates a premium, focused 'Intelligence Dossier' HTML report.
+    v3.0 - "Masterclass" Redesign
+    Markdown is rendered here rather than in the browser; fragments are cached
+    by content hash next to the reports, so regenerations skip unchanged sections.
+    CSS, JS and libraries come from the shared assets/ bundle unless the
+    report is standalone, in which case everything is inlined.
+    """
+
+    _renderers = {}
+
+    @staticmethod
+    def renderer_for(output_dir):
+        """One shared renderer (and render cache) per output directory"""
+        key = Path(output_dir).resolve()
+        if key not in HTMLGenerator._renderers:
+            HTMLGenerator._renderers[key] = MarkdownRenderer(key / "render_cache.db")
+        return HTMLGenerator._renderers[key]
+
+    @staticmethod
+    def _payload(js_data, output_path, mode, live=None):
+        """The PAYLOAD object literal for the page, writing the sidecar if needed"""
+        raw = json.dumps(js_data, separators=(',', ':')).encode("utf-8")
+        extra = {'live': live} if live else {}
+        if mode == "inline":
+            tail = "".join(f",{json.dumps(k)}:{json.dumps(v)}" for k, v in extra.items())
+            return '{"json":' + raw.decode("utf-8").replace("</", "<\\/") + tail + '}'
+        packed = gzip.compress(raw, compresslevel=9, mtime=0)
+        if mode == "sidecar":
+            sidecar = output_path.with_suffix(".json.gz")
+            atomic_write(sidecar, packed)
+            literal = json.dumps({'src': sidecar.name, **extra})
+            stored = len(packed)
+        else:
+            encoded = base64.b64encode(packed).decode("ascii")
+            literal = json.dumps({'gzip': encoded, **extra})
+            stored = len(encoded)
+        console.print(f"[dim]Report payload ({mode}): {len(raw) / 1024:.1f} KB -> {stored / 1024:.1f} KB "
+                      f"({len(raw) / max(stored, 1):.1f}x smaller)[/dim]")
+        return literal
+
+    @staticmethod
+    def generate(research_data, output_path, standalone=None, payload=None, output_dir=None):
+        """Render the report and write it to output_path (see render())"""
+        html = HTMLGenerator.render(research_data, output_path, standalone, payload, output_dir=output_dir)
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(output_path, html)
+        return output_path
+
+    @staticmethod
+    def _iterations(research_data, renderer, start=0):
+        """Card data for iterations start.. (prompts and findings rendered to HTML)"""
+        responses = research_data['responses'][start:]
+        prompts = [
+            research_data['research_prompts'][i] if i < len(research_data['research_prompts']) else ""
+            for i in range(start, start + len(responses))
+        ]
+        rendered = renderer.render_many(prompts + responses)
+        quality_history = research_data.get('quality_history', [])
+        return [
+            {
+                'id': i + 1,
+                'prompt_html': rendered[n],
+                'content_html': rendered[len(prompts) + n],
+                'words': len(responses[n].split()),
+                'quality': quality_history[i]['quality'] if i < len(quality_history) else 0.85
+            }
+            for n, i in enumerate(range(start, start + len(responses)))
+        ]
+
+    @staticmethod
+    def live_update(research_data, output_path, after=0, output_dir=None):
+        """
+        What a live page that already shows `after` iterations is missing:
+        {'iterations': [...], 'status': str, 'synthesis_html': str or None}
+        """
+        renderer = HTMLGenerator.renderer_for(output_dir or Path(output_path).parent)
+        complete = research_data.get('status') == "complete"
+        return {
+            'iterations': HTMLGenerator._iterations(research_data, renderer, after),
+            'status': research_data.get('status'),
+            'synthesis_html': renderer.render(research_data['final_report'] or "") if complete else None,
+        }
+
+    @staticmethod
+    def render(research_data, output_path, standalone=None, payload=None, live=None, output_dir=None):
+        """
+        HTML for a report that lives at output_path (asset links are relative to it).
+        research_data structure:
+        {
+            'initial_query': str,
+            'responses': list,
+            'research_prompts': list,
+            'final_report': str,
+            'quality_history': list
+        }
+        payload: "inline", "gzip" (compressed into the page) or "sidecar"
+        (report_*.json.gz next to the page); default Config.REPORT_PAYLOAD.
+        live: URL of an event stream (see report_server.py) that the page
+        subscribes to for iterations added after it was rendered.
+        output_dir: root of the output tree holding assets/, the render cache
+        and (one level up) dashboard.html; defaults to the page's directory.
+        """
+        
+        page_dir = Path(output_path).parent
+        output_dir = Path(output_dir or page_dir)
+        hub_href = Path(os.path.relpath(output_dir.parent / "dashboard.html", page_dir)).as_posix()
+        if standalone is None:
+            standalone = Config.STANDALONE_REPORTS
+        renderer = HTMLGenerator.renderer_for(output_dir)
+        synthesis_html = renderer.render(research_data['final_report'] or "")
+
+        # Prepare data for JS
+        js_data = {
+            'topic': research_data['initial_query'],
+            'date': datetime.now().strftime("%B %d, %Y"),
+            'iterations': HTMLGenerator._iterations(research_data, renderer)
+        }
+
+        payload = payload or Config.REPORT_PAYLOAD
+        if standalone and payload == "sidecar":
+            payload = "gzip"  # A standalone page must carry its own data
+        js_data_str = HTMLGenerator._payload(js_data, Path(output_path), payload, live)
+
+        assets = AssetBundle(output_dir)
+        vendor_tags = assets.vendor_tags(["fonts", "font-awesome", "chart.js"], page_dir, standalone)
+        style_tag = assets.style("report", REPORT_CSS, page_dir, standalone)
+        script_tag = assets.script("report", REPORT_SCRIPT, page_dir, standalone)
+        
+        # HTML Template - v3.0 Intelligence Dossier
+        html_template = f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Dossier: {js_data['topic']}</title>
+    {vendor_tags}
+    {style_tag}
+</head>
+<body>
+
+    <nav class="floating-nav" id="main-nav">
+        <div class="nav-indicator" id="nav-indicator"></div>
+        <a href="{hub_href}" class="nav-link hub-btn">
+            <i class="fas fa-chevron-left"></i> Hub
+        </a>
+        <a href="#synthesis" class="nav-link">Intelligence</a>
+        <a href="#analytics" class="nav-link">Analysis</a>
+        <a href="#trail" class="nav-link">Trail</a>
+    </nav>
+
+    <div id="toast">Copied to Clipboard!</div>
+
+    <div class="hero">
+        <div class="hero-pattern"></div>
+        <a href="{hub_href}" class="nav-link" style="position: absolute; top: 40px; left: 40px; display: flex; align-items: center; gap: 8px; font-size: 0.8rem; letter-spacing: 2px;">
+            <i class="fas fa-arrow-left"></i> BACK TO HUB
+        </a>
+        <div class="badge-dossier">Intelligence Dossier // v3.0</div>
+        <h1 id="hero-title">{js_data['topic']}</h1>
+        <div class="hero-meta">
+            <span><i class="far fa-calendar-alt"></i> {js_data['date']}</span>
+            <span><i class="fas fa-fingerprint"></i> DEEPSEEK CORE</span>
+            <span><i class="fas fa-shield-halved"></i> VERIFIED</span>
+        </div>
+        <div class="scroll-indicator">
+            <i class="fas fa-chevron-down"></i>
+        </div>
+    </div>
+
+    <div class="content-container">
+        <!-- SYNTHESIS -->
+        <section id="synthesis">
+            <div class="section-label">Executive Findings</div>
+            <div id="synthesis-md" class="report-body">{synthesis_html}</div>
+            <div id="synthesis-anchor" style="height: 1px; margin-top: 24px;"></div>
+        </section>
+
+        <!-- NO-SECTION WRAPPER FOR PERSISTENT UI -->
+        <div class="action-container hidden">
+            <button class="btn-action" onclick="copySynthesis()">
+                <i class="far fa-copy"></i> Copy Executive Summary
+            </button>
+        </div>
+
+        <!-- ANALYTICS -->
+        <section id="analytics">
+            <div class="section-label">Quality Metrics</div>
+            <div class="analytics-box">
+                <h3 style="font-family: var(--font-display); margin-bottom: 8px;">Neural Search Depth</h3>
+                <p style="color: var(--text-muted); font-size: 0.9rem;">Visualizing the cognitive progression of the intelligence cycles.</p>
+                <div class="chart-container">
+                    <canvas id="qualityChart"></canvas>
+                </div>
+            </div>
+        </section>
+
+        <!-- RESEARCH TRAIL -->
+        <section id="trail">
+            <div class="section-label">Evidence Repository</div>
+            <div class="trail-header">
+                <h2 style="font-family: var(--font-display); font-size: 2.5rem; margin-bottom: 12px;">The Research Trail</h2>
+                <p style="color: var(--text-muted);">Explore the raw data nodes and chronological evolution of this dossier.</p>
+            </div>
+            <div id="evidence-trail"></div>
+        </section>
+
+        <footer class="footer-dossier">
+            <a href="{hub_href}" class="nav-link" style="display: inline-flex; align-items: center; gap: 10px; margin-bottom: 30px; color: var(--accent);">
+                <i class="fas fa-arrow-left"></i> RETURN TO INTELLIGENCE HUB
+            </a>
+            <div style="opacity: 0.5;">AUTHENTICATED BY DEEPSEEK RESEARCH ENGINE &bull; 2026</div>
+        </footer>
+    </div>
+
+    <script>
+        const PAYLOAD = {js_data_str};
     </script>
+    {script_tag}
 </body>
 </html>
 """
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(html_template)
-            
-        return output_path
+        return html_template
@@ -0,0 +1,165 @@
+import re
+import mmap
+import os
+
+SEPARATOR = "=" * 40
+RULE = "-" * 40
+ITERATION_RE = re.compile(r"ITERATION (\d+)$")
+TOPIC_RE = re.compile(r"Topic: (.+)")
+QUALITY_RE = re.compile(r"Quality Score: (\d+(?:\.\d+)?)%")
+
+SYNTHESIS_TITLE = "FINAL SYNTHESIS REPORT"
+
+# Parser states
+HEADER, ITERATION, PROMPT, FINDINGS, TRAILER, SYNTHESIS = range(6)
+
+
+def _lines(path, use_mmap=False):
+    """
+    Yield the lines of a log without line endings. Buffered streaming is the
+    default; use_mmap reads through a memory map instead, which avoids
+    copying very large logs into the process (see bench_log_parser.py).
+    """
+    if use_mmap:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for raw in iter(mm.readline, b""):
+                    yield raw.decode("utf-8").rstrip("\r\n")
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\r\n")
+
+
+def estimate_quality(findings):
+    """Quality guess for logs that never recorded a score"""
+    word_count = len(findings.split())
+    has_lists = '-' in findings or '*' in findings or '1.' in findings
+    has_code = '```' in findings or '    ' in findings
+
+    score = 0.5
+    if word_count > 500: score += 0.2
+    if has_lists: score += 0.1
+    if has_code: score += 0.1
+    return min(score, 0.95)
+
+
+def _iteration(prompt, findings, quality):
+    findings_text = "\n".join(findings).strip() if findings is not None else "No findings recorded."
+    return {
+        'prompt': "\n".join(prompt).strip() if prompt is not None else "No prompt recorded.",
+        'response': findings_text,
+        'quality': quality if quality is not None else estimate_quality(findings_text),
+    }
+
+
+def _tokens(lines):
+    """
+    Yield ('section', title) for each SEPARATOR / title / SEPARATOR header
+    and ('line', text) for everything else, with one line of lookahead.
+    """
+    lines = iter(lines)
+    held = None
+    while True:
+        line = held if held is not None else next(lines, None)
+        held = None
+        if line is None:
+            return
+        if line == SEPARATOR:
+            title = next(lines, None)
+            if title is not None and (ITERATION_RE.match(title) or title == SYNTHESIS_TITLE):
+                next(lines, None)  # Closing separator
+                yield 'section', title
+                continue
+            held = title
+        yield 'line', line
+
+
+def iter_log(path, use_mmap=False):
+    """
+    Single-pass parser for research_data_*.txt logs.
+    Yields ('topic', str) once, then ('iteration', {prompt, response, quality})
+    as each iteration is completed, then ('synthesis', str).
+    """
+    state = HEADER
+    topic = None
+    prompt = findings = quality = None
+    synthesis = []
+    previous = ""
+
+    for kind, line in _tokens(_lines(path, use_mmap)):
+        if state == SYNTHESIS:
+            # Everything after the synthesis header belongs to the report
+            synthesis.extend([SEPARATOR, line, SEPARATOR] if kind == 'section' else [line])
+            continue
+
+        if kind == 'section':
+            if state != HEADER:
+                yield 'iteration', _iteration(prompt, findings, quality)
+            elif topic is None:
+                topic = "Unknown Topic"
+                yield 'topic', topic
+            state = SYNTHESIS if line == SYNTHESIS_TITLE else ITERATION
+            prompt = findings = quality = None
+            previous = ""
+            continue
+
+        if state == HEADER:
+            if topic is None:
+                match = TOPIC_RE.search(line)
+                if match:
+                    topic = match.group(1)
+                    yield 'topic', topic
+            continue
+
+        if quality is None:
+            match = QUALITY_RE.search(line)
+            if match:
+                quality = float(match.group(1)) / 100.0
+        if state == ITERATION and line == "RESEARCH PROMPT:" and prompt is None:
+            state, prompt = PROMPT, []
+        elif state in (ITERATION, PROMPT) and line == "FINDINGS:" and previous == "" and findings is None:
+            state, findings = FINDINGS, []
+        elif state == PROMPT:
+            prompt.append(line)
+        elif state == FINDINGS:
+            if line.startswith(RULE):
+                state = TRAILER
+            else:
+                findings.append(line)
+        previous = line
+
+    if state in (ITERATION, PROMPT, FINDINGS, TRAILER):
+        yield 'iteration', _iteration(prompt, findings, quality)
+    if topic is None:
+        yield 'topic', "Unknown Topic"
+    yield 'synthesis', "\n".join(synthesis).strip()
+
+
+def iter_iterations(path, use_mmap=False):
+    """Lazily yield the iterations of a log without holding the others in memory"""
+    for kind, value in iter_log(path, use_mmap):
+        if kind == 'iteration':
+            yield value
+
+
+def parse_txt_to_data(filepath, use_mmap=False):
+    """Parses .txt logs back into raw data for the HTML generator"""
+    topic, synthesis = "Unknown Topic", ""
+    iterations = []
+    for kind, value in iter_log(filepath, use_mmap):
+        if kind == 'topic':
+            topic = value
+        elif kind == 'iteration':
+            iterations.append(value)
+        else:
+            synthesis = value
+    return {
+        'initial_query': topic,
+        'responses': [it['response'] for it in iterations],
+        'research_prompts': [it['prompt'] for it in iterations],
+        'quality_history': [{'iteration': i + 1, 'quality': it['quality']} for i, it in enumerate(iterations)],
+        'final_report': synthesis
+    }
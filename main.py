@@ -2,6 +2,8 @@ from config import Config
 from browser_controller import BrowserController
 from prompt_engine import PromptEngine
 from research_bot import DeepSeekResearchBot
+from session_pool import SessionPool
+from pipeline import SpeculativeRefiner
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
 from rich.panel import Panel
@@ -75,6 +77,10 @@ def main():
     console.print(f"  • Max iterations: {Config.MAX_ITERATIONS}")
     console.print(f"  • Quality target: {Config.MIN_QUALITY_SCORE:.0%}")
     console.print(f"  • Browser: {'Visible' if not Config.HEADLESS else 'Headless'}")
+    if Config.FANOUT_CANDIDATES > 1:
+        console.print(f"  • Parallel research angles: {Config.FANOUT_CANDIDATES}")
+    if Config.PIPELINE_REFINEMENT:
+        console.print("  • Pipelined refinement: second session")
     
     if not Confirm.ask("\n[bold]Proceed with research?[/bold]"):
         console.print("[yellow]Research cancelled.[/yellow]")
@@ -112,7 +118,9 @@ def main():
 
     browser = BrowserController(config)
     prompt_engine = PromptEngine()
-    bot = DeepSeekResearchBot(browser, prompt_engine, config)
+    sessions = SessionPool(config, config.FANOUT_CANDIDATES - 1) if config.FANOUT_CANDIDATES > 1 else None
+    speculator = SpeculativeRefiner(config, prompt_engine) if config.PIPELINE_REFINEMENT else None
+    bot = DeepSeekResearchBot(browser, prompt_engine, config, sessions=sessions, speculator=speculator)
     
     try:
         # Start browser
@@ -122,6 +130,12 @@ def main():
         # Manual Login Step
         browser.wait_for_login()
         
+        # Extra sessions for parallel research angles (each needs its own login)
+        if sessions:
+            sessions.start()
+        if speculator:
+            speculator.start()
+        
         # Run research cycle
         console.print("\n[bold]Step 2: Beginning research cycle...[/bold]")
         bot.run_research_cycle(initial_query)
@@ -133,6 +147,9 @@ def main():
         # Save results
         console.print("\n[bold]Step 4: Saving results...[/bold]")
         bot.save_results()
+        # Exports run on the background writer; wait so the files listed below exist
+        if bot.writer.flush():
+            console.print("[yellow]⚠️ Some exports failed (see above); the run is still in runs.db.[/yellow]")
         
         # Final message
         console.print("\n[bold green]✅ RESEARCH COMPLETE![/bold green]")
@@ -141,7 +158,8 @@ def main():
             f"Check the 'research_output' folder for:\n"
             f"  • Full research data (TXT)\n"
             f"  • Final report (Markdown)\n"
-            f"  • Summary statistics (JSON)[/green]",
+            f"  • Summary statistics (JSON)\n"
+            f"  • Run database (runs.db)[/green]",
             title="Success",
             border_style="green"
         ))
@@ -155,7 +173,13 @@ def main():
     finally:
         # Clean up
         console.print("\n[bold]Cleaning up...[/bold]")
+        if sessions:
+            sessions.close()
+        if speculator:
+            speculator.close()
         browser.close()
+        # Let queued exports finish writing before the process exits
+        bot.writer.close()
         console.print("[cyan]👋 Goodbye![/cyan]")
 
 if __name__ == "__main__":
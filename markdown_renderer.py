@@ -0,0 +1,83 @@
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from markdown_it import MarkdownIt
+from config import Config
+
+# Bump when the renderer options change so cached fragments are not reused
+RENDERER_VERSION = "1"
+MEMO_LIMIT = 5000  # Fragments kept in memory before the in-process memo is reset
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fragments (
+    hash TEXT PRIMARY KEY,
+    html TEXT NOT NULL
+);
+"""
+
+
+class MarkdownRenderer:
+    """
+    Markdown to HTML for generated reports (markdown-it, CommonMark plus GFM
+    tables and strikethrough; raw HTML in responses is escaped).
+    Fragments are memoized by content hash in memory and in a small SQLite
+    cache, so regenerating a report only renders sections that changed.
+    """
+
+    def __init__(self, cache_path=None):
+        self.md = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+        self.cache_path = Path(cache_path) if cache_path else Config.OUTPUT_DIR / "render_cache.db"
+        self._memo = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {'hits': 0, 'rendered': 0}
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha1(f"{RENDERER_VERSION}\0{text}".encode("utf-8")).hexdigest()
+
+    def _db(self):
+        if self._conn is None:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.cache_path), timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def render_many(self, texts):
+        """Rendered HTML for each text, in order. Empty texts render to ''."""
+        keys = [self.key(t) if t else None for t in texts]
+        with self._lock:
+            if len(self._memo) > MEMO_LIMIT:
+                self._memo.clear()
+            missing = {k for k in keys if k and k not in self._memo}
+            if missing:
+                conn = self._db()
+                wanted = list(missing)
+                for i in range(0, len(wanted), 500):
+                    chunk = wanted[i:i + 500]
+                    rows = conn.execute(
+                        f"SELECT hash, html FROM fragments WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                    )
+                    self._memo.update(rows)
+            rendered = []
+            for text, k in zip(texts, keys):
+                if k and k not in self._memo:
+                    self._memo[k] = self.md.render(text)
+                    rendered.append((k, self._memo[k]))
+            if rendered:
+                with self._db() as conn:
+                    conn.executemany("INSERT OR REPLACE INTO fragments (hash, html) VALUES (?, ?)", rendered)
+            self.stats['rendered'] += len(rendered)
+            self.stats['hits'] += sum(1 for k in keys if k) - len(rendered)
+        return [self._memo[k] if k else "" for k in keys]
+
+    def render(self, text):
+        return self.render_many([text])[0]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,134 @@
+import csv
+import json
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime
+from rich.console import Console
+from config import Config
+from run_store import RunStore
+from output_writer import atomic_write
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: CSV is written instead
+    pa = pq = None
+
+console = Console()
+
+METRICS_DIR = "metrics"
+STATE_NAME = "state.json"
+CSV_NAME = "iterations.csv"
+
+# Fixed schema so every appended batch lines up: (column, type)
+COLUMNS = [
+    ("run_id", "string"),
+    ("topic", "string"),
+    ("started_at", "string"),
+    ("iteration", "int"),
+    ("created_at", "string"),
+    ("quality", "float"),
+    ("length_score", "float"),
+    ("structure_score", "float"),
+    ("indicators_score", "float"),
+    ("relevance_score", "float"),
+    ("novelty", "float"),
+    ("response_length", "float"),
+    ("prompt_bytes", "int"),
+    ("response_bytes", "int"),
+    ("refinement_seconds", "float"),
+    ("research_seconds", "float"),
+]
+
+
+def resolve_format(fmt=None):
+    fmt = fmt or Config.METRICS_FORMAT
+    if fmt == "auto":
+        return "parquet" if pq else "csv"
+    if fmt == "parquet" and pq is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow); use the csv format instead")
+    return fmt
+
+
+def _load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path, state):
+    atomic_write(path, json.dumps(state))
+
+
+def _write_parquet(metrics_dir, rows):
+    types = {'string': pa.string(), 'int': pa.int64(), 'float': pa.float64()}
+    schema = pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+    table = pa.Table.from_pylist(rows, schema=schema)
+    # One part per batch; pyarrow.dataset / DuckDB / pandas read the directory as one table
+    part = metrics_dir / f"part-{datetime.now():%Y%m%d_%H%M%S_%f}.parquet"
+    pq.write_table(table, part, compression="zstd")
+    return part
+
+
+def _write_csv(metrics_dir, rows):
+    path = metrics_dir / CSV_NAME
+    new_file = not path.exists()
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=[name for name, _ in COLUMNS], extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def export_metrics(store, output_dir=None, fmt=None, rebuild=False):
+    """
+    Append the per-iteration metrics of completed runs that are not exported
+    yet to research_output/metrics/ (Parquet parts, or iterations.csv).
+    Exported runs are remembered with their updated_at in state.json; if one
+    changes or disappears, or the format changes, the export is rebuilt.
+    Returns (rows written, path or None).
+    """
+    fmt = resolve_format(fmt)
+    metrics_dir = Path(output_dir or Config.OUTPUT_DIR) / METRICS_DIR
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    state_path = metrics_dir / STATE_NAME
+    state = _load_state(state_path)
+    exported = state.get('runs', {})
+
+    complete = {run['run_id']: run['updated_at'] for run in store.list_runs() if run['status'] == "complete"}
+    stale = state.get('format') != fmt or any(complete.get(run_id) != updated for run_id, updated in exported.items())
+    if rebuild or stale:
+        for old in list(metrics_dir.glob("part-*.parquet")) + [metrics_dir / CSV_NAME]:
+            old.unlink(missing_ok=True)
+        exported = {}
+
+    pending = sorted(run_id for run_id in complete if run_id not in exported)
+    if not pending:
+        return 0, None
+    rows = [{name: row.get(name) for name, _ in COLUMNS} for row in store.iteration_metrics(pending)]
+    path = (_write_parquet if fmt == "parquet" else _write_csv)(metrics_dir, rows)
+    exported.update({run_id: complete[run_id] for run_id in pending})
+    _save_state(state_path, {'format': fmt, 'runs': exported})
+    return len(rows), path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export per-iteration metrics of all runs to a columnar file")
+    parser.add_argument("--format", choices=["auto", "parquet", "csv"], help="Default: Config.METRICS_FORMAT")
+    parser.add_argument("--rebuild", action="store_true", help="Rewrite the export from scratch")
+    args = parser.parse_args()
+
+    store = RunStore(Config.OUTPUT_DIR / "runs.db")
+    store.import_legacy(Config.OUTPUT_DIR)
+    started = time.perf_counter()
+    count, path = export_metrics(store, fmt=args.format, rebuild=args.rebuild)
+    elapsed = time.perf_counter() - started
+    store.close()
+    if path:
+        console.print(f"[green]Exported {count} iterations to[/green] {path} [dim]({elapsed:.2f}s)[/dim]")
+    else:
+        console.print("[dim]Metrics export is up to date.[/dim]")
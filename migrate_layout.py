@@ -0,0 +1,80 @@
+import os
+import re
+import argparse
+from pathlib import Path
+from rich.console import Console
+from config import Config
+from run_store import RunStore
+from run_exports import EXPORT_NAMES, export_path
+from batch_convert import batch_convert
+
+console = Console()
+
+# File names the flat layout kept directly in the output directory, by kind
+FLAT_PATTERNS = {
+    kind: re.compile("^" + re.escape(name).replace(re.escape("{run_id}"), r"(\d{8}_\d{6})") + "$")
+    for kind, name in EXPORT_NAMES.items()
+}
+FLAT_PATTERNS['sidecar'] = re.compile(r"^report_(\d{8}_\d{6})\.json\.gz$")
+
+
+def _flat_files(output_dir):
+    """(kind, run_id, path) for every export still in the flat layout"""
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            for kind, pattern in FLAT_PATTERNS.items():
+                match = pattern.match(entry.name)
+                if match:
+                    yield kind, match.group(1), Path(entry.path)
+                    break
+
+
+def migrate_layout(output_dir=None, dry_run=False):
+    """
+    Move a flat research_output/ into research_output/YYYY/MM/<run-id>/.
+    Logs that are not in the run store yet are imported first. TXT/MD/JSON
+    exports are moved and re-recorded in the store; HTML reports (whose
+    asset and hub links depend on their location) are removed and
+    regenerated in place by batch_convert. Returns the number of files moved.
+    """
+    output_dir = Path(output_dir or Config.OUTPUT_DIR)
+    store = RunStore(output_dir / "runs.db")
+    imported = store.import_legacy(output_dir, force=True)
+    if imported:
+        console.print(f"Imported {imported} legacy logs into the run store.")
+
+    moved = regenerate = 0
+    for kind, run_id, path in sorted(_flat_files(output_dir)):
+        if not store.has_run(run_id):
+            console.print(f"[yellow]SKIP:[/yellow] {path.name} (run not in the store)")
+            continue
+        if kind in ("html", "sidecar"):
+            console.print(f"[dim]REGENERATE:[/dim] {path.name}")
+            if not dry_run:
+                path.unlink()
+            regenerate += kind == "html"
+            continue
+        target = export_path(output_dir, kind, run_id)
+        console.print(f"[green]MOVE:[/green] {path.name} -> {target.relative_to(output_dir).as_posix()}")
+        if not dry_run:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+            store.record_file(run_id, kind, target)
+        moved += 1
+    store.close()
+
+    console.print(f"[bold]{'Would move' if dry_run else 'Moved'} {moved} files; "
+                  f"{regenerate} reports to regenerate.[/bold]")
+    if regenerate and not dry_run:
+        batch_convert(output_dir=output_dir)
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move a flat research_output/ into the YYYY/MM/<run-id>/ layout")
+    parser.add_argument("--output-dir", default=str(Config.OUTPUT_DIR))
+    parser.add_argument("--dry-run", action="store_true", help="Only list what would be moved")
+    args = parser.parse_args()
+    migrate_layout(args.output_dir, dry_run=args.dry_run)
@@ -0,0 +1,65 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from rich.console import Console
+
+console = Console()
+
+
+def atomic_write(path, data):
+    """
+    Write text or bytes to path through a temp file in the same directory and
+    os.replace(), so readers (and a crash halfway) never leave a partial file.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return path
+
+
+class OutputWriter:
+    """
+    Runs export jobs (file serialization, HTML and dashboard generation) on a
+    background thread so the research loop can move on to the next topic.
+    Jobs run one at a time in submission order, since later jobs (the
+    dashboard) read what earlier ones wrote. flush() waits for everything
+    submitted so far; close() flushes and stops the thread.
+    """
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-writer")
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        future = self._pool.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._pending.append(future)
+        return future
+
+    def flush(self):
+        """Wait for the submitted jobs. Failures are reported, not raised. Returns the number that failed."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        failed = 0
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                console.print(f"[red]Output job failed: {e}[/red]")
+                failed += 1
+        return failed
+
+    def close(self):
+        failed = self.flush()
+        self._pool.shutdown()
+        return failed
@@ -0,0 +1,125 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from browser_controller import BrowserController
+
+console = Console()
+
+class SpeculativeRefiner:
+    """
+    Pipelines iterations over two chat sessions.
+    While research response N is still streaming on the main session, the
+    refinement for N+1 is sent on a second session, built from a snapshot of
+    the partial text. As the response keeps growing past what the snapshot
+    could still cover, a fresh snapshot replaces it (up to
+    SPECULATION_MAX_SNAPSHOTS), so long responses can keep their speculation.
+    If the finished response N invalidates the snapshot, the speculative
+    refinement is thrown away and the bot refines as usual.
+    """
+
+    def __init__(self, config, prompt_engine):
+        self.config = config
+        self.prompt_engine = prompt_engine
+        self.session = BrowserController(config)
+        self.executor = ThreadPoolExecutor(max_workers=1)  # Keeps the second chat strictly sequential
+        self.messages_sent = 0
+        self.stats = {'accepted': 0, 'discarded': 0, 'superseded': 0}
+        self._lock = threading.Lock()
+        self._snapshots = 0
+        self._context = None
+        self._pending = None
+        self._ready = None
+
+    def start(self):
+        console.print("\n[bold]Starting speculative refinement session...[/bold]")
+        self.session.start()
+        self.session.wait_for_login()
+
+    def _refine(self, prompt):
+        # Refinement prompts carry their own history summary, so fresh chats are safe
+        if self.messages_sent >= self.config.MAX_MESSAGES_PER_CHAT:
+            self.session.start_new_chat()
+            self.messages_sent = 0
+        self.messages_sent += 1
+        return self.session.send_message(prompt)
+
+    def begin(self, original_query, responses, next_iteration):
+        """Arm speculation for the research response about to be generated"""
+        with self._lock:
+            self._context = (original_query, list(responses), next_iteration)
+            self._snapshots = 0
+            self._pending = None
+            self._ready = None
+
+    def observe(self, partial_text):
+        """
+        Progress listener for the research session. Once enough of the
+        response has streamed in, sends the next refinement on the second
+        session; once the text outgrows what that snapshot could cover,
+        sends a new one and drops the old.
+        """
+        with self._lock:
+            if not self._context:
+                return
+            if self._pending:
+                still_covers = len(self._pending[0]) >= self.config.SPECULATION_MIN_COVERAGE * len(partial_text)
+                if still_covers or self._snapshots >= self.config.SPECULATION_MAX_SNAPSHOTS:
+                    return
+                self._pending[2].cancel()  # Only stops it if the second session has not picked it up yet
+                self.stats['superseded'] += 1
+            elif len(partial_text) < self.config.SPECULATION_MIN_CHARS:
+                return
+            original_query, responses, next_iteration = self._context
+            prompt = self.prompt_engine.create_refinement_prompt(
+                original_query,
+                responses + [partial_text],
+                next_iteration
+            )
+            console.print(f"[dim]⚡ Sending speculative refinement for iteration {next_iteration} "
+                          f"({len(partial_text)} chars streamed)...[/dim]")
+            self._snapshots += 1
+            self._pending = (partial_text, prompt, self.executor.submit(self._refine, prompt))
+
+    def is_valid(self, snapshot, final_response):
+        """The snapshot still stands if the final text extends it and it covered enough of it"""
+        if not final_response.startswith(snapshot.rstrip()):
+            return False
+        return len(snapshot) >= self.config.SPECULATION_MIN_COVERAGE * len(final_response)
+
+    def resolve(self, final_response, will_continue):
+        """Accept or discard the speculative refinement once research response N is complete"""
+        with self._lock:
+            pending, self._pending, self._context = self._pending, None, None
+        if not pending:
+            return
+        snapshot, prompt, future = pending
+        if will_continue and self.is_valid(snapshot, final_response):
+            self._ready = (prompt, future)
+            return
+        # The second session still finishes its answer; the result is simply ignored
+        self.stats['discarded'] += 1
+        if will_continue:
+            console.print(f"[dim]Speculative refinement discarded (snapshot covered "
+                          f"{len(snapshot) / max(len(final_response), 1):.0%} of the final response)[/dim]")
+
+    def take(self, timeout=300):
+        """Returns (refinement_prompt, refinement_response) from an accepted speculation, or None"""
+        ready, self._ready = self._ready, None
+        if not ready:
+            return None
+        prompt, future = ready
+        try:
+            response = future.result(timeout=timeout)
+        except Exception as e:
+            console.print(f"[yellow]Speculative refinement failed: {e}[/yellow]")
+            self.stats['discarded'] += 1
+            return None
+        if not response:
+            self.stats['discarded'] += 1
+            return None
+        self.stats['accepted'] += 1
+        return prompt, response
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
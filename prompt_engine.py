@@ -4,6 +4,9 @@ from rich.console import Console
 from rich.panel import Panel
 import nltk
 from nltk.tokenize import sent_tokenize
+from config import Config
+from token_budget import TokenBudget, truncate_to_tokens
+from text_dedup import dedup_responses
 
 # Download NLTK data if needed
 try:
@@ -13,6 +16,9 @@ except LookupError:
 
 console = Console()
 
+# Header merge_candidates puts above each fan-out angle; not part of the research text
+ANGLE_HEADER_RE = re.compile(r"^## Angle \d+ \(\d+%\)\n\n\*Prompt:\* [^\n]*\n\n", re.MULTILINE)
+
 class PromptEngine:
     """
     Handles prompt refinement and quality checking
@@ -22,15 +28,56 @@ class PromptEngine:
         self.iteration_history = []
         self.refined_prompts = []
         
-    def create_refinement_prompt(self, original_query, responses=None, iteration=1):
+    @staticmethod
+    def _improved_prompt_format(placeholder, candidates=1):
+        """The IMPROVED PROMPT section of the response format, numbered when asking for several"""
+        if candidates <= 1:
+            return f"IMPROVED PROMPT:\n[{placeholder}]"
+        sections = "\n\n".join(
+            f"IMPROVED PROMPT {i}:\n[{placeholder} - angle {i}]" for i in range(1, candidates + 1)
+        )
+        return (
+            f"Give {candidates} DISTINCT improved prompts. Each one must cover a different angle "
+            f"so they can be researched in parallel without overlapping.\n\n{sections}"
+        )
+
+    def create_refinement_prompt(self, original_query, responses=None, iteration=1, history_tokens=None, candidates=1,
+                                 prior_findings=None):
         """
         Create a prompt asking DeepSeek to improve the research query.
         Incorporates repetition detection and strategic pivoting.
+        history_tokens caps the size of the history summary (defaults to
+        Config.REFINEMENT_HISTORY_TOKENS). With candidates > 1, asks for that
+        many distinct prompts (see extract_research_prompts).
+        prior_findings (findings of earlier runs on similar topics) turns the
+        first iteration into a gap analysis instead of a broad overview.
         """
         if not responses:
             responses = []
             
-        if iteration == 1 or not responses:
+        if (iteration == 1 or not responses) and prior_findings:
+            # First iteration on a topic close to earlier runs - start from what they found
+            prompt = f"""I need to research: "{original_query}"
+
+Earlier research on closely related topics already established:
+{prior_findings}
+
+Do NOT start with a broad overview of what is already covered above. Please provide:
+
+1. GAP ANALYSIS: What does the earlier research leave unanswered or only touch on for this exact topic?
+2. DIFFERENCES: Where does this topic differ from the earlier ones, and what needs fresh investigation?
+3. DEEPER QUESTIONS: What specific questions would add the most on top of the existing findings?
+
+Then, create an IMPROVED RESEARCH PROMPT that targets those gaps directly.
+
+Format your response like this:
+
+GAP ANALYSIS:
+[What's missing]
+
+{self._improved_prompt_format("The actual prompt I should use for research", candidates)}"""
+
+        elif iteration == 1 or not responses:
             # First iteration - ask for better prompt
             prompt = f"""I need to research: "{original_query}"
 
@@ -52,8 +99,7 @@ Format your response like this:
 ANALYSIS:
 [Your analysis here]
 
-IMPROVED PROMPT:
-[The actual prompt I should use for research]"""
+{self._improved_prompt_format("The actual prompt I should use for research", candidates)}"""
             
         else:
             # Subsequent iterations - refine based on findings
@@ -68,10 +114,13 @@ IMPROVED PROMPT:
                     is_repetitive = True
                     break
             
-            # Prepare context summary
+            # Prepare context summary, sharing the token budget by recency and novelty
+            if history_tokens is None:
+                history_tokens = Config.REFINEMENT_HISTORY_TOKENS
+            budget = TokenBudget(Config.CONTEXT_TOKENS, Config.RESPONSE_RESERVE_TOKENS)
             context_summary = ""
-            for i, r in enumerate(responses):
-                context_summary += f"\nITERATION {i+1} SUMMARY: {r[:300]}...\n"
+            for i, r in enumerate(budget.fit(responses, history_tokens)):
+                context_summary += f"\nITERATION {i+1} SUMMARY: {r}\n"
 
             strategy = "DEEP DIVE" if not is_repetitive else "STRATEGIC PIVOT"
             
@@ -103,8 +152,7 @@ Format your response like this:
 GAP ANALYSIS:
 [What's missing]
 
-IMPROVED PROMPT:
-[The specific prompt for next research iteration]"""
+{self._improved_prompt_format("The specific prompt for next research iteration", candidates)}"""
         
         return prompt
     
@@ -138,29 +186,59 @@ IMPROVED PROMPT:
             return response[:500] + "..."
         return response
     
-    def evaluate_response_quality(self, response, original_query):
+    def extract_research_prompts(self, response, count):
         """
-        Evaluate how comprehensive the response is
-        Returns: (score, should_continue, reason)
+        Extract up to `count` numbered prompts ("IMPROVED PROMPT 1:", ...) from a
+        multi-candidate refinement. Falls back to the single-prompt parser.
         """
-        if not response or len(response) < 200:
-            return 0.2, True, "Response too short"
-        
-        # Initialize scoring factors
-        score = 0.0
-        factors = []
-        
+        matches = re.findall(
+            r'IMPROVED PROMPT\s*#?(\d+)\**\s*:?\**\s*(.+?)(?=\n[^\n]*IMPROVED PROMPT\s*#?\d+|\Z)',
+            response, re.DOTALL
+        )
+        prompts = []
+        for _, text in matches:
+            text = text.strip().strip('*').strip()
+            if text and text not in prompts:
+                prompts.append(text)
+        if not prompts:
+            prompts = [self.extract_research_prompt(response)]
+        return prompts[:count]
+
+    def merge_candidates(self, original_query, prompts, responses):
+        """
+        Score parallel research responses and merge them best first.
+        Sentences a lower-ranked response repeats from a better one are dropped.
+        Returns (merged_response, merged_prompt, best_score).
+        """
+        scored = []
+        for prompt, response in zip(prompts, responses):
+            if response:
+                score = self.evaluate_response_quality(response, original_query)[0]
+                scored.append((score, prompt, response))
+        if not scored:
+            return "", "", 0.0
+        scored.sort(key=lambda c: -c[0])
+        if len(scored) == 1:
+            return scored[0][2], scored[0][1], scored[0][0]
+
+        dedup = dedup_responses([c[2] for c in scored])
+        merged = []
+        for i, ((score, prompt, _), text) in enumerate(zip(scored, dedup.responses), 1):
+            merged.append(f"## Angle {i} ({score:.0%})\n\n*Prompt:* {' '.join(prompt.split())}\n\n{text}")
+        merged_prompt = "\n\n".join(f"{i}. {c[1]}" for i, c in enumerate(scored, 1))
+        return "\n\n".join(merged), merged_prompt, scored[0][0]
+
+    def quality_factors(self, response, original_query):
+        """The individual quality factor scores: {length, structure, indicators, relevance}"""
+        # Fan-out headers would count as sections, bullets and query words of their own
+        response = ANGLE_HEADER_RE.sub("", response)
         # Factor 1: Length (0-0.3)
         length_score = min(len(response) / 3000, 0.3)
-        score += length_score
-        factors.append(f"Length: {length_score:.2f}")
         
         # Factor 2: Structure (0-0.2)
         has_sections = bool(re.search(r'#{1,3}\s+\w+|^\d+\.\s+\w+', response, re.MULTILINE))
         has_bullets = '•' in response or '-' in response or '*' in response
         structure_score = (0.1 if has_sections else 0) + (0.1 if has_bullets else 0)
-        score += structure_score
-        factors.append(f"Structure: {structure_score:.2f}")
         
         # Factor 3: Comprehensiveness indicators (0-0.3)
         indicators = [
@@ -175,19 +253,30 @@ IMPROVED PROMPT:
         
         indicator_count = sum(1 for ind in indicators if ind in response.lower())
         indicator_score = min(indicator_count / 15, 0.3)
-        score += indicator_score
-        factors.append(f"Indicators: {indicator_score:.2f}")
         
         # Factor 4: Relevance to query (0-0.2)
         query_words = set(original_query.lower().split())
         response_words = set(response.lower().split())
         common_words = query_words.intersection(response_words)
         relevance_score = min(len(common_words) / max(len(query_words), 1) * 0.2, 0.2)
-        score += relevance_score
-        factors.append(f"Relevance: {relevance_score:.2f}")
+
+        return {
+            'length': length_score,
+            'structure': structure_score,
+            'indicators': indicator_score,
+            'relevance': relevance_score,
+        }
+
+    def evaluate_response_quality(self, response, original_query):
+        """
+        Evaluate how comprehensive the response is
+        Returns: (score, should_continue, reason)
+        """
+        if not response or len(response) < 200:
+            return 0.2, True, "Response too short"
         
         # Cap at 1.0
-        final_score = min(score, 1.0)
+        final_score = min(sum(self.quality_factors(response, original_query).values()), 1.0)
         
         # Decision logic
         if final_score >= 0.8:
@@ -203,7 +292,7 @@ IMPROVED PROMPT:
         """
         prompt = f"""Based on this research about "{original_query}":
 
-{response[:1000]}...
+{truncate_to_tokens(response, Config.FOLLOW_UP_TOKENS)}
 
 What are the 3 most important follow-up questions I should ask to deepen my understanding?
 List only the questions, one per line, starting with "Q:". Make them specific and insightful."""
@@ -0,0 +1,277 @@
+import os
+import re
+import json
+import gzip
+import hashlib
+import argparse
+import mimetypes
+import threading
+import webbrowser
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlsplit, unquote, parse_qs
+from rich.console import Console
+from config import Config
+from run_store import RunStore, RUN_ID_PATTERN
+from html_generator import HTMLGenerator
+from dashboard_generator import DashboardGenerator
+from run_exports import export_path
+
+console = Console()
+
+REPORT_RE = re.compile(rf"report_({RUN_ID_PATTERN})\.html$")
+EVENTS_RE = re.compile(rf"report_({RUN_ID_PATTERN})\.events$")
+HASHED_NAME_RE = re.compile(r"(^|\.)[0-9a-f]{10}\.\w+$")  # name.<content hash>.ext and vendor/files/<hash>.ext
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_GZIP_BYTES = 1024
+PRIVATE_SUFFIXES = {".db", ".db-wal", ".db-shm", ".tmp"}  # Never served, even from the output directory
+
+
+class RenderCache:
+    """Thread-safe LRU of rendered pages: key -> (etag, body, gzipped body)"""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, key, render):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._items[key]
+            self.stats['misses'] += 1
+        # Render outside the lock; two threads may race to render the same page, which is harmless
+        body = render().encode("utf-8")
+        entry = (f'"{hashlib.sha1(body).hexdigest()[:20]}"', body, gzip.compress(body, compresslevel=6))
+        with self._lock:
+            self._items[key] = entry
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return entry
+
+
+class ReportServer(ThreadingHTTPServer):
+    """
+    Serves the dashboard and reports straight from the run store.
+    Pages are rendered on first request and cached by the run's updated_at
+    (the dashboard by the store's change marker), so nothing is pre-rendered
+    and edits show up on the next request. Reports of runs still in progress
+    subscribe to report_<id>.events, a Server-Sent Events stream of each new
+    iteration and finally the synthesis. Other files under the output
+    directory (assets, index shards) are served as they are.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, output_dir=None):
+        super().__init__(address, ReportRequestHandler)
+        self.output_dir = Path(output_dir or Config.OUTPUT_DIR)
+        self.root = Path.cwd()
+        self.store = RunStore(self.output_dir / "runs.db")
+        self.cache = RenderCache(Config.SERVER_CACHE_SIZE)
+        self._dashboard_lock = threading.Lock()  # The dashboard rewrites its manifest and index files
+        self.stopping = threading.Event()  # Ends open event streams on shutdown
+
+    def url_for(self, path):
+        """Server path of a file under the served root"""
+        return "/" + Path(os.path.relpath(Path(path).resolve(), self.root)).as_posix()
+
+    def render_dashboard(self):
+        marker = self.store.change_marker()
+
+        def render():
+            with self._dashboard_lock:
+                return DashboardGenerator.generate(self.output_dir, served=True)
+        return self.cache.get(('dashboard', marker), render)
+
+    def render_report(self, run_id):
+        updated_at = self.store.get_updated_at(run_id)
+        if updated_at is None:
+            return None
+        path = export_path(self.output_dir, "html", run_id)
+
+        def render():
+            run = self.store.get_run(run_id)
+            live = f"report_{run_id}.events" if run['status'] != "complete" else None
+            return HTMLGenerator.render(run, path, payload="inline", live=live, output_dir=self.output_dir)
+        return self.cache.get(('report', run_id, updated_at), render)
+
+    def live_update(self, run_id, after):
+        path = export_path(self.output_dir, "html", run_id)
+        return HTMLGenerator.live_update(self.store.get_run(run_id), path, after, output_dir=self.output_dir)
+
+    def shutdown(self):
+        self.stopping.set()
+        super().shutdown()
+
+    def server_close(self):
+        self.stopping.set()
+        super().server_close()
+        self.store.close()
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ResearchReports/1.0"
+
+    def log_message(self, format, *args):
+        console.print(f"[dim]{self.address_string()} {format % args}[/dim]")
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        path = unquote(urlsplit(self.path).path)
+        if path == "/":
+            self.send_response(HTTPStatus.FOUND)
+            self.send_header("Location", "/dashboard.html")
+            self.end_headers()
+            return
+        if path == "/dashboard.html":
+            return self._send_page(self.server.render_dashboard(), head)
+
+        # Reports are only rendered at their own location (research_output/YYYY/MM/<run-id>/)
+        match = REPORT_RE.search(path)
+        if match and path == self.server.url_for(export_path(self.server.output_dir, "html", match.group(1))):
+            entry = self.server.render_report(match.group(1))
+            if entry:
+                return self._send_page(entry, head)
+        match = EVENTS_RE.search(path)
+        report = export_path(self.server.output_dir, "html", match.group(1)) if match else None
+        if report and path == self.server.url_for(report.with_suffix(".events")) and not head:
+            return self._send_events(match.group(1))
+        self._send_file(path, head)
+
+    def _send_events(self, run_id):
+        """
+        Stream iterations the page has not seen (after ?after=N, or the
+        Last-Event-ID of a reconnecting EventSource) as they land in the store,
+        then the synthesis once the run completes.
+        """
+        if self.server.store.get_updated_at(run_id) is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            sent = int(self.headers.get("Last-Event-ID") or parse_qs(urlsplit(self.path).query).get("after", ["0"])[0])
+        except ValueError:
+            sent = 0
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        seen, idle = None, 0.0
+        try:
+            self.wfile.write(f"retry: {Config.LIVE_RETRY_MS}\n\n".encode("utf-8"))
+            while not self.server.stopping.is_set():
+                updated_at = self.server.store.get_updated_at(run_id)
+                if updated_at != seen:
+                    seen, idle = updated_at, 0.0
+                    update = self.server.live_update(run_id, sent)
+                    for iteration in update['iterations']:
+                        self._write_event("iteration", json.dumps(iteration), event_id=iteration['id'])
+                        sent = iteration['id']
+                    if update['status'] == "complete":
+                        self._write_event("complete", json.dumps({'synthesis_html': update['synthesis_html']}))
+                        return
+                elif idle >= Config.LIVE_HEARTBEAT:
+                    # Comment line; lets a dead connection fail the write and end this thread
+                    self.wfile.write(b": ping\n\n")
+                    self.wfile.flush()
+                    idle = 0.0
+                self.server.stopping.wait(Config.LIVE_POLL_INTERVAL)
+                idle += Config.LIVE_POLL_INTERVAL
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _write_event(self, event, data, event_id=None):
+        lines = [f"id: {event_id}"] if event_id is not None else []
+        lines += [f"event: {event}", f"data: {data}"]
+        self.wfile.write(("\n".join(lines) + "\n\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def _accepts_gzip(self):
+        return "gzip" in self.headers.get("Accept-Encoding", "")
+
+    def _not_modified(self, etag):
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return True
+        return False
+
+    def _send(self, etag, body, content_type, head, packed=None, cache_control="no-cache"):
+        if self._not_modified(etag):
+            return
+        if packed is None and len(body) >= MIN_GZIP_BYTES and content_type.startswith(COMPRESSIBLE):
+            packed = gzip.compress(body, compresslevel=6)
+        use_gzip = packed is not None and self._accepts_gzip() and len(packed) < len(body)
+        payload = packed if use_gzip else body
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if not head:
+            self.wfile.write(payload)
+
+    def _send_page(self, entry, head):
+        etag, body, packed = entry
+        self._send(etag, body, "text/html; charset=utf-8", head, packed)
+
+    def _send_file(self, path, head):
+        """Static files, restricted to the output directory"""
+        target = (self.server.root / path.lstrip("/")).resolve()
+        allowed = self.server.output_dir.resolve()
+        if allowed not in target.parents or not target.is_file() or target.suffix in PRIVATE_SUFFIXES:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        stat = target.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if self._not_modified(etag):
+            return
+        content_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        if target.name.endswith(".gz"):
+            content_type = "application/gzip"
+        # Content-hashed asset names never change content; everything else (vendor.json too) is revalidated
+        immutable = ("/assets/" in path and HASHED_NAME_RE.search(target.name)) or ("?v=" in self.path)
+        self._send(etag, target.read_bytes(), content_type, head,
+                   cache_control="public, max-age=31536000, immutable" if immutable else "no-cache")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dashboard and reports over HTTP, rendering on demand")
+    parser.add_argument("--host", default="127.0.0.1", help="Use 0.0.0.0 to browse from other machines on the LAN")
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument("--output-dir", default=str(Config.OUTPUT_DIR))
+    parser.add_argument("--no-browser", action="store_true", help="Do not open the dashboard in a browser")
+    args = parser.parse_args()
+
+    server = ReportServer((args.host, args.port), args.output_dir)
+    url = f"http://{'localhost' if args.host in ('127.0.0.1', '0.0.0.0') else args.host}:{server.server_address[1]}/"
+    console.print(f"[bold green]Serving research reports at[/bold green] {url} [dim](Ctrl+C to stop)[/dim]")
+    if not args.no_browser:
+        webbrowser.open(url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stats = server.cache.stats
+        console.print(f"[dim]Render cache: {stats['hits']} hits, {stats['misses']} renders[/dim]")
+
+if __name__ == "__main__":
+    main()
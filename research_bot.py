@@ -6,19 +6,34 @@ from rich.layout import Layout
 from rich.live import Live
 from rich.text import Text
 import time
-from datetime import datetime
 import os
 import webbrowser
-from html_generator import HTMLGenerator
+import threading
 from dashboard_generator import DashboardGenerator
+from token_budget import TokenBudget, estimate_tokens
+from summarizer import ExtractiveSummarizer
+from text_dedup import dedup_responses, shingle_novelty
+from run_store import RunStore, new_run_id
+from run_exports import export_run, export_path
+from search_index import SearchIndex
+from asset_bundle import AssetBundle
+from report_server import ReportServer
+from metrics_export import export_metrics
+from output_writer import OutputWriter
 
 console = Console()
 
 class DeepSeekResearchBot:
-    def __init__(self, browser, prompt_engine, config):
+    def __init__(self, browser, prompt_engine, config, sessions=None, speculator=None, store=None):
         self.browser = browser
         self.prompt_engine = prompt_engine
         self.config = config
+        self.store = store or RunStore(config.OUTPUT_DIR / "runs.db")
+        self.run_id = None
+        self.live_server = None  # ReportServer streaming this run's report (Config.LIVE_REPORTS)
+        self.writer = OutputWriter()  # Exports run off the research thread; flush() before exiting
+        self.sessions = sessions  # Optional SessionPool for fan-out research
+        self.speculator = speculator  # Optional SpeculativeRefiner for pipelined iterations
         self.research_data = {
             'initial_query': '',
             'refinement_prompts': [],
@@ -26,14 +41,81 @@ class DeepSeekResearchBot:
             'responses': [],
             'final_report': '',
             'iterations': [],
-            'messages_sent': 0  # Counter for current chat
+            'messages_sent': 0,  # Counter for current chat
+            'chat_tokens': 0  # Estimated tokens already in the current chat
         }
+        self.budget = TokenBudget(config.CONTEXT_TOKENS, config.RESPONSE_RESERVE_TOKENS)
+        self.summarizer = ExtractiveSummarizer()  # Caches sentence rankings per response
+
+    def _track_tokens(self, prompt, response):
+        """Account for a round-trip in the current chat's context"""
+        self.research_data['chat_tokens'] += estimate_tokens(prompt) + estimate_tokens(response)
+
+    def _history_tokens(self, cap):
+        """Tokens available for history, bounded by what the current chat has left"""
+        return min(cap, self.budget.available(used_tokens=self.research_data['chat_tokens']))
+
+    def _fanout_candidates(self):
+        """Number of research prompts to run per iteration (main session plus parallel ones)"""
+        if self.config.FANOUT_CANDIDATES <= 1 or not self.sessions:
+            return 1
+        return min(self.config.FANOUT_CANDIDATES, 1 + len(self.sessions.sessions))
+
+    def _prior_findings(self, initial_query):
+        """
+        Compressed findings of the closest earlier runs on a similar topic, used
+        to seed the first refinement so it skips the broad overview ('' if none)
+        """
+        if not self.config.PRIOR_RUNS:
+            return ""
+        index = SearchIndex(self.store)
+        index.update()
+        similar = [
+            r for r in index.similar_runs(initial_query, self.config.PRIOR_RUNS, exclude=self.run_id)
+            if r['similarity'] >= self.config.PRIOR_MIN_SIMILARITY
+        ]
+        if not similar:
+            return ""
+        per_run = self.config.PRIOR_FINDINGS_TOKENS // len(similar)
+        sections = []
+        for r in similar:
+            run = self.store.get_run(r['run_id'])
+            findings = run['final_report'] or "\n\n".join(run['responses'])
+            summary = self.summarizer.compress(findings, per_run).replace("\n", " ")
+            sections.append(f"- On \"{run['initial_query']}\": {summary}")
+        topics = ", ".join(f"{r['topic']} ({r['similarity']:.0%})" for r in similar)
+        console.print(f"[cyan]♻️  Building on {len(similar)} earlier run(s):[/cyan] [dim]{topics}[/dim]")
+        return "\n".join(sections)
+
+    def _with_carryover(self, initial_query, research_prompt):
+        """Prefix a research prompt with compressed findings so far, for use in a fresh chat"""
+        context = f"Continuing research on: \"{initial_query}\"\n\nHere is what we have found so far across {len(self.research_data['responses'])} iterations:\n"
+        # Share the carryover budget across previous findings by recency and novelty
+        available = min(
+            self.config.CARRYOVER_TOKENS,
+            self.budget.available(context, research_prompt)
+        )
+        # Keep each finding's most informative sentences rather than its intro
+        snippets = self.budget.fit(
+            self.research_data['responses'], available,
+            shrink=self.summarizer.compress
+        )
+        for i, snippet in enumerate(snippets):
+            snippet = snippet.replace('\n', ' ')
+            context += f"- Iteration {i+1}: {snippet}\n"
+        
+        return f"{context}\n\n[OBJECTIVE] Based on the above, please proceed with this specific research goal:\n{research_prompt}"
         
     def run_research_cycle(self, initial_query):
         """
         Main research loop: refine → research → evaluate → repeat
         """
         self.research_data['initial_query'] = initial_query
+        self.run_id = new_run_id()
+        self.store.start_run(self.run_id, initial_query)
+        if self.config.LIVE_REPORTS:
+            self._open_live_report()
+        prior_findings = self._prior_findings(initial_query)
         
         # Display header
         console.rule("[bold cyan]Starting Self-Improving Research Cycle[/bold cyan]")
@@ -53,39 +135,61 @@ class DeepSeekResearchBot:
             # Step 1: Get refined prompt from DeepSeek
             console.print("\n[bold]📝 Step 1: Getting refined research prompt...[/bold]")
             
-            # Create refinement prompt
-            refinement_prompt = self.prompt_engine.create_refinement_prompt(
-                initial_query,
-                self.research_data['responses'],
-                iteration
-            )
+            candidates = self._fanout_candidates()
+            refinement_started = time.perf_counter()
             
-            # Send refinement request with retry logic
-            refinement_response = ""
-            for retry in range(3):
-                refinement_response = self.browser.send_message(refinement_prompt)
-                if refinement_response:
-                    break
+            # PIPELINE: a refinement may already have been prepared on the second session
+            speculative = self.speculator.take() if self.speculator and candidates == 1 else None
+            if speculative:
+                console.print("[dim]⚡ Using speculative refinement prepared while the last response streamed[/dim]")
+                refinement_prompt, refinement_response = speculative
+            else:
+                # Create refinement prompt
+                refinement_prompt = self.prompt_engine.create_refinement_prompt(
+                    initial_query,
+                    self.research_data['responses'],
+                    iteration,
+                    history_tokens=self._history_tokens(self.config.REFINEMENT_HISTORY_TOKENS),
+                    candidates=candidates,
+                    prior_findings=prior_findings
+                )
                 
-                console.print(f"[red]Failed to get refinement response (Attempt {retry+1}/3). Retrying...[/red]")
-                if retry == 1:
-                    console.print("[yellow]🔄 Attempting page refresh to recover UI state...[/yellow]")
-                    self.browser.driver.refresh()
-                    time.sleep(self.config.PAGE_LOAD_WAIT)
-                time.sleep(5)
+                # Send refinement request with retry logic
+                refinement_response = ""
+                for retry in range(3):
+                    refinement_response = self.browser.send_message(refinement_prompt)
+                    if refinement_response:
+                        break
+                    
+                    console.print(f"[red]Failed to get refinement response (Attempt {retry+1}/3). Retrying...[/red]")
+                    if retry == 1:
+                        console.print("[yellow]🔄 Attempting page refresh to recover UI state...[/yellow]")
+                        self.browser.driver.refresh()
+                        time.sleep(self.config.PAGE_LOAD_WAIT)
+                    time.sleep(5)
+                self._track_tokens(refinement_prompt, refinement_response)
+                self.research_data['messages_sent'] += 1
             
             if not refinement_response:
                 console.print("[bold red]❌ Failed to get refinement after 3 attempts. Skipping to next step or stopping.[/bold red]")
                 if iteration == 1:
                     # If first iteration fails, we can't really continue well
                     research_prompt = initial_query
+                    candidate_prompts = [research_prompt]
                 else:
                     iteration += 1
                     continue
+            elif candidates > 1:
+                # Extract one research prompt per parallel session
+                candidate_prompts = self.prompt_engine.extract_research_prompts(refinement_response, candidates)
+                research_prompt = candidate_prompts[0]
             else:
                 # Extract the actual research prompt
                 research_prompt = self.prompt_engine.extract_research_prompt(refinement_response)
+                candidate_prompts = [research_prompt]
             
+            refinement_seconds = time.perf_counter() - refinement_started
+
             # Store prompts
             self.research_data['refinement_prompts'].append(refinement_response)
             self.research_data['research_prompts'].append(research_prompt)
@@ -98,8 +202,6 @@ class DeepSeekResearchBot:
             ))
             
             # Step 2: Manage conversation state (Restart if necessary)
-            self.research_data['messages_sent'] += 1 # Increment for the refinement prompt sent in Step 1
-            
             should_new_chat = False
             was_reset = False
             if not self.config.REUSE_CHAT:
@@ -113,6 +215,7 @@ class DeepSeekResearchBot:
                 console.print(f"\n[bold]🔄 Step 2: Starting fresh conversation ({reason_new})...[/bold]")
                 self.browser.start_new_chat()
                 self.research_data['messages_sent'] = 0
+                self.research_data['chat_tokens'] = 0
                 was_reset = True
             else:
                 console.print("\n[bold]♻️  Step 2: Reusing current conversation...[/bold]")
@@ -126,17 +229,45 @@ class DeepSeekResearchBot:
             final_research_prompt = research_prompt
             if was_reset and self.research_data['responses']:
                  console.print("[dim]Prepending previous research findings for continuity...[/dim]")
-                 context = f"Continuing research on: \"{initial_query}\"\n\nHere is what we have found so far across {len(self.research_data['responses'])} iterations:\n"
-                 for i, resp in enumerate(self.research_data['responses']):
-                     # Include a snippet of each previous finding
-                     snippet = resp[:400].replace('\n', ' ')
-                     context += f"- Iteration {i+1}: {snippet}...\n"
-                 
-                 final_research_prompt = f"{context}\n\n[OBJECTIVE] Based on the above, please proceed with this specific research goal:\n{research_prompt}"
+                 final_research_prompt = self._with_carryover(initial_query, research_prompt)
+
+            research_started = time.perf_counter()
+
+            # FAN-OUT: the other candidate prompts run on parallel sessions (fresh chats)
+            futures = []
+            if len(candidate_prompts) > 1:
+                console.print(f"[dim]Researching {len(candidate_prompts)} angles in parallel...[/dim]")
+                extra_prompts = candidate_prompts[1:]
+                if self.research_data['responses']:
+                    extra_prompts = [self._with_carryover(initial_query, p) for p in extra_prompts]
+                futures = self.sessions.submit(extra_prompts)
 
-            research_response = self.browser.send_message(final_research_prompt)
+            # PIPELINE: let the second session start refining once enough of this response streams in
+            on_progress = None
+            if self.speculator and not futures and iteration < self.config.MAX_ITERATIONS:
+                self.speculator.begin(initial_query, self.research_data['responses'], iteration + 1)
+                on_progress = self.speculator.observe
+
+            research_response = self.browser.send_message(final_research_prompt, on_progress=on_progress)
             self.research_data['messages_sent'] += 1
+            self._track_tokens(final_research_prompt, research_response)
+            
+            if futures:
+                candidate_responses = [research_response]
+                for future in futures:
+                    try:
+                        candidate_responses.append(future.result())
+                    except Exception as e:
+                        console.print(f"[yellow]Parallel session failed: {e}[/yellow]")
+                        candidate_responses.append("")
+                research_response, research_prompt, best_score = self.prompt_engine.merge_candidates(
+                    initial_query, candidate_prompts, candidate_responses
+                )
+                self.research_data['research_prompts'][-1] = research_prompt
+                console.print(f"[dim]Merged {sum(1 for r in candidate_responses if r)} parallel responses (best {best_score:.0%})[/dim]")
             
+            research_seconds = time.perf_counter() - research_started
+
             if not research_response:
                 console.print("[red]Failed to get research response. Skipping iteration.[/red]")
                 continue
@@ -158,6 +289,9 @@ class DeepSeekResearchBot:
                 initial_query
             )
             
+            if self.speculator:
+                self.speculator.resolve(research_response, should_continue and iteration < self.config.MAX_ITERATIONS)
+            
             # Log iteration
             self.prompt_engine.log_iteration(
                 iteration,
@@ -166,6 +300,22 @@ class DeepSeekResearchBot:
                 quality_score,
                 research_prompt
             )
+            self.store.add_iteration(
+                self.run_id,
+                len(self.research_data['responses']),
+                research_prompt,
+                research_response,
+                refinement_prompt=refinement_response,
+                metrics={
+                    'quality': quality_score,
+                    'response_length': len(research_response),
+                    'novelty': shingle_novelty(research_response, self.research_data['responses'][:-1]),
+                    'refinement_seconds': refinement_seconds,
+                    'research_seconds': research_seconds,
+                    **{f"{name}_score": value for name, value in
+                       self.prompt_engine.quality_factors(research_response, initial_query).items()},
+                }
+            )
             
             # Display quality metrics
             quality_table = Table(title="Quality Assessment", show_header=True, header_style="bold magenta")
@@ -194,19 +344,17 @@ class DeepSeekResearchBot:
         
         if not self.research_data['responses']:
             console.print("[red]No research data to generate report.[/red]")
+            self.store.finish_run(self.run_id, "")
             return
         
         # Prepare synthesis prompt
-        synthesis_prompt = f"""I have conducted {len(self.research_data['responses'])} research iterations on: "{self.research_data['initial_query']}"
+        synthesis_header = f"""I have conducted {len(self.research_data['responses'])} research iterations on: "{self.research_data['initial_query']}"
 
 Here are ALL the responses I gathered:
 
 """
         
-        for i, response in enumerate(self.research_data['responses'], 1):
-            synthesis_prompt += f"\n--- ITERATION {i} ---\n{response[:8000]}\n"
-        
-        synthesis_prompt += """
+        synthesis_footer = """
 Please synthesize ALL this information into a comprehensive, well-structured final report.
 
 The report MUST include:
@@ -246,15 +394,45 @@ Make it thorough, well-organized, and valuable as a standalone research document
         # Determine if we should start a new chat for synthesis
         # Often better for synthesis to have everything in context if possible, 
         # but if we've reached a limit, we better start fresh.
+        fresh_room = self.budget.available(synthesis_header, synthesis_footer)
+        reason_new = None
         if self.research_data['messages_sent'] > self.config.MAX_MESSAGES_PER_CHAT - 2:
-            console.print("[dim]Starting new chat for synthesis due to message count...[/dim]")
+            reason_new = "message count"
+        elif self.research_data['chat_tokens'] > fresh_room // 2:
+            reason_new = "context usage"
+        
+        if reason_new:
+            console.print(f"[dim]Starting new chat for synthesis due to {reason_new}...[/dim]")
             self.browser.start_new_chat()
             self.research_data['messages_sent'] = 0
+            self.research_data['chat_tokens'] = 0
+        
+        # Drop sentences later iterations repeat from earlier ones
+        dedup = dedup_responses(self.research_data['responses'])
+        if dedup.bytes_saved:
+            console.print(
+                f"[dim]Removed repeated sentences: {dedup.bytes_saved:,} of "
+                f"{dedup.bytes_before:,} bytes saved ({dedup.bytes_saved / dedup.bytes_before:.0%})[/dim]"
+            )
+        
+        # Fit the responses into whatever context the chat has left
+        available = self.budget.available(
+            synthesis_header, synthesis_footer,
+            used_tokens=self.research_data['chat_tokens']
+        )
+        synthesis_prompt = synthesis_header
+        for i, response in enumerate(self.budget.fit(dedup.responses, available), 1):
+            synthesis_prompt += f"\n--- ITERATION {i} ---\n{response}\n"
+            if dedup.attribution(i - 1):
+                synthesis_prompt += f"{dedup.attribution(i - 1)}\n"
+        synthesis_prompt += synthesis_footer
         
         # No Progress bar here to avoid flickering with the console.print calls inside send_message
         final_report = self.browser.send_message(synthesis_prompt)
+        self._track_tokens(synthesis_prompt, final_report)
         
         self.research_data['final_report'] = final_report
+        self.store.finish_run(self.run_id, final_report)
         
         # Display report preview
         console.print(Panel(
@@ -282,6 +460,13 @@ Make it thorough, well-organized, and valuable as a standalone research document
             avg_quality = sum(e['quality_score'] for e in self.prompt_engine.iteration_history) / len(self.prompt_engine.iteration_history)
             stats_table.add_row("Average Quality", f"{avg_quality:.1%}")
         
+        if self.speculator:
+            stats_table.add_row(
+                "Speculative Refinements",
+                f"{self.speculator.stats['accepted']} used / {self.speculator.stats['discarded']} discarded"
+                f" / {self.speculator.stats['superseded']} superseded"
+            )
+        
         console.print(stats_table)
         
         # Iteration history table
@@ -302,82 +487,60 @@ Make it thorough, well-organized, and valuable as a standalone research document
             
             console.print(history_table)
     
+    def _open_live_report(self):
+        """Serve the report while the run is in progress; iterations stream in as they are stored"""
+        if self.live_server is None:
+            try:
+                self.live_server = ReportServer(("127.0.0.1", self.config.SERVER_PORT), self.config.OUTPUT_DIR)
+            except OSError as e:
+                # Usually report_server.py is already running on that port, which serves live pages too
+                console.print(f"[dim]Live report server not started ({e}); using the running one.[/dim]")
+            else:
+                threading.Thread(target=self.live_server.serve_forever, daemon=True).start()
+        report = export_path(self.config.OUTPUT_DIR, "html", self.run_id)
+        url = f"http://localhost:{self.config.SERVER_PORT}/{report.as_posix()}"
+        console.print(f"[cyan]📡 Live report:[/cyan] {url}")
+        webbrowser.open(url)
+
     def save_results(self):
-        """Save all research data to files"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Save full research data
-        filename1 = self.config.OUTPUT_DIR / f"research_data_{timestamp}.txt"
-        with open(filename1, "w", encoding="utf-8") as f:
-            f.write("=" * 80 + "\n")
-            f.write(f"DEEPSEEK RESEARCH REPORT\n")
-            f.write(f"Topic: {self.research_data['initial_query']}\n")
-            f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Iterations: {len(self.research_data['responses'])}\n")
-            f.write("=" * 80 + "\n\n")
-            
-            for i in range(len(self.research_data['responses'])):
-                f.write(f"\n{'='*40}\n")
-                f.write(f"ITERATION {i+1}\n")
-                f.write(f"{'='*40}\n\n")
-                
-                if i < len(self.research_data['research_prompts']):
-                    f.write(f"RESEARCH PROMPT:\n{self.research_data['research_prompts'][i]}\n\n")
-                
-                f.write(f"FINDINGS:\n{self.research_data['responses'][i]}\n")
-                f.write("\n" + "-" * 40 + "\n")
-            
-            f.write(f"\n{'='*40}\n")
-            f.write("FINAL SYNTHESIS REPORT\n")
-            f.write(f"{'='*40}\n\n")
-            f.write(self.research_data['final_report'])
-        
-        # Save just the final report as markdown
-        filename2 = self.config.OUTPUT_DIR / f"final_report_{timestamp}.md"
-        with open(filename2, "w", encoding="utf-8") as f:
-            f.write(f"# Research Report: {self.research_data['initial_query']}\n\n")
-            f.write(f"*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
-            f.write(self.research_data['final_report'])
-        
-        # Save summary JSON
-        import json
-        filename3 = self.config.OUTPUT_DIR / f"summary_{timestamp}.json"
-        summary = {
-            'topic': self.research_data['initial_query'],
-            'iterations': len(self.research_data['responses']),
-            'quality_history': [
-                {
-                    'iteration': e['iteration'],
-                    'quality': e['quality_score']
-                } for e in self.prompt_engine.iteration_history
-            ],
-            'timestamp': datetime.now().isoformat()
-        }
-        with open(filename3, "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2)
+        """
+        Queue the exports of this run (TXT/MD/JSON/HTML, search index, metrics,
+        dashboard) on the output writer. With Config.BACKGROUND_WRITES the call
+        returns straight away; call self.writer.flush() before exiting.
+        """
+        self.writer.submit(self._write_results, self.run_id)
+        if self.config.BACKGROUND_WRITES:
+            console.print("[dim]Writing results in the background...[/dim]")
+        else:
+            self.writer.flush()
+
+    def _write_results(self, run_id):
+        """Export one stored run and refresh the dashboard (runs on the output writer thread)"""
+        files = export_run(self.store, run_id, self.config.OUTPUT_DIR, kinds=("txt", "md", "json"))
+        SearchIndex(self.store).index_run(run_id)
+        try:
+            export_metrics(self.store, self.config.OUTPUT_DIR)
+        except Exception as e:
+            console.print(f"[yellow]Metrics export skipped: {e}[/yellow]")
         
         # Generate Modern HTML Report
-        filename4 = self.config.OUTPUT_DIR / f"report_{timestamp}.html"
         try:
-            HTMLGenerator.generate({
-                'initial_query': self.research_data['initial_query'],
-                'responses': self.research_data['responses'],
-                'research_prompts': self.research_data['research_prompts'],
-                'final_report': self.research_data['final_report']
-            }, filename4)
-            
-            console.print(f"[green]✓ Modern dynamic report saved to:[/green] {filename4}")
+            if self.config.VENDOR_ASSETS:
+                AssetBundle(self.config.OUTPUT_DIR).vendor_all()
+            files.update(export_run(self.store, run_id, self.config.OUTPUT_DIR, kinds=("html",)))
+            console.print(f"[green]✓ Modern dynamic report saved to:[/green] {files['html']}")
             
             # Update Master Dashboard
             DashboardGenerator.generate()
             console.print("[green]✓ Master dashboard updated:[/green] dashboard.html")
             
-            # Auto-open the report
-            console.print("[cyan]🌐 Opening modern report in your browser...[/cyan]")
-            webbrowser.open(f"file:///{filename4.absolute()}")
+            # Auto-open the report (a live report has already received the synthesis)
+            if not self.config.LIVE_REPORTS:
+                console.print("[cyan]🌐 Opening modern report in your browser...[/cyan]")
+                webbrowser.open(f"file:///{files['html'].absolute()}")
         except Exception as e:
             console.print(f"[red]Failed to generate modern report: {e}[/red]")
         
-        console.print(f"\n[green]✓ Research data saved to:[/green] {filename1}")
-        console.print(f"[green]✓ Final report saved to:[/green] {filename2}")
-        console.print(f"[green]✓ Summary saved to:[/green] {filename3}")
+        console.print(f"\n[green]✓ Research data saved to:[/green] {files['txt']}")
+        console.print(f"[green]✓ Final report saved to:[/green] {files['md']}")
+        console.print(f"[green]✓ Summary saved to:[/green] {files['json']}")
@@ -0,0 +1,234 @@
+import io
+import sys
+import json
+import time
+import zlib
+import hashlib
+import tarfile
+import argparse
+import itertools
+import contextlib
+from datetime import datetime
+from pathlib import Path
+from rich.console import Console
+from config import Config
+from run_store import RunStore, RUN_ID_RE
+from run_exports import export_run, export_path
+from html_generator import HTMLGenerator
+from search_index import SearchIndex
+from metrics_export import export_metrics
+from dashboard_generator import DashboardGenerator
+from output_writer import atomic_write
+
+console = Console()
+
+BUNDLE_VERSION = 1
+BUNDLE_INFO = "bundle.json"
+RUN_FILES = {"run.json", "report.html"}
+
+# Bundle layout (a gzipped tar stream, readable and writable without seeking):
+#   bundle.json                   {version, created_at, runs}
+#   runs/<run-id>/manifest.json   {run_id, updated_at, files: {name: {sha256, size}}}
+#   runs/<run-id>/run.json        RunStore.export_record(): prompts, responses, metrics, timestamps
+#   runs/<run-id>/report.html     the rendered report, standalone so it works on any machine
+# Each run's manifest precedes its files, so a reader verifies and imports
+# one run at a time while the stream is still arriving.
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _add(tar, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(data))
+
+
+def export_bundle(store, run_ids, fileobj, output_dir=None):
+    """Stream the given runs as a bundle to a binary file object. Returns the number of runs written."""
+    output_dir = Path(output_dir or Config.OUTPUT_DIR)
+    run_ids = [run_id for run_id in run_ids if store.has_run(run_id)]
+    with tarfile.open(fileobj=fileobj, mode="w|gz") as tar:
+        info = {'version': BUNDLE_VERSION, 'created_at': datetime.now().isoformat(), 'runs': run_ids}
+        _add(tar, BUNDLE_INFO, json.dumps(info).encode("utf-8"))
+        for run_id in run_ids:
+            record = store.export_record(run_id)
+            report = HTMLGenerator.render(
+                store.get_run(run_id), export_path(output_dir, "html", run_id),
+                standalone=True, payload="gzip", output_dir=output_dir
+            )
+            files = {
+                'run.json': json.dumps(record, separators=(',', ':')).encode("utf-8"),
+                'report.html': report.encode("utf-8"),
+            }
+            manifest = {
+                'run_id': run_id,
+                'updated_at': record['updated_at'],
+                'files': {name: {'sha256': _sha256(data), 'size': len(data)} for name, data in files.items()},
+            }
+            _add(tar, f"runs/{run_id}/manifest.json", json.dumps(manifest).encode("utf-8"))
+            for name, data in files.items():
+                _add(tar, f"runs/{run_id}/{name}", data)
+    return len(run_ids)
+
+
+def _local_id(store, record):
+    """
+    The local id for an incoming run. Ids are start timestamps, so another
+    machine may have used the same one for different research; that run
+    keeps its id and the incoming one becomes <run-id>-2 (or -3, ...).
+    """
+    identity = (record['topic'], record['started_at'])
+    for n in itertools.count(1):
+        run_id = record['run_id'] if n == 1 else f"{record['run_id']}-{n}"
+        local = store.get_identity(run_id)
+        if local is None or local == identity:
+            return run_id
+
+
+def _merge_run(store, record, report, output_dir, force):
+    """
+    Write one verified run into the local store and output tree.
+    Returns the local run id, or None if the local copy is as new or newer.
+    """
+    run_id = _local_id(store, record)
+    local = store.get_updated_at(run_id)
+    if local and local >= record['updated_at'] and not force:
+        return None
+    renamed = run_id != record['run_id']
+    if renamed:
+        console.print(f"[yellow]CONFLICT:[/yellow] {record['run_id']} is a different run here; importing as {run_id}")
+    store.restore_record(dict(record, run_id=run_id))
+    # The bundled report shows the original id, so a renamed run gets its own
+    export_run(store, run_id, output_dir, kinds=("txt", "md", "json", "html") if renamed else ("txt", "md", "json"))
+    if not renamed:
+        html_path = export_path(output_dir, "html", run_id)
+        atomic_write(html_path, report)
+        store.record_file(run_id, "html", html_path)
+    SearchIndex(store).index_run(run_id)
+    return run_id
+
+
+def import_bundle(store, fileobj, output_dir=None, force=False):
+    """
+    Read a bundle stream, verifying every file against its run's manifest,
+    and merge each run as soon as it is complete. Runs whose local copy is
+    as new or newer are skipped unless force; runs whose id is taken by
+    different local research are imported under a new id (conflicts).
+    Members outside the bundle layout are counted as ignored. The search
+    index, metrics export and dashboard are updated for the imported runs only.
+    Returns {'imported', 'skipped', 'conflicts', 'failed', 'ignored'}.
+    """
+    output_dir = Path(output_dir or Config.OUTPUT_DIR)
+    counts = {'imported': 0, 'skipped': 0, 'conflicts': 0, 'failed': 0, 'ignored': 0}
+    manifest, files, bad = None, {}, None
+
+    def fail(run_id, reason):
+        nonlocal manifest, bad
+        console.print(f"[red]FAIL:[/red] {run_id}: {reason}")
+        counts['failed'] += 1
+        manifest, bad = None, run_id
+
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                data = tar.extractfile(member).read()
+                if member.name == BUNDLE_INFO:
+                    version = json.loads(data).get('version')
+                    if version != BUNDLE_VERSION:
+                        raise ValueError(f"Unsupported bundle version {version}")
+                    continue
+                parts = member.name.split("/")
+                if len(parts) != 3 or parts[0] != "runs" or not RUN_ID_RE.match(parts[1]):
+                    console.print(f"[yellow]IGNORED:[/yellow] {member.name} (not a run file)")
+                    counts['ignored'] += 1
+                    continue
+                # The run id becomes an output path, so the manifest and record must repeat the checked one
+                run_id, name = parts[1], parts[2]
+                if name == "manifest.json":
+                    if manifest is not None:
+                        fail(manifest['run_id'], "files missing from the bundle")
+                    manifest, files, bad = json.loads(data), {}, None
+                    if (not isinstance(manifest, dict) or manifest.get('run_id') != run_id
+                            or not isinstance(manifest.get('files'), dict) or set(manifest['files']) != RUN_FILES):
+                        fail(run_id, "invalid manifest")
+                    continue
+                if run_id == bad:
+                    continue
+                expected = manifest['files'].get(name) if manifest and manifest['run_id'] == run_id else None
+                if expected is None:
+                    fail(run_id, f"{name} is not in its manifest")
+                    continue
+                if len(data) != expected.get('size') or _sha256(data) != expected.get('sha256'):
+                    fail(run_id, f"checksum mismatch in {name}")
+                    continue
+                files[name] = data
+                if set(files) == RUN_FILES:
+                    record = json.loads(files['run.json'])
+                    if not isinstance(record, dict) or record.get('run_id') != run_id:
+                        fail(run_id, "run.json belongs to a different run")
+                        continue
+                    try:
+                        local_id = _merge_run(store, record, files['report.html'].decode("utf-8"), output_dir, force)
+                    except Exception as e:
+                        fail(run_id, f"could not import ({e})")
+                        continue
+                    counts['imported' if local_id else 'skipped'] += 1
+                    counts['conflicts'] += bool(local_id) and local_id != run_id
+                    console.print(f"[green]{'IMPORTED' if local_id else 'UNCHANGED'}:[/green] {local_id or run_id} {record['topic']}")
+                    manifest = None
+            if manifest is not None:
+                fail(manifest['run_id'], "files missing from the bundle")
+    except (tarfile.TarError, EOFError, zlib.error, ValueError) as e:
+        console.print(f"[red]Bundle is truncated or corrupt ({e}); runs read before this point were kept.[/red]")
+
+    if counts['imported']:
+        store.collect_garbage()  # Text the replaced local copies no longer use
+        try:
+            export_metrics(store, output_dir)
+        except Exception as e:
+            console.print(f"[yellow]Metrics export skipped: {e}[/yellow]")
+        DashboardGenerator.generate(output_dir)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move runs between machines as verified bundles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Write runs to a bundle")
+    export.add_argument("run_ids", nargs="*", help="Runs to export (default: all)")
+    export.add_argument("--since", help="Only runs started on or after this date (YYYY-MM-DD)")
+    export.add_argument("-o", "--output", help="Bundle file, or - for stdout (default: bundle_<timestamp>.tar.gz)")
+    imp = sub.add_parser("import", help="Merge a bundle into this machine's runs")
+    imp.add_argument("bundle", help="Bundle file, or - for stdin")
+    imp.add_argument("--force", action="store_true", help="Replace local runs even if they are newer")
+    parser.add_argument("--output-dir", default=str(Config.OUTPUT_DIR))
+    args = parser.parse_args()
+
+    store = RunStore(Path(args.output_dir) / "runs.db")
+    # Progress goes to stderr when the bundle itself is streamed over stdout/stdin
+    streaming = (getattr(args, "output", None) or getattr(args, "bundle", None)) == "-"
+    with contextlib.redirect_stdout(sys.stderr) if streaming else contextlib.nullcontext():
+        if args.command == "export":
+            run_ids = args.run_ids or [
+                run['run_id'] for run in store.list_runs()
+                if not args.since or run['started_at'] >= args.since
+            ]
+            target = args.output or f"bundle_{datetime.now():%Y%m%d_%H%M%S}.tar.gz"
+            with (contextlib.nullcontext(sys.__stdout__.buffer) if target == "-" else open(target, "wb")) as f:
+                count = export_bundle(store, run_ids, f, args.output_dir)
+            console.print(f"[bold green]Bundled {count} runs[/bold green] -> {target}")
+        else:
+            with (contextlib.nullcontext(sys.stdin.buffer) if args.bundle == "-" else open(args.bundle, "rb")) as f:
+                counts = import_bundle(store, f, args.output_dir, force=args.force)
+            console.print(f"[bold green]Imported {counts['imported']} runs[/bold green] "
+                          f"({counts['conflicts']} under a new id), {counts['skipped']} unchanged, "
+                          f"{counts['failed']} failed, {counts['ignored']} files ignored")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from html_generator import HTMLGenerator
+from output_writer import atomic_write
+
+# Export kind -> file name pattern (run ids are start timestamps)
+EXPORT_NAMES = {
+    'txt': "research_data_{run_id}.txt",
+    'md': "final_report_{run_id}.md",
+    'json': "summary_{run_id}.json",
+    'html': "report_{run_id}.html",
+}
+
+
+def _display_date(run):
+    stamp = run.get('finished_at') or run.get('started_at')
+    try:
+        return datetime.fromisoformat(stamp).strftime('%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def render_txt(run):
+    """The research_data_*.txt log format"""
+    lines = [
+        "=" * 80 + "\n",
+        "DEEPSEEK RESEARCH REPORT\n",
+        f"Topic: {run['initial_query']}\n",
+        f"Date: {_display_date(run)}\n",
+        f"Iterations: {len(run['responses'])}\n",
+        "=" * 80 + "\n\n",
+    ]
+    for i, response in enumerate(run['responses']):
+        lines.append(f"\n{'='*40}\n")
+        lines.append(f"ITERATION {i+1}\n")
+        lines.append(f"{'='*40}\n\n")
+        if i < len(run['research_prompts']):
+            lines.append(f"RESEARCH PROMPT:\n{run['research_prompts'][i]}\n\n")
+        lines.append(f"FINDINGS:\n{response}\n")
+        lines.append("\n" + "-" * 40 + "\n")
+
+    lines.append(f"\n{'='*40}\n")
+    lines.append("FINAL SYNTHESIS REPORT\n")
+    lines.append(f"{'='*40}\n\n")
+    lines.append(run['final_report'])
+    return "".join(lines)
+
+
+def render_markdown(run):
+    """The final_report_*.md format"""
+    return (
+        f"# Research Report: {run['initial_query']}\n\n"
+        f"*Generated: {_display_date(run)}*\n\n"
+        f"{run['final_report']}"
+    )
+
+
+def render_summary(run):
+    """The summary_*.json format"""
+    return json.dumps({
+        'topic': run['initial_query'],
+        'iterations': len(run['responses']),
+        'quality_history': run['quality_history'],
+        'timestamp': run.get('finished_at') or run.get('started_at'),
+    }, indent=2)
+
+
+def run_dir(output_dir, run_id):
+    """
+    research_output/YYYY/MM/<run-id>/: one directory per run, sharded by
+    start month so no directory grows with the size of the archive
+    """
+    if len(run_id) >= 6 and run_id[:6].isdigit():
+        return Path(output_dir) / run_id[:4] / run_id[4:6] / run_id
+    return Path(output_dir) / "other" / run_id
+
+
+def export_path(output_dir, kind, run_id):
+    return run_dir(output_dir, run_id) / EXPORT_NAMES[kind].format(run_id=run_id)
+
+
+def export_run(store, run_id, output_dir, kinds=("txt", "md", "json", "html"), standalone=None, payload=None):
+    """
+    Write the derived files for a stored run and record them in the store.
+    standalone inlines the HTML report's assets (default: Config.STANDALONE_REPORTS);
+    payload picks how its data is embedded (default: Config.REPORT_PAYLOAD).
+    Returns {kind: path}.
+    """
+    run = store.get_run(run_id)
+    renderers = {'txt': render_txt, 'md': render_markdown, 'json': render_summary}
+    written = {}
+    for kind in kinds:
+        path = export_path(output_dir, kind, run_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if kind == 'html':
+            HTMLGenerator.generate(run, path, standalone=standalone, payload=payload, output_dir=output_dir)
+        else:
+            atomic_write(path, renderers[kind](run))
+        store.record_file(run_id, kind, path)
+        written[kind] = path
+    return written
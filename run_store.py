@@ -0,0 +1,453 @@
+import re
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from config import Config
+from log_parser import parse_txt_to_data
+from blob_store import BlobStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    updated_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    iterations INTEGER NOT NULL DEFAULT 0,
+    avg_quality REAL,
+    final_report_hash TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS iterations (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    iteration INTEGER NOT NULL,
+    research_prompt_hash TEXT NOT NULL DEFAULT '',
+    refinement_prompt_hash TEXT NOT NULL DEFAULT '',
+    response_hash TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, iteration)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    iteration INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, iteration, name)
+);
+CREATE TABLE IF NOT EXISTS files (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (run_id, kind)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_updated ON runs(updated_at);
+CREATE INDEX IF NOT EXISTS idx_metrics_name ON metrics(name);
+"""
+
+# Text columns kept in the blob store: table -> columns (each stored as <column>_hash)
+BLOB_COLUMNS = {
+    'iterations': ("research_prompt", "refinement_prompt", "response"),
+    'runs': ("final_report",),
+}
+
+
+# new_run_id() timestamps, and the suffixes of legacy research_data_*.txt logs.
+# Run ids end up in file names and URLs, so they never contain dots or slashes.
+RUN_ID_PATTERN = r"[A-Za-z0-9_][A-Za-z0-9_-]*"
+RUN_ID_RE = re.compile(rf"^{RUN_ID_PATTERN}$")
+
+
+def new_run_id():
+    """Run ids are start timestamps, matching the legacy file names"""
+    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+class RunStore:
+    """
+    Indexed SQLite store for research runs (WAL mode).
+    Runs, iterations and per-iteration metrics are written as the research
+    progresses; TXT/MD/JSON/HTML files are exports derived from it.
+    Prompts, responses and final reports live in the content-addressed
+    blob store, so identical text is stored once and compressed.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else Config.OUTPUT_DIR / "runs.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One shared connection; writes may come from background threads
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self.blobs = BlobStore(self.conn)
+        self._migrate_inline_text()
+
+    def _migrate_inline_text(self):
+        """Move text that older stores kept inline into the blob store (once, then VACUUM)"""
+        with self._lock:
+            pending = [
+                (table, columns) for table, columns in BLOB_COLUMNS.items()
+                if columns[0] in {r['name'] for r in self.conn.execute(f"PRAGMA table_info({table})")}
+            ]
+            if not pending:
+                return
+            with self.conn:
+                for table, columns in pending:
+                    for column in columns:
+                        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}_hash TEXT NOT NULL DEFAULT ''")
+                    rowids = [r[0] for r in self.conn.execute(f"SELECT rowid FROM {table}")]
+                    for rowid in rowids:
+                        row = self.conn.execute(
+                            f"SELECT {', '.join(columns)} FROM {table} WHERE rowid = ?", (rowid,)
+                        ).fetchone()
+                        self.conn.execute(
+                            f"UPDATE {table} SET {', '.join(f'{c}_hash = ?' for c in columns)}, "
+                            + ", ".join(c + " = ''" for c in columns) + " WHERE rowid = ?",
+                            [self.blobs.put(row[c] or "") for c in columns] + [rowid]
+                        )
+                    for column in columns:
+                        try:
+                            self.conn.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+                        except sqlite3.OperationalError:
+                            pass  # SQLite < 3.35: the emptied column stays behind
+            self.conn.execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _now(self):
+        # Microseconds so that updates within the same second still order correctly
+        return datetime.now().isoformat()
+
+    # --- Writes ---
+
+    def start_run(self, run_id, topic, started_at=None):
+        with self._lock, self.conn:
+            now = self._now()
+            self.conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, topic, started_at, updated_at) VALUES (?, ?, ?, ?)",
+                (run_id, topic, started_at or now, now)
+            )
+        return run_id
+
+    def add_iteration(self, run_id, iteration, research_prompt, response, refinement_prompt="", metrics=None):
+        """Record one completed iteration and its metrics (e.g. {'quality': 0.8})"""
+        with self._lock, self.conn:
+            now = self._now()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO iterations (run_id, iteration, research_prompt_hash, refinement_prompt_hash, "
+                "response_hash, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, iteration, self.blobs.put(research_prompt), self.blobs.put(refinement_prompt),
+                 self.blobs.put(response), now)
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO metrics (run_id, iteration, name, value) VALUES (?, ?, ?, ?)",
+                [(run_id, iteration, name, value) for name, value in (metrics or {}).items()]
+            )
+            self._refresh_run(run_id, now)
+
+    def _refresh_run(self, run_id, now):
+        self.conn.execute(
+            """UPDATE runs SET
+                   iterations = (SELECT COUNT(*) FROM iterations WHERE run_id = :id),
+                   avg_quality = (SELECT AVG(value) FROM metrics WHERE run_id = :id AND name = 'quality'),
+                   updated_at = :now
+               WHERE run_id = :id""",
+            {'id': run_id, 'now': now}
+        )
+
+    def finish_run(self, run_id, final_report, finished_at=None):
+        with self._lock, self.conn:
+            now = self._now()
+            self.conn.execute(
+                "UPDATE runs SET final_report_hash = ?, finished_at = ?, status = 'complete', updated_at = ? WHERE run_id = ?",
+                (self.blobs.put(final_report), finished_at or now, now, run_id)
+            )
+
+    def record_file(self, run_id, kind, path):
+        """Remember where an export (txt, md, json, html) of a run was written"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (run_id, kind, path) VALUES (?, ?, ?)",
+                (run_id, kind, str(path))
+            )
+
+    def import_run(self, run_id, data, started_at=None, finished_at=None):
+        """Insert or replace a whole run from research_data-shaped dict (legacy logs)"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM iterations WHERE run_id = ?", (run_id,))
+            self.conn.execute("DELETE FROM metrics WHERE run_id = ?", (run_id,))
+            self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+        self.start_run(run_id, data['initial_query'], started_at)
+        prompts = data.get('research_prompts', [])
+        quality = {q['iteration']: q['quality'] for q in data.get('quality_history', [])}
+        for i, response in enumerate(data['responses'], 1):
+            metrics = {'response_length': len(response)}
+            if i in quality:
+                metrics['quality'] = quality[i]
+            self.add_iteration(run_id, i, prompts[i - 1] if i <= len(prompts) else "", response, metrics=metrics)
+        self.finish_run(run_id, data.get('final_report', ''), finished_at)
+
+    def restore_record(self, record):
+        """
+        Write a run exactly as export_record() produced it (timestamps,
+        refinement prompts and every metric included), replacing any local copy.
+        """
+        run_id = record['run_id']
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM iterations WHERE run_id = ?", (run_id,))
+            self.conn.execute("DELETE FROM metrics WHERE run_id = ?", (run_id,))
+            self.conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self.conn.execute(
+                "INSERT INTO runs (run_id, topic, started_at, finished_at, updated_at, status, final_report_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, record['topic'], record['started_at'], record['finished_at'], record['updated_at'],
+                 record['status'], self.blobs.put(record['final_report']))
+            )
+            for it in record['iterations']:
+                self.conn.execute(
+                    "INSERT INTO iterations (run_id, iteration, research_prompt_hash, refinement_prompt_hash, "
+                    "response_hash, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, it['iteration'], self.blobs.put(it['research_prompt']),
+                     self.blobs.put(it['refinement_prompt']), self.blobs.put(it['response']), it['created_at'])
+                )
+                self.conn.executemany(
+                    "INSERT INTO metrics (run_id, iteration, name, value) VALUES (?, ?, ?, ?)",
+                    [(run_id, it['iteration'], name, value) for name, value in it['metrics'].items()]
+                )
+            # Counts and averages are derived; keep the bundle's updated_at
+            self._refresh_run(run_id, record['updated_at'])
+
+    # --- Queries ---
+
+    def has_run(self, run_id):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def count_runs(self, search=None):
+        sql, params = "SELECT COUNT(*) FROM runs", []
+        if search:
+            sql += " WHERE topic LIKE ?"
+            params.append(f"%{search}%")
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def change_marker(self):
+        """(run count, latest update): changes whenever any run is added, updated or removed"""
+        with self._lock:
+            return tuple(self.conn.execute("SELECT COUNT(*), MAX(updated_at) FROM runs").fetchone())
+
+    def get_updated_at(self, run_id):
+        with self._lock:
+            row = self.conn.execute("SELECT updated_at FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            return row[0] if row else None
+
+    def get_identity(self, run_id):
+        """(topic, started_at) of a run, or None; tells apart runs that got the same id on different machines"""
+        with self._lock:
+            row = self.conn.execute("SELECT topic, started_at FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            return tuple(row) if row else None
+
+    def list_runs(self, limit=None, offset=0, search=None):
+        """Run summaries, newest first, optionally filtered by topic substring"""
+        sql = ("SELECT run_id, topic, started_at, finished_at, updated_at, status, iterations, avg_quality "
+               "FROM runs")
+        params = []
+        if search:
+            sql += " WHERE topic LIKE ?"
+            params.append(f"%{search}%")
+        sql += " ORDER BY started_at DESC, run_id DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self._lock:
+            return [dict(r) for r in self.conn.execute(sql, params)]
+
+    def list_exported(self, kind="html"):
+        """Runs that have an export of the given kind, newest first, with its path"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT r.run_id, r.topic, r.started_at, r.finished_at, r.updated_at, r.iterations, "
+                "r.avg_quality, f.path FROM runs r JOIN files f ON f.run_id = r.run_id AND f.kind = ? "
+                "ORDER BY r.started_at DESC, r.run_id DESC",
+                (kind,)
+            )
+            return [dict(r) for r in rows]
+
+    def get_files(self, run_id):
+        with self._lock:
+            rows = self.conn.execute("SELECT kind, path FROM files WHERE run_id = ?", (run_id,))
+            return {r['kind']: Path(r['path']) for r in rows}
+
+    def get_metrics(self, run_id):
+        """{iteration: {name: value}}"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT iteration, name, value FROM metrics WHERE run_id = ? ORDER BY iteration", (run_id,)
+            )
+            metrics = {}
+            for r in rows:
+                metrics.setdefault(r['iteration'], {})[r['name']] = r['value']
+            return metrics
+
+    def iteration_metrics(self, run_ids):
+        """
+        One dict per iteration of the given runs: run_id, topic, started_at,
+        iteration, created_at, stored prompt/response sizes and every metric
+        recorded for it (by name), ordered by run and iteration.
+        """
+        rows = {}
+        with self._lock:
+            for start in range(0, len(run_ids), 500):
+                chunk = list(run_ids[start:start + 500])
+                marks = ",".join("?" * len(chunk))
+                for r in self.conn.execute(
+                    "SELECT i.run_id, r.topic, r.started_at, i.iteration, i.created_at, "
+                    "COALESCE(p.size, 0) AS prompt_bytes, COALESCE(b.size, 0) AS response_bytes "
+                    "FROM iterations i JOIN runs r ON r.run_id = i.run_id "
+                    "LEFT JOIN blobs p ON p.hash = i.research_prompt_hash "
+                    "LEFT JOIN blobs b ON b.hash = i.response_hash "
+                    f"WHERE i.run_id IN ({marks})", chunk
+                ):
+                    rows[(r['run_id'], r['iteration'])] = dict(r)
+                for m in self.conn.execute(
+                    f"SELECT run_id, iteration, name, value FROM metrics WHERE run_id IN ({marks})", chunk
+                ):
+                    row = rows.get((m['run_id'], m['iteration']))
+                    if row is not None:
+                        row[m['name']] = m['value']
+        return [rows[key] for key in sorted(rows)]
+
+    def get_run(self, run_id):
+        """Full run in the research_data shape HTMLGenerator expects, or None"""
+        with self._lock:
+            run = self.conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if not run:
+                return None
+            iterations = self.conn.execute(
+                "SELECT * FROM iterations WHERE run_id = ? ORDER BY iteration", (run_id,)
+            ).fetchall()
+            text = self.blobs.get_many(
+                [run['final_report_hash']]
+                + [it[f"{c}_hash"] for it in iterations for c in BLOB_COLUMNS['iterations']]
+            )
+        metrics = self.get_metrics(run_id)
+        return {
+            'run_id': run_id,
+            'initial_query': run['topic'],
+            'started_at': run['started_at'],
+            'finished_at': run['finished_at'],
+            'status': run['status'],
+            'responses': [text[it['response_hash']] for it in iterations],
+            'research_prompts': [text[it['research_prompt_hash']] for it in iterations],
+            'refinement_prompts': [text[it['refinement_prompt_hash']] for it in iterations],
+            'quality_history': [
+                {'iteration': it['iteration'], 'quality': metrics[it['iteration']]['quality']}
+                for it in iterations if 'quality' in metrics.get(it['iteration'], {})
+            ],
+            'final_report': text[run['final_report_hash']],
+        }
+
+    def export_record(self, run_id):
+        """Everything stored for a run as plain JSON-able data (see restore_record), or None"""
+        with self._lock:
+            run = self.conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if not run:
+                return None
+            iterations = self.conn.execute(
+                "SELECT * FROM iterations WHERE run_id = ? ORDER BY iteration", (run_id,)
+            ).fetchall()
+            text = self.blobs.get_many(
+                [run['final_report_hash']]
+                + [it[f"{c}_hash"] for it in iterations for c in BLOB_COLUMNS['iterations']]
+            )
+        metrics = self.get_metrics(run_id)
+        return {
+            'run_id': run_id,
+            'topic': run['topic'],
+            'started_at': run['started_at'],
+            'finished_at': run['finished_at'],
+            'updated_at': run['updated_at'],
+            'status': run['status'],
+            'final_report': text[run['final_report_hash']],
+            'iterations': [
+                {
+                    'iteration': it['iteration'],
+                    'created_at': it['created_at'],
+                    **{c: text[it[f"{c}_hash"]] for c in BLOB_COLUMNS['iterations']},
+                    'metrics': metrics.get(it['iteration'], {}),
+                }
+                for it in iterations
+            ],
+        }
+
+    def collect_garbage(self):
+        """Drop blobs no run references any more (after runs are replaced or deleted). Returns the count."""
+        referenced = " UNION ".join(
+            f"SELECT {c}_hash FROM {table}" for table, columns in BLOB_COLUMNS.items() for c in columns
+        )
+        with self._lock, self.conn:
+            if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_refs'").fetchone():
+                # The search index reads its documents from the blobs too
+                referenced += " UNION SELECT content_hash FROM search_refs"
+            return self.blobs.collect_garbage(referenced)
+
+    # --- Legacy archive ---
+
+    def import_legacy(self, output_dir=None, force=False):
+        """
+        Import research_data_*.txt logs that are not in the store yet (archives
+        from before the store existed, or logs copied in since). The output
+        directory is only scanned when its mtime differs from the last scan
+        (recorded in the meta table), so read paths cost one stat. Known runs
+        are skipped without opening their files. Returns the number imported.
+        """
+        output_dir = Path(output_dir or Config.OUTPUT_DIR)
+        if not output_dir.is_dir():
+            return 0
+        scan = f"{output_dir.resolve()}:{output_dir.stat().st_mtime_ns}"
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'legacy_scan'").fetchone()
+            if row and row[0] == scan and not force:
+                return 0
+            known = {r[0] for r in self.conn.execute("SELECT run_id FROM runs")}
+        imported = 0
+        for txt_path in sorted(output_dir.glob("research_data_*.txt")):
+            run_id = txt_path.stem.replace("research_data_", "")
+            if run_id in known or not RUN_ID_RE.match(run_id):
+                continue
+            data = parse_txt_to_data(txt_path)
+
+            try:
+                started_at = datetime.strptime(run_id, "%Y%m%d_%H%M%S").isoformat()
+            except ValueError:
+                # Renamed or hand-made log: its suffix is not a timestamp
+                started_at = datetime.fromtimestamp(txt_path.stat().st_mtime).isoformat()
+            summary_path = output_dir / f"summary_{run_id}.json"
+            if summary_path.exists():
+                with open(summary_path, "r", encoding="utf-8") as f:
+                    summary = json.load(f)
+                if summary.get('quality_history'):
+                    data['quality_history'] = summary['quality_history']
+                started_at = summary.get('timestamp', started_at)
+
+            self.import_run(run_id, data, started_at=started_at, finished_at=started_at)
+            for kind, name in [("txt", txt_path.name), ("md", f"final_report_{run_id}.md"),
+                               ("json", summary_path.name), ("html", f"report_{run_id}.html")]:
+                if (output_dir / name).exists():
+                    self.record_file(run_id, kind, output_dir / name)
+            imported += 1
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_scan', ?)", (scan,))
+        return imported
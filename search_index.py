@@ -0,0 +1,260 @@
+import math
+import sqlite3
+import argparse
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+from rich.markup import escape
+from run_store import RunStore
+from summarizer import content_words
+
+console = Console()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_refs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    iteration INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_refs_run ON search_refs (run_id);
+CREATE VIEW IF NOT EXISTS search_content AS
+    SELECT id, run_id, iteration, kind, blob_text(content_hash) AS content FROM search_refs;
+CREATE VIRTUAL TABLE IF NOT EXISTS search_docs USING fts5(
+    run_id UNINDEXED,
+    iteration UNINDEXED,
+    kind UNINDEXED,
+    content,
+    content = 'search_content',
+    content_rowid = 'id',
+    tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS search_state (
+    run_id TEXT PRIMARY KEY,
+    indexed_at TEXT NOT NULL
+);
+"""
+
+# Removes the index entries of the selected search_refs rows; FTS5 needs the
+# original text to find them, which search_content still reads from the blobs
+_DELETE_DOCS = """INSERT INTO search_docs (search_docs, rowid, run_id, iteration, kind, content)
+                  SELECT 'delete', id, run_id, iteration, kind, content FROM search_content WHERE {where}"""
+
+# Markers placed around matches by snippet(), swapped for rich styles on output
+_HIT_START, _HIT_END = "\x02", "\x03"
+
+
+class SearchIndex:
+    """
+    Incremental SQLite FTS5 index over topics, research prompts, responses
+    and final reports. Lives in the run store database; only runs updated
+    since they were last indexed are (re)indexed. The index is external
+    content: documents are blob hashes in search_refs, so no text is stored
+    twice. Searching therefore needs a RunStore connection, which provides
+    blob_text() (see BlobStore).
+    """
+
+    def __init__(self, store):
+        self.store = store
+        with store._lock:
+            old = store.conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'search_docs'"
+            ).fetchone()
+            if old and "content_rowid" not in old[0]:
+                # Earlier index kept its own copy of every text; drop it and re-index from the blobs
+                with store.conn:
+                    store.conn.execute("DROP TABLE search_docs")
+                    store.conn.execute("DROP TABLE IF EXISTS search_state")
+                store.conn.execute("VACUUM")
+            store.conn.executescript(SCHEMA)
+
+    def _documents(self, run):
+        yield 0, "topic", run['initial_query']
+        for i, (prompt, response) in enumerate(zip(run['research_prompts'], run['responses']), 1):
+            if prompt:
+                yield i, "prompt", prompt
+            if response:
+                yield i, "response", response
+        if run['final_report']:
+            yield 0, "report", run['final_report']
+
+    def index_run(self, run_id):
+        run = self.store.get_run(run_id)
+        if not run:
+            return
+        conn = self.store.conn
+        with self.store._lock, conn:
+            conn.execute(_DELETE_DOCS.format(where="run_id = ?"), (run_id,))
+            conn.execute("DELETE FROM search_refs WHERE run_id = ?", (run_id,))
+            for i, kind, text in self._documents(run):
+                ref = conn.execute(
+                    "INSERT INTO search_refs (run_id, iteration, kind, content_hash) VALUES (?, ?, ?, ?)",
+                    (run_id, i, kind, self.store.blobs.put(text))
+                ).lastrowid
+                conn.execute(
+                    "INSERT INTO search_docs (rowid, run_id, iteration, kind, content) VALUES (?, ?, ?, ?, ?)",
+                    (ref, run_id, i, kind, text)
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO search_state (run_id, indexed_at) "
+                "SELECT run_id, updated_at FROM runs WHERE run_id = ?",
+                (run_id,)
+            )
+
+    def update(self):
+        """Index new or changed runs and drop deleted ones. Returns the number indexed."""
+        with self.store._lock:
+            stale = [r[0] for r in self.store.conn.execute(
+                "SELECT r.run_id FROM runs r LEFT JOIN search_state s ON s.run_id = r.run_id "
+                "WHERE s.run_id IS NULL OR s.indexed_at < r.updated_at"
+            )]
+            with self.store.conn:
+                gone = "run_id NOT IN (SELECT run_id FROM runs)"
+                self.store.conn.execute(_DELETE_DOCS.format(where=gone))
+                self.store.conn.execute(f"DELETE FROM search_refs WHERE {gone}")
+                self.store.conn.execute(
+                    "DELETE FROM search_state WHERE run_id NOT IN (SELECT run_id FROM runs)"
+                )
+        for run_id in stale:
+            self.index_run(run_id)
+        return len(stale)
+
+    def rebuild(self):
+        with self.store._lock, self.store.conn:
+            self.store.conn.execute("INSERT INTO search_docs (search_docs) VALUES ('delete-all')")
+            self.store.conn.execute("DELETE FROM search_refs")
+            self.store.conn.execute("DELETE FROM search_state")
+        return self.update()
+
+    @staticmethod
+    def to_match(query):
+        """Quote each term so user input can't break FTS5 syntax; a trailing * keeps prefix search"""
+        terms = []
+        for term in query.split():
+            prefix = term.endswith("*")
+            term = term.rstrip("*").replace('"', '""')
+            if term:
+                terms.append(f'"{term}"' + ("*" if prefix else ""))
+        return " ".join(terms)
+
+    def search(self, query, limit=10, raw=False):
+        """Best BM25 matches: [{run_id, topic, iteration, kind, snippet, score}]"""
+        match = query if raw else self.to_match(query)
+        if not match:
+            return []
+        with self.store._lock:
+            rows = self.store.conn.execute(
+                f"""SELECT d.run_id, d.iteration, d.kind, r.topic,
+                           snippet(search_docs, 3, '{_HIT_START}', '{_HIT_END}', '…', 16) AS snippet,
+                           bm25(search_docs) AS score
+                    FROM search_docs d JOIN runs r ON r.run_id = d.run_id
+                    WHERE search_docs MATCH ?
+                    ORDER BY score LIMIT ?""",
+                (match, limit)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def _report_idf(self, words):
+        """Smoothed inverse document frequency of each word across final reports"""
+        conn = self.store.conn
+        total = conn.execute("SELECT COUNT(*) FROM search_refs WHERE kind = 'report'").fetchone()[0]
+        idf = {}
+        for word in words:
+            df = conn.execute(
+                "SELECT COUNT(*) FROM search_docs WHERE search_docs MATCH ? AND kind = 'report'", (f'"{word}"',)
+            ).fetchone()[0]
+            idf[word] = math.log((total + 1) / (df + 0.5))
+        return idf
+
+    def similar_runs(self, topic, limit=3, exclude=None):
+        """
+        Completed runs closest to a topic: [{run_id, topic, similarity, score}].
+        Candidates are the best BM25 matches of the topic's words against
+        earlier topics and final reports. Similarity (0-1) is the cosine of
+        the two topics' word sets. When the topics share at least one word,
+        the earlier final report may raise it: the IDF-weighted share of the
+        topic's words the report contains (words common to most reports
+        count for little). Runs with no topic word in common never qualify
+        through their report alone.
+        """
+        words = sorted(set(content_words(topic)))
+        if not words:
+            return []
+        match = " OR ".join(f'"{w}"' for w in words)
+        with self.store._lock:
+            rows = self.store.conn.execute(
+                """SELECT d.run_id, r.topic, r.final_report_hash, bm25(search_docs) AS score
+                   FROM search_docs d JOIN runs r ON r.run_id = d.run_id
+                   WHERE search_docs MATCH ? AND d.kind IN ('topic', 'report')
+                     AND r.status = 'complete' AND d.run_id != ?
+                   ORDER BY score LIMIT ?""",
+                (match, exclude or "", limit * 20)
+            ).fetchall()
+            reports = self.store.blobs.get_many(r['final_report_hash'] for r in rows)
+            idf = self._report_idf(words)
+        results = {}
+        for r in rows:
+            if r['run_id'] in results:
+                continue  # Rows come best first; keep each run's best match
+            other = set(content_words(r['topic']))
+            shared = len(other.intersection(words))
+            similarity = shared / math.sqrt(len(words) * len(other)) if other else 0.0
+            if shared:
+                covered = set(content_words(reports.get(r['final_report_hash'], ""))).intersection(words)
+                similarity = max(similarity, sum(idf[w] for w in covered) / sum(idf.values()))
+            results[r['run_id']] = {'run_id': r['run_id'], 'topic': r['topic'], 'similarity': similarity, 'score': r['score']}
+        return sorted(results.values(), key=lambda r: (-r['similarity'], r['score']))[:limit]
+
+
+def highlight(snippet):
+    """Rich markup for a snippet with its match markers"""
+    text = escape(" ".join(snippet.split()))
+    return text.replace(_HIT_START, "[bold yellow]").replace(_HIT_END, "[/bold yellow]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over all research output")
+    parser.add_argument("query", nargs="?", help="Search terms (end a term with * for prefix search)")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum results")
+    parser.add_argument("--raw", action="store_true", help="Pass the query to FTS5 unchanged (AND/OR/NEAR)")
+    parser.add_argument("--rebuild", action="store_true", help="Re-index every run from scratch")
+    parser.add_argument("--output-dir", default="research_output")
+    args = parser.parse_args()
+
+    store = RunStore(Path(args.output_dir) / "runs.db")
+    store.import_legacy(args.output_dir)
+    index = SearchIndex(store)
+    indexed = index.rebuild() if args.rebuild else index.update()
+    if indexed:
+        console.print(f"[dim]Indexed {indexed} new or updated runs.[/dim]")
+
+    if not args.query:
+        store.close()
+        return
+
+    try:
+        results = index.search(args.query, limit=args.limit, raw=args.raw)
+    except sqlite3.OperationalError as e:
+        console.print(f"[red]Invalid search query: {escape(str(e))}[/red]")
+        store.close()
+        return
+    if not results:
+        console.print("[yellow]No matches.[/yellow]")
+        store.close()
+        return
+
+    table = Table(title=f"Results for '{escape(args.query)}'", show_header=True, header_style="bold magenta")
+    table.add_column("Run", style="dim")
+    table.add_column("Topic", style="green")
+    table.add_column("Where", style="cyan")
+    table.add_column("Snippet")
+    for r in results:
+        where = r['kind'] if not r['iteration'] else f"{r['kind']} #{r['iteration']}"
+        topic = r['topic'][:40] + "..." if len(r['topic']) > 40 else r['topic']
+        table.add_row(r['run_id'], escape(topic), where, highlight(r['snippet']))
+    console.print(table)
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from browser_controller import BrowserController
+
+console = Console()
+
+class SessionPool:
+    """
+    Extra DeepSeek browser sessions for researching several prompts at once.
+    Each session is its own browser window (and login); the main session
+    stays with the bot so its chat context is not disturbed.
+    """
+
+    def __init__(self, config, size):
+        self.config = config
+        self.size = size
+        self.sessions = []
+        self.executor = None
+
+    def start(self):
+        """Open and log in every extra session. Sessions that fail to start are skipped."""
+        for i in range(1, self.size + 1):
+            console.print(f"\n[bold]Starting parallel research session {i}/{self.size}...[/bold]")
+            session = BrowserController(self.config)
+            try:
+                session.start()
+                session.wait_for_login()
+                self.sessions.append(session)
+            except Exception as e:
+                console.print(f"[yellow]⚠️ Parallel session {i} unavailable: {e}[/yellow]")
+                session.close()
+
+        if self.sessions:
+            self.executor = ThreadPoolExecutor(max_workers=len(self.sessions))
+        console.print(f"[green]✓ {len(self.sessions)} parallel session(s) ready[/green]")
+        return len(self.sessions)
+
+    def _research(self, session, prompt):
+        # Every fan-out prompt is self-contained, so a fresh chat keeps context small
+        session.start_new_chat()
+        return session.send_message(prompt)
+
+    def submit(self, prompts):
+        """Send one prompt per session in the background. Returns futures in prompt order."""
+        if not self.executor:
+            return []
+        return [
+            self.executor.submit(self._research, session, prompt)
+            for session, prompt in zip(self.sessions, prompts)
+        ]
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        for session in self.sessions:
+            session.close()
+        self.sessions = []
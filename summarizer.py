@@ -0,0 +1,122 @@
+import re
+import math
+import hashlib
+from collections import Counter
+from token_budget import estimate_tokens, truncate_to_tokens
+
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])')
+MARKUP_RE = re.compile(r'^\s*(?:#{1,6}\s+|[-*•]\s+|\d+[.)]\s+|>\s*)')
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = set("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers herself him himself his how i if in into is it its itself just
+let me more most my myself no nor not now of off on once only or other our ours ourselves out over
+own same she should so some such than that the their theirs them themselves then there these they
+this those through to too under until up very was we were what when where which while who whom why
+will with would you your yours yourself yourselves may might must shall one two however
+""".split())
+
+
+def split_sentences(text):
+    """
+    Split a markdown response into sentences.
+    List items and headings count as their own sentences and code blocks are skipped.
+    """
+    sentences = []
+    in_code = False
+    for line in text.splitlines():
+        if line.strip().startswith("```"):
+            in_code = not in_code
+            continue
+        if in_code or not line.strip():
+            continue
+        line = MARKUP_RE.sub("", line).strip()
+        for sentence in SENTENCE_END_RE.split(line):
+            sentence = sentence.strip()
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def content_words(sentence):
+    """Lower-cased words of a sentence with stopwords removed"""
+    return [w for w in _WORD_RE.findall(sentence.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+class ExtractiveSummarizer:
+    """
+    Compresses a response to its most informative sentences within a token budget.
+    Sentences are scored with TF-IDF (each sentence treated as a document), so
+    generic intro sentences rank below ones carrying specific terms.
+    Rankings are cached per response, so repeated chat resets never rescore it.
+    """
+
+    def __init__(self, min_words=4):
+        self.min_words = min_words
+        self._rankings = {}
+
+    @staticmethod
+    def _key(text):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def rank(self, text):
+        """Returns [(score, position, sentence)] sorted best first, cached per text"""
+        key = self._key(text)
+        if key in self._rankings:
+            return self._rankings[key]
+
+        sentences = split_sentences(text)
+        tokenized = [content_words(s) for s in sentences]
+        doc_freq = Counter()
+        for words in tokenized:
+            doc_freq.update(set(words))
+
+        n = len(sentences)
+        ranked = []
+        for pos, (sentence, words) in enumerate(zip(sentences, tokenized)):
+            if len(words) < self.min_words:
+                continue
+            tf = Counter(words)
+            score = sum(
+                (count / len(words)) * math.log((1 + n) / (1 + doc_freq[w]))
+                for w, count in tf.items()
+            )
+            # Reward sentences that pack many distinct terms, without favouring run-ons
+            score *= math.sqrt(len(tf))
+            ranked.append((score, pos, sentence))
+
+        ranked.sort(key=lambda r: (-r[0], r[1]))
+        self._rankings[key] = ranked
+        return ranked
+
+    def compress(self, text, max_tokens):
+        """
+        Top-ranked sentences that fit in max_tokens, restored to original order.
+        Text with no rankable sentence (only headings and short bullets) is truncated instead.
+        """
+        if max_tokens <= 0 or not text:
+            return ""
+        if estimate_tokens(text) <= max_tokens:
+            return text
+
+        chosen = []
+        seen = set()
+        used = 0
+        for score, pos, sentence in self.rank(text):
+            cost = estimate_tokens(sentence) + 1
+            norm = " ".join(content_words(sentence))
+            if norm in seen or used + cost > max_tokens:
+                continue
+            seen.add(norm)
+            chosen.append((pos, sentence))
+            used += cost
+
+        if not chosen:
+            return truncate_to_tokens(text, max_tokens)
+        chosen.sort()
+        return " ".join(sentence for pos, sentence in chosen)
+
+    def clear(self):
+        self._rankings.clear()
@@ -1,6 +1,38 @@
+import io
+import os
+import tarfile
+import json
+import gzip
+import hashlib
+import base64
 import unittest
+import csv
+import sqlite3
+import threading
+import urllib.request
+import urllib.error
+import tempfile
+from pathlib import Path
 from config import Config
 from prompt_engine import PromptEngine
+from token_budget import TokenBudget, estimate_tokens, truncate_to_tokens
+from summarizer import ExtractiveSummarizer, split_sentences
+from text_dedup import dedup_responses, shingle_novelty
+from pipeline import SpeculativeRefiner
+from run_store import RunStore
+from run_exports import render_txt
+from batch_convert import batch_convert
+from log_parser import parse_txt_to_data, iter_iterations
+from search_index import SearchIndex
+from dashboard_generator import DashboardGenerator
+from markdown_renderer import MarkdownRenderer
+from html_generator import HTMLGenerator
+from asset_bundle import AssetBundle
+from report_server import ReportServer
+from metrics_export import export_metrics
+from output_writer import OutputWriter, atomic_write
+from migrate_layout import migrate_layout
+from run_bundle import export_bundle, import_bundle
 
 class TestCoreComponents(unittest.TestCase):
     def setUp(self):
@@ -24,6 +56,19 @@ class TestCoreComponents(unittest.TestCase):
         extracted = self.engine.extract_research_prompt(response)
         self.assertIn("very long prompt", extracted)
 
+    def test_multi_candidate_extraction(self):
+        """Test extracting several numbered prompts from one refinement"""
+        response = (
+            "GAP ANALYSIS: hardware is missing\n\n"
+            "**IMPROVED PROMPT 1:** Compare superconducting and trapped-ion qubit fidelities.\n\n"
+            "**IMPROVED PROMPT 2:** Survey error-correction overheads.\nInclude recent papers."
+        )
+        prompts = self.engine.extract_research_prompts(response, 3)
+        self.assertEqual(len(prompts), 2)
+        self.assertTrue(prompts[0].startswith("Compare superconducting"))
+        self.assertIn("Include recent papers.", prompts[1])
+        self.assertIn("IMPROVED PROMPT 3:", self.engine.create_refinement_prompt("qubits", candidates=3))
+
     def test_quality_evaluation_short(self):
         """Test quality evaluation for very short response"""
         score, should_continue, reason = self.engine.evaluate_response_quality("too short", "query")
@@ -31,6 +76,16 @@ class TestCoreComponents(unittest.TestCase):
         self.assertTrue(should_continue)
         self.assertEqual(reason, "Response too short")
 
+    def test_fanout_headers_do_not_count_as_structure(self):
+        """Test that merged angle headers add no structure, relevance or length to the quality score"""
+        texts = ["Plain findings about qubit fidelity and gate speed. " * 10,
+                 "Separate notes on cryogenic wiring limits and cooling power. " * 10]
+        merged, _, _ = self.engine.merge_candidates("trapped ions", ["Survey trapped ions", "Study wiring"], texts)
+        self.assertIn("## Angle 1", merged)
+        factors = self.engine.quality_factors(merged, "trapped ions")
+        self.assertEqual((factors['structure'], factors['relevance']), (0, 0))
+        self.assertAlmostEqual(factors['length'], self.engine.quality_factors("\n\n".join(texts), "trapped ions")['length'], places=2)
+
     def test_quality_evaluation_long(self):
         """Test quality evaluation for a more comprehensive response"""
         long_response = "Section 1: Introduction. Quantum computing is fascinating. " \
@@ -39,5 +94,747 @@ class TestCoreComponents(unittest.TestCase):
         score, should_continue, reason = self.engine.evaluate_response_quality(long_response, "Quantum computing")
         self.assertGreater(score, 0.5)
 
+class TestTokenBudget(unittest.TestCase):
+    def test_estimate_and_truncate(self):
+        """Test token estimation and truncation to a token limit"""
+        text = "Quantum computing uses qubits to represent information. " * 40
+        self.assertGreater(estimate_tokens(text), 200)
+        cut = truncate_to_tokens(text, 50)
+        self.assertLessEqual(estimate_tokens(cut), 50)
+        self.assertTrue(cut.endswith("..."))
+
+    def test_allocation_fits_and_favours_recent_novel_items(self):
+        """Test that allocation stays within budget and prefers new findings"""
+        repeated = "Qubits are the basic unit of quantum information. " * 30
+        novel = "Error correction codes like the surface code protect logical qubits. " * 30
+        budget = TokenBudget(1000)
+        alloc = budget.allocate([repeated, repeated, novel], 300)
+        self.assertLessEqual(sum(alloc), 300)
+        self.assertGreater(alloc[2], alloc[1])
+
+    def test_short_items_release_unused_budget(self):
+        """Test that short items keep their full text and free budget for others"""
+        budget = TokenBudget(1000)
+        fitted = budget.fit(["short note", "long finding " * 200], 200)
+        self.assertEqual(fitted[0], "short note")
+        self.assertGreater(estimate_tokens(fitted[1]), 150)
+
+class TestExtractiveSummarizer(unittest.TestCase):
+    def setUp(self):
+        self.summarizer = ExtractiveSummarizer()
+        self.response = (
+            "## Overview\n"
+            "This is an overview of the topic and it is a very interesting topic. "
+            "This topic is interesting and there is a lot to say about the topic.\n\n"
+            "- Surface codes need roughly 1000 physical qubits per logical qubit at current error rates.\n"
+            "- Google's Willow chip demonstrated below-threshold error correction in 2024.\n"
+            + "The topic is interesting. " * 3
+        )
+
+    def test_split_sentences_strips_markup(self):
+        """Test that headings and bullets become plain sentences"""
+        sentences = split_sentences(self.response)
+        self.assertEqual(sentences[0], "Overview")
+        self.assertTrue(sentences[3].startswith("Surface codes"))
+
+    def test_compress_keeps_informative_sentences(self):
+        """Test that compression prefers specific sentences over the intro"""
+        summary = self.summarizer.compress(self.response, 60)
+        self.assertLessEqual(estimate_tokens(summary), 60)
+        self.assertIn("Willow", summary)
+        self.assertNotIn("overview of the topic", summary)
+
+    def test_compress_falls_back_to_truncation(self):
+        """Test that a response of only headings and short bullets is truncated, not emptied"""
+        outline = "".join(f"## Part {i}\n- Key risk.\n- Open question.\n" for i in range(40))
+        summary = self.summarizer.compress(outline, 30)
+        self.assertTrue(summary.startswith("## Part 0"))
+        self.assertLessEqual(estimate_tokens(summary), 30)
+
+    def test_rankings_are_cached(self):
+        """Test that a response is only ranked once"""
+        first = self.summarizer.rank(self.response)
+        self.assertIs(self.summarizer.rank(self.response), first)
+
+class TestDedup(unittest.TestCase):
+    def test_repeated_sentences_are_dropped_and_attributed(self):
+        """Test that later restatements are removed and credited to the first iteration"""
+        first = "## Findings\n- Surface codes need about 1000 physical qubits per logical qubit."
+        second = (
+            "- Surface codes need about 1000 physical qubits per logical qubit!\n"
+            "- Cat qubits reduce that overhead by biasing the noise toward bit flips."
+        )
+        result = dedup_responses([first, second])
+        self.assertEqual(result.responses[0], first)
+        self.assertNotIn("Surface codes", result.responses[1])
+        self.assertIn("Cat qubits", result.responses[1])
+        self.assertEqual(result.dropped[1], {1: 1})
+        self.assertIn("iteration(s) 1", result.attribution(1))
+        self.assertGreater(result.bytes_saved, 0)
+
+    def test_headings_and_short_bullets_survive(self):
+        """Test that repeated section headings and short bullets keep every response's structure"""
+        first = "## Overview\n- Error rates.\nSurface codes need about 1000 physical qubits per logical qubit.\n## Conclusion\n- Promising."
+        second = "## Overview\n- Error rates.\nSurface codes need about 1000 physical qubits per logical qubit.\n## Conclusion\n- Promising."
+        result = dedup_responses([first, second])
+        self.assertEqual(result.responses[1], "## Overview\n- Error rates.\n## Conclusion\n- Promising.")
+        self.assertEqual(result.dropped[1], {1: 1})
+
+class FakeSession:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, message, on_progress=None):
+        self.sent.append(message)
+        return "IMPROVED PROMPT: Dig into decoder latency."
+
+class TestSpeculativeRefiner(unittest.TestCase):
+    def setUp(self):
+        self.refiner = SpeculativeRefiner(Config, PromptEngine())
+        self.refiner.session = FakeSession()
+        self.partial = "Surface codes dominate current roadmaps. " * 50
+
+    def tearDown(self):
+        self.refiner.executor.shutdown()
+
+    def test_valid_speculation_is_used(self):
+        """Test that a snapshot the final response extends is accepted"""
+        self.refiner.begin("qec", ["first finding"], 2)
+        self.refiner.observe(self.partial[:100])
+        self.assertIsNone(self.refiner._pending)
+        self.refiner.observe(self.partial)
+        self.refiner.resolve(self.partial + "Final remarks.", True)
+        prompt, response = self.refiner.take()
+        self.assertIn("iteration 2", prompt)
+        self.assertIn("decoder latency", response)
+        self.assertEqual(len(self.refiner.session.sent), 1)
+
+    def test_long_response_keeps_its_speculation(self):
+        """Test that snapshots are renewed as a long response streams, so the last one covers enough of it"""
+        response = "Logical qubits need thousands of physical qubits at current error rates. " * 150
+        self.refiner.begin("qec", ["first finding"], 2)
+        for end in range(500, len(response) + 1, 500):
+            self.refiner.observe(response[:end])
+        self.refiner.resolve(response, True)
+        self.assertIsNotNone(self.refiner.take())
+        self.assertEqual(self.refiner.stats['accepted'], 1)
+        self.assertLessEqual(len(self.refiner.session.sent), Config.SPECULATION_MAX_SNAPSHOTS)
+
+    def test_invalidated_speculation_is_discarded(self):
+        """Test that a snapshot contradicted by the final response is thrown away"""
+        self.refiner.begin("qec", ["first finding"], 2)
+        self.refiner.observe(self.partial)
+        self.refiner.resolve("A completely rewritten answer. " * 200, True)
+        self.assertIsNone(self.refiner.take())
+        self.assertEqual(self.refiner.stats['discarded'], 1)
+
+class TestRunStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = RunStore(Path(self.tmp.name) / "runs.db")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_iterations_are_written_incrementally(self):
+        """Test that runs are listed with iteration counts and quality as iterations land"""
+        self.store.start_run("20260101_120000", "Quantum computing")
+        self.store.add_iteration("20260101_120000", 1, "prompt 1", "findings 1", metrics={'quality': 0.6})
+        self.store.add_iteration("20260101_120000", 2, "prompt 2", "findings 2", metrics={'quality': 0.8})
+        run = self.store.list_runs(search="quantum")[0]
+        self.assertEqual(run['iterations'], 2)
+        self.assertAlmostEqual(run['avg_quality'], 0.7)
+        self.assertEqual(run['status'], 'running')
+
+    def test_identical_text_is_stored_once(self):
+        """Test that repeated prompts and responses share one compressed blob"""
+        findings = "Surface codes need many physical qubits per logical qubit. " * 50
+        for run_id in ("20260101_120000", "20260102_120000"):
+            self.store.start_run(run_id, "Quantum computing")
+            self.store.add_iteration(run_id, 1, "Same prompt", findings, refinement_prompt="Same prompt")
+            self.store.finish_run(run_id, findings)
+        stats = self.store.blobs.stats()
+        self.assertEqual(stats['blobs'], 2)
+        self.assertLess(stats['stored'], stats['bytes'] / 5)
+        self.assertEqual(self.store.get_run("20260102_120000")['responses'], [findings])
+
+        self.store.import_run("20260102_120000", {'initial_query': "Quantum computing", 'responses': ["Replaced"]})
+        self.assertEqual(self.store.collect_garbage(), 0)  # Still used by the first run
+        self.store.import_run("20260101_120000", {'initial_query': "Quantum computing", 'responses': ["Replaced"]})
+        self.assertEqual(self.store.collect_garbage(), 2)
+
+    def test_inline_text_from_older_stores_is_migrated(self):
+        """Test that a store with text columns is moved into the blob store on open"""
+        self.store.close()
+        path = Path(self.tmp.name) / "old.db"
+        conn = sqlite3.connect(str(path))
+        conn.executescript(
+            "CREATE TABLE runs (run_id TEXT PRIMARY KEY, topic TEXT NOT NULL, started_at TEXT NOT NULL, "
+            "finished_at TEXT, updated_at TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'running', "
+            "iterations INTEGER NOT NULL DEFAULT 0, avg_quality REAL, final_report TEXT NOT NULL DEFAULT '');"
+            "CREATE TABLE iterations (run_id TEXT NOT NULL, iteration INTEGER NOT NULL, "
+            "research_prompt TEXT NOT NULL DEFAULT '', refinement_prompt TEXT NOT NULL DEFAULT '', "
+            "response TEXT NOT NULL DEFAULT '', created_at TEXT NOT NULL, PRIMARY KEY (run_id, iteration));"
+            "INSERT INTO runs VALUES ('20260101_120000', 'Old topic', 'x', 'x', 'x', 'complete', 1, NULL, 'Old report');"
+            "INSERT INTO iterations VALUES ('20260101_120000', 1, 'Old prompt', '', 'Old findings', 'x');"
+        )
+        conn.commit()
+        conn.close()
+        self.store = RunStore(path)
+        run = self.store.get_run("20260101_120000")
+        self.assertEqual((run['research_prompts'], run['responses'], run['final_report']),
+                         (["Old prompt"], ["Old findings"], "Old report"))
+        columns = {r['name'] for r in self.store.conn.execute("PRAGMA table_info(iterations)")}
+        self.assertNotIn("response", columns)
+
+    def test_txt_export_round_trips(self):
+        """Test that the derived TXT export parses back to the stored run"""
+        self.store.start_run("20260101_120000", "Quantum computing")
+        self.store.add_iteration("20260101_120000", 1, "prompt 1", "findings 1", metrics={'quality': 0.6})
+        self.store.finish_run("20260101_120000", "# Final synthesis")
+        run = self.store.get_run("20260101_120000")
+        txt_path = Path(self.tmp.name) / "research_data_20260101_120000.txt"
+        txt_path.write_text(render_txt(run), encoding="utf-8")
+        parsed = parse_txt_to_data(txt_path)
+        self.assertEqual(parsed['initial_query'], "Quantum computing")
+        self.assertEqual(parsed['responses'], ["findings 1"])
+        self.assertEqual(parsed['research_prompts'], ["prompt 1"])
+        self.assertEqual(parsed['final_report'], "# Final synthesis")
+
+    def test_legacy_logs_are_indexed_incrementally(self):
+        """Test that only new logs are imported and listings page and filter"""
+        for i, topic in enumerate(["Quantum computing", "Quantum sensing", "Fusion energy"]):
+            run = {'initial_query': topic, 'responses': ["findings"], 'research_prompts': ["prompt"],
+                   'final_report': "report", 'started_at': "2026-01-01T12:00:00"}
+            Path(self.tmp.name, f"research_data_2026010{i + 1}_120000.txt").write_text(render_txt(run), encoding="utf-8")
+            self.assertEqual(self.store.import_legacy(self.tmp.name), 1)
+        self.assertEqual(self.store.import_legacy(self.tmp.name), 0)
+        self.assertEqual(self.store.count_runs("quantum"), 2)
+
+        # An unchanged directory is not rescanned; force does
+        scanned = os.stat(self.tmp.name)
+        Path(self.tmp.name, "research_data_20260104_120000.txt").write_text(render_txt(run), encoding="utf-8")
+        os.utime(self.tmp.name, ns=(scanned.st_atime_ns, scanned.st_mtime_ns))
+        self.assertEqual(self.store.import_legacy(self.tmp.name), 0)
+        self.assertEqual(self.store.import_legacy(self.tmp.name, force=True), 1)
+        page = self.store.list_runs(limit=1, offset=1, search="quantum")
+        self.assertEqual(page[0]['topic'], "Quantum computing")
+
+    def test_streaming_parser_handles_markup_and_mmap(self):
+        """Test that rules inside findings end them and mmap parsing matches streaming"""
+        self.store.start_run("20260101_120000", "Quantum computing")
+        self.store.add_iteration("20260101_120000", 1, "prompt 1", "## Findings\n\n" + "=" * 40 + "\nstill findings")
+        self.store.add_iteration("20260101_120000", 2, "prompt 2", "findings 2")
+        self.store.finish_run("20260101_120000", "Quality Score: 90% of the synthesis")
+        txt_path = Path(self.tmp.name) / "research_data_20260101_120000.txt"
+        txt_path.write_text(render_txt(self.store.get_run("20260101_120000")), encoding="utf-8")
+        iterations = list(iter_iterations(txt_path))
+        self.assertEqual([it['prompt'] for it in iterations], ["prompt 1", "prompt 2"])
+        self.assertIn("still findings", iterations[0]['response'])
+        self.assertEqual(parse_txt_to_data(txt_path, use_mmap=True), parse_txt_to_data(txt_path))
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = RunStore(Path(self.tmp.name) / "runs.db")
+        self.index = SearchIndex(self.store)
+        self.store.start_run("20260101_120000", "Quantum computing")
+        self.store.add_iteration("20260101_120000", 1, "Explain decoders", "Surface code decoders must run in microseconds.")
+        self.store.finish_run("20260101_120000", "Decoding latency is the bottleneck.")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_search_ranks_and_snippets(self):
+        """Test that responses and reports are searchable with snippets"""
+        self.assertEqual(self.index.update(), 1)
+        results = self.index.search("decoders")
+        self.assertEqual({r["kind"] for r in results}, {"prompt", "response", "report"})  # Porter stemming: decoding ~ decoders
+        hit = self.index.search("microsecond*")[0]
+        self.assertEqual((hit['kind'], hit['iteration']), ("response", 1))
+        self.assertIn("microseconds", hit['snippet'])
+        self.assertEqual(self.index.search('latency "bottleneck')[0]['kind'], "report")
+
+    def test_index_reads_text_from_the_blob_store(self):
+        """Test that the index keeps no copy of the text and survives replacing runs and garbage collection"""
+        self.index.update()
+        tables = {r[0] for r in self.store.conn.execute("SELECT name FROM sqlite_master")}
+        self.assertNotIn("search_docs_content", tables)
+        self.store.import_run("20260101_120000", {'initial_query': "Quantum computing", 'responses': ["Stellarators are quiet."]})
+        self.index.update()
+        self.assertEqual(self.store.collect_garbage(), 3)
+        self.assertEqual(self.index.search("decoders"), [])
+        self.assertIn("Stellarators", self.index.search("stellarator")[0]['snippet'])
+        self.store.conn.execute("INSERT INTO search_docs (search_docs) VALUES ('integrity-check')")
+
+    def test_similar_topics_seed_the_first_refinement(self):
+        """Test that close earlier runs are found and turn the first refinement into a gap analysis"""
+        self.store.start_run("20260102_120000", "Fusion energy")
+        self.store.finish_run("20260102_120000", "Tokamaks need better magnets.")
+        self.store.start_run("20260103_120000", "Quantum computing error rates")  # Still running
+        self.index.update()
+        similar = self.index.similar_runs("Quantum computing decoders", exclude="20260104_120000")
+        self.assertEqual([r['run_id'] for r in similar], ["20260101_120000"])
+        self.assertAlmostEqual(similar[0]['similarity'], 2 / 6 ** 0.5)
+
+        engine = PromptEngine()
+        seeded = engine.create_refinement_prompt("Quantum computing decoders", prior_findings="- Decoding latency matters.")
+        self.assertIn("GAP ANALYSIS", seeded)
+        self.assertIn("Decoding latency matters.", seeded)
+        self.assertIn("KEY ASPECTS", engine.create_refinement_prompt("Quantum computing decoders"))
+
+    def test_similar_reports_count_when_topics_overlap(self):
+        """Test that a covering report lifts a partly matching topic, but unrelated topics stay out"""
+        for run_id, topic, report in [
+            ("20260102_120000", "Fault tolerant quantum computing", "Magic state distillation dominates quantum computing overhead."),
+            ("20260103_120000", "Kubernetes autoscaling", "Autoscaling must change with load, whatever the climate of the cluster."),
+            ("20260104_120000", "History of the Roman Empire", "Climate change weakened the empire's harvests."),
+        ]:
+            self.store.start_run(run_id, topic)
+            self.store.finish_run(run_id, report)
+        self.index.update()
+        similar = self.index.similar_runs("Magic state distillation for quantum computing", exclude="20260109_120000")
+        self.assertEqual(similar[0]['run_id'], "20260102_120000")
+        self.assertGreaterEqual(similar[0]['similarity'], Config.PRIOR_MIN_SIMILARITY)
+        unrelated = self.index.similar_runs("Climate change", exclude="20260109_120000")
+        self.assertFalse([r for r in unrelated if r['similarity'] >= Config.PRIOR_MIN_SIMILARITY])
+
+    def test_update_only_indexes_changed_runs(self):
+        """Test that new runs are added without re-indexing old ones"""
+        self.index.update()
+        self.assertEqual(self.index.update(), 0)
+        self.store.start_run("20260102_120000", "Fusion energy")
+        self.store.add_iteration("20260102_120000", 1, "Tokamaks", "Stellarators avoid plasma disruptions.")
+        self.assertEqual(self.index.update(), 1)
+        self.assertEqual(self.index.search("stellarator")[0]['run_id'], "20260102_120000")
+
+class TestDashboardManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.store = RunStore(Path("research_output") / "runs.db")
+        self.store.start_run("20260101_120000", "Quantum computing")
+        self.store.record_file("20260101_120000", "html", Path("research_output") / "report_20260101_120000.html")
+
+    def tearDown(self):
+        self.store.close()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_unchanged_runs_reuse_cached_cards(self):
+        """Test that only new or changed runs are re-rendered"""
+        rendered = []
+        original = DashboardGenerator._render_card
+        DashboardGenerator._render_card = staticmethod(lambda r: rendered.append(r['timestamp']) or original(r))
+        try:
+            DashboardGenerator.generate()
+            DashboardGenerator.generate()
+            self.store.start_run("20260102_120000", "Fusion energy")
+            self.store.record_file("20260102_120000", "html", Path("research_output") / "report_20260102_120000.html")
+            DashboardGenerator.generate()
+        finally:
+            DashboardGenerator._render_card = original
+        self.assertEqual(rendered, ["20260101_120000", "20260102_120000"])
+        self.assertIn("Fusion energy", Path("dashboard.html").read_text(encoding="utf-8"))
+
+    def test_legacy_logs_join_an_existing_store(self):
+        """Test that logs copied into a non-empty store still reach the dashboard"""
+        run = {'initial_query': "Legacy topic", 'responses': ["findings"], 'research_prompts': ["prompt"],
+               'final_report': "report", 'started_at': "2025-01-01T12:00:00"}
+        for name in ("research_data_20250101_120000.txt", "research_data_notes.txt"):
+            Path("research_output", name).write_text(render_txt(run), encoding="utf-8")
+            Path("research_output", name.replace("research_data_", "report_").replace(".txt", ".html")).write_text("x", encoding="utf-8")
+        DashboardGenerator.generate()
+        page = Path("dashboard.html").read_text(encoding="utf-8")
+        self.assertIn("Quantum computing", page)
+        self.assertIn("Legacy topic", page)
+        self.assertEqual({r['run_id'] for r in self.store.list_runs()}, {"20260101_120000", "20250101_120000", "notes"})
+
+    def test_virtual_mode_appends_to_last_shard(self):
+        """Test that large archives are sharded and old shards are not rewritten"""
+        saved = Config.DASHBOARD_MODE, Config.DASHBOARD_SHARD_SIZE
+        Config.DASHBOARD_MODE, Config.DASHBOARD_SHARD_SIZE = "virtual", 1
+        try:
+            self.store.start_run("20260102_120000", "Fusion energy")
+            self.store.record_file("20260102_120000", "html", Path("research_output") / "report_20260102_120000.html")
+            DashboardGenerator.generate()
+            first = Path("research_output/dashboard_index/shard-0000.js")
+            self.assertIn("Quantum computing", first.read_text(encoding="utf-8"))
+            mtime = first.stat().st_mtime_ns
+            self.store.start_run("20260103_120000", "Gene therapy")
+            self.store.record_file("20260103_120000", "html", Path("research_output") / "report_20260103_120000.html")
+            DashboardGenerator.generate()
+        finally:
+            Config.DASHBOARD_MODE, Config.DASHBOARD_SHARD_SIZE = saved
+        self.assertEqual(first.stat().st_mtime_ns, mtime)
+        self.assertIn("Gene therapy", Path("research_output/dashboard_index/shard-0002.js").read_text(encoding="utf-8"))
+        page = Path("dashboard.html").read_text(encoding="utf-8")
+        self.assertIn("shard-0002.js", page)
+        self.assertNotIn("Gene therapy", page)
+
+    def test_search_index_covers_prompts_and_reports(self):
+        """Test that the client-side search index maps prompt and report words to runs"""
+        self.store.add_iteration("20260101_120000", 1, "Explain surface code decoders", "findings")
+        self.store.finish_run("20260101_120000", "Decoder latency dominates. Latency budgets are tight.")
+        DashboardGenerator.generate()
+        body = Path("research_output/dashboard_index/search.js").read_text(encoding="utf-8")
+        index = json.loads(body[len("HubSearch.load("):-len(");\n")])
+        self.assertEqual(index['runs'], ["20260101_120000"])
+        for term in ("quantum", "decoders", "latency"):
+            self.assertEqual(index['terms'][term], [0])
+        self.assertIn("search.js?v=", Path("dashboard.html").read_text(encoding="utf-8"))
+
+class TestBatchConvert(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.vendor, Config.VENDOR_ASSETS = Config.VENDOR_ASSETS, False
+        store = RunStore(Path("research_output") / "runs.db")
+        for i, topic in enumerate(["Quantum computing", "Fusion energy", "Gene therapy"]):
+            store.start_run(f"2026010{i + 1}_120000", topic)
+            store.add_iteration(f"2026010{i + 1}_120000", 1, "prompt", f"Findings on {topic}.")
+        store.close()
+
+    def tearDown(self):
+        Config.VENDOR_ASSETS = self.vendor
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_parallel_conversion_skips_unchanged_runs(self):
+        """Test that a second pass only reconverts runs that changed"""
+        self.assertEqual(batch_convert(workers=2), 3)
+        self.assertTrue(Path("research_output/2026/01/20260102_120000/report_20260102_120000.html").exists())
+        self.assertEqual(batch_convert(workers=2), 0)
+        store = RunStore(Path("research_output") / "runs.db")
+        store.finish_run("20260103_120000", "Delivery vectors matter.")
+        store.close()
+        self.assertEqual(batch_convert(workers=1), 1)
+        self.assertEqual(batch_convert(workers=1, changed_only=False), 3)
+
+    def test_failed_vendoring_is_not_retried(self):
+        """Test that offline sessions try each vendored asset once, not at every export"""
+        attempts = []
+        def offline(url):
+            attempts.append(url)
+            raise OSError("offline")
+        original = AssetBundle._download
+        AssetBundle._download = staticmethod(offline)
+        try:
+            AssetBundle("research_output").vendor_all()
+            AssetBundle("research_output").vendor_all()
+        finally:
+            AssetBundle._download = original
+            AssetBundle._unavailable.clear()
+        self.assertEqual(len(attempts), 3)
+
+    def test_flat_layout_is_migrated_into_run_directories(self):
+        """Test that flat exports move under YYYY/MM/<run-id>/ and reports are regenerated there"""
+        flat = Path("research_output")
+        run = RunStore(flat / "runs.db").get_run("20260102_120000")
+        (flat / "final_report_20260102_120000.md").write_text("# Report", encoding="utf-8")
+        (flat / "report_20260102_120000.html").write_text("old", encoding="utf-8")
+        (flat / "research_data_20260204_090000.txt").write_text(render_txt(dict(run, final_report="x")), encoding="utf-8")
+
+        self.assertEqual(migrate_layout(flat), 2)
+        self.assertFalse([p.name for p in flat.iterdir() if p.name.startswith(("report_", "research_data_", "final_report_"))])
+        run_dir = flat / "2026" / "02" / "20260204_090000"
+        self.assertTrue((run_dir / "research_data_20260204_090000.txt").exists())
+        page = (flat / "2026" / "01" / "20260102_120000" / "report_20260102_120000.html").read_text(encoding="utf-8")
+        self.assertIn('href="../../../../dashboard.html"', page)
+        self.assertIn('href="../../../assets/report.', page)
+        store = RunStore(flat / "runs.db")
+        self.assertEqual(store.get_files("20260102_120000")['md'], flat / "2026" / "01" / "20260102_120000" / "final_report_20260102_120000.md")
+        store.close()
+
+class TestOutputWriter(unittest.TestCase):
+    def test_failed_write_keeps_the_previous_file(self):
+        """Test that an interrupted atomic write leaves the old content and no temp file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "report.html"
+            atomic_write(path, "old")
+            with self.assertRaises(TypeError):
+                atomic_write(path, None)
+            self.assertEqual(path.read_text(encoding="utf-8"), "old")
+            self.assertEqual(os.listdir(tmp), ["report.html"])
+
+    def test_jobs_run_in_order_off_thread_until_flushed(self):
+        """Test that submitted jobs run in order on another thread and flush reports failures"""
+        writer = OutputWriter()
+        done = []
+        writer.submit(lambda: done.append(threading.current_thread() is threading.main_thread()))
+        writer.submit(lambda: 1 / 0)
+        writer.submit(done.append, "last")
+        self.assertEqual(writer.close(), 1)
+        self.assertEqual(done, [False, "last"])
+
+
+class TestMetricsExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = RunStore(Path(self.tmp.name) / "runs.db")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def add_run(self, run_id, iterations):
+        self.store.start_run(run_id, "Quantum computing")
+        for i in range(1, iterations + 1):
+            self.store.add_iteration(run_id, i, "prompt", f"findings {i}",
+                                     metrics={'quality': 0.5 + i / 10, 'research_seconds': 12.5})
+        self.store.finish_run(run_id, "done")
+
+    def read_rows(self):
+        with open(Path(self.tmp.name) / "metrics" / "iterations.csv", newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def test_completed_runs_are_appended_once(self):
+        """Test that each export appends only newly completed runs, and a changed run rebuilds"""
+        self.add_run("20260101_120000", 2)
+        self.store.start_run("20260102_120000", "Still running")
+        self.assertEqual(export_metrics(self.store, self.tmp.name, fmt="csv")[0], 2)
+        self.assertEqual(export_metrics(self.store, self.tmp.name, fmt="csv"), (0, None))
+
+        self.add_run("20260103_120000", 1)
+        self.assertEqual(export_metrics(self.store, self.tmp.name, fmt="csv")[0], 1)
+        rows = self.read_rows()
+        self.assertEqual([(r['run_id'], r['iteration']) for r in rows],
+                         [("20260101_120000", "1"), ("20260101_120000", "2"), ("20260103_120000", "1")])
+        self.assertEqual((rows[0]['quality'], rows[0]['research_seconds'], rows[0]['response_bytes']), ("0.6", "12.5", "10"))
+
+        self.add_run("20260101_120000", 1)  # Replaced: its rows must not be duplicated
+        self.assertEqual(export_metrics(self.store, self.tmp.name, fmt="csv")[0], 3)
+        self.assertEqual(len(self.read_rows()), 3)
+
+    def test_quality_factors_sum_to_the_score(self):
+        """Test that the recorded quality factors add up to the evaluated quality"""
+        engine = PromptEngine()
+        response = "## Overview\n- For example, quantum error correction is important. " * 20
+        score, _, _ = engine.evaluate_response_quality(response, "quantum error correction")
+        self.assertAlmostEqual(sum(engine.quality_factors(response, "quantum error correction").values()), score)
+        self.assertEqual(shingle_novelty("alpha beta gamma delta", ["alpha beta gamma"]), 0.5)
+
+
+class TestReportServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        store = RunStore(Path("research_output") / "runs.db")
+        store.start_run("20260101_120000", "Quantum computing")
+        store.add_iteration("20260101_120000", 1, "prompt", "Surface codes need many qubits. " * 100)
+        store.close()
+        self.server = ReportServer(("127.0.0.1", 0), "research_output")
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        HTMLGenerator.renderer_for("research_output").close()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def get(self, path, **headers):
+        try:
+            return urllib.request.urlopen(urllib.request.Request(self.base + path, headers=headers))
+        except urllib.error.HTTPError as e:
+            return e
+
+    def test_reports_render_on_demand_with_etags_and_gzip(self):
+        """Test that unexported runs are rendered, cached, revalidated and compressed"""
+        self.assertIn("report_20260101_120000.html", self.get("/dashboard.html").read().decode("utf-8"))
+        response = self.get("/research_output/2026/01/20260101_120000/report_20260101_120000.html", **{'Accept-Encoding': "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Surface codes", gzip.decompress(response.read()).decode("utf-8"))
+        etag = response.headers["ETag"]
+        self.assertEqual(self.get("/research_output/2026/01/20260101_120000/report_20260101_120000.html", **{'If-None-Match': etag}).status, 304)
+        self.assertEqual(self.server.cache.stats['misses'], 2)
+        self.assertFalse(Path("research_output/2026/01/20260101_120000/report_20260101_120000.html").exists())
+        self.assertEqual(self.get("/research_output/runs.db").status, 404)
+
+    def test_only_hashed_assets_are_immutable(self):
+        """Test that content-hashed assets are cached forever and the vendor manifest is revalidated"""
+        self.get("/research_output/2026/01/20260101_120000/report_20260101_120000.html").read()
+        hashed = next(p.name for p in Path("research_output/assets").glob("report.*.css"))
+        Path("research_output/assets/vendor.json").write_text("{}", encoding="utf-8")
+        self.assertIn("immutable", self.get(f"/research_output/assets/{hashed}").headers["Cache-Control"])
+        self.assertEqual(self.get("/research_output/assets/vendor.json").headers["Cache-Control"], "no-cache")
+
+    def test_running_report_streams_new_iterations(self):
+        """Test that a live report receives later iterations and the synthesis as events"""
+        Config.LIVE_POLL_INTERVAL = 0.05
+        page = self.get("/research_output/2026/01/20260101_120000/report_20260101_120000.html").read().decode("utf-8")
+        self.assertIn('"live":"report_20260101_120000.events"', page)
+
+        events = self.get("/research_output/2026/01/20260101_120000/report_20260101_120000.events?after=1")
+        self.assertEqual(events.headers["Content-Type"], "text/event-stream; charset=utf-8")
+        store = RunStore(Path("research_output") / "runs.db")
+        store.add_iteration("20260101_120000", 2, "prompt two", "**Logical qubits** scale.", metrics={'quality': 0.9})
+        store.finish_run("20260101_120000", "Final synthesis")
+        store.close()
+        stream = events.read().decode("utf-8")
+        Config.LIVE_POLL_INTERVAL = 1.0
+
+        self.assertEqual(stream.count("event: iteration"), 1)
+        self.assertIn("id: 2\n", stream)
+        self.assertIn("<strong>Logical qubits</strong>", stream)
+        self.assertIn("event: complete", stream)
+        self.assertIn("Final synthesis", stream)
+        page = self.get("/research_output/2026/01/20260101_120000/report_20260101_120000.html").read().decode("utf-8")
+        self.assertNotIn('"live"', page)
+
+class TestRunBundle(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.vendor, Config.VENDOR_ASSETS = Config.VENDOR_ASSETS, False
+        self.source = RunStore(Path("source") / "runs.db")
+        self.source.start_run("20260101_120000", "Quantum computing")
+        self.source.add_iteration("20260101_120000", 1, "prompt", "Surface codes need many qubits.",
+                                  refinement_prompt="refine", metrics={'quality': 0.8})
+        self.source.finish_run("20260101_120000", "Final synthesis")
+        self.target = RunStore(Path("research_output") / "runs.db")
+
+    def tearDown(self):
+        self.source.close()
+        self.target.close()
+        HTMLGenerator.renderer_for("source").close()
+        HTMLGenerator.renderer_for("research_output").close()
+        Config.VENDOR_ASSETS = self.vendor
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def bundle(self):
+        buffer = io.BytesIO()
+        self.assertEqual(export_bundle(self.source, ["20260101_120000", "20990101_000000"], buffer, "source"), 1)
+        return buffer.getvalue()
+
+    def test_bundle_round_trips_runs_and_skips_unchanged(self):
+        """Test that an imported run matches its source, is indexed and exported, and is not imported twice"""
+        data = self.bundle()
+        counts = import_bundle(self.target, io.BytesIO(data), "research_output")
+        self.assertEqual(counts, {'imported': 1, 'skipped': 0, 'conflicts': 0, 'failed': 0, 'ignored': 0})
+        self.assertEqual(self.target.export_record("20260101_120000"), self.source.export_record("20260101_120000"))
+        page = Path("research_output/2026/01/20260101_120000/report_20260101_120000.html").read_text(encoding="utf-8")
+        self.assertIn("Quantum computing", page)
+        self.assertEqual(self.target.get_files("20260101_120000")['html'].name, "report_20260101_120000.html")
+        self.assertEqual(SearchIndex(self.target).search("surface")[0]['run_id'], "20260101_120000")
+        self.assertTrue(Path("dashboard.html").exists())
+        self.assertEqual(import_bundle(self.target, io.BytesIO(data), "research_output")['skipped'], 1)
+
+    def test_same_id_for_different_research_is_imported_alongside(self):
+        """Test that a bundled run never replaces an unrelated local run that got the same timestamp id"""
+        self.target.start_run("20260101_120000", "Fusion energy")
+        self.target.finish_run("20260101_120000", "Local findings")
+        data = self.bundle()
+        counts = import_bundle(self.target, io.BytesIO(data), "research_output")
+        self.assertEqual((counts['imported'], counts['conflicts']), (1, 1))
+        self.assertEqual(self.target.get_run("20260101_120000")['initial_query'], "Fusion energy")
+        self.assertEqual(self.target.get_run("20260101_120000-2")['initial_query'], "Quantum computing")
+        self.assertTrue(Path("research_output/2026/01/20260101_120000-2/report_20260101_120000-2.html").exists())
+        self.assertEqual(import_bundle(self.target, io.BytesIO(data), "research_output")['skipped'], 1)
+
+    def test_tampered_bundle_is_rejected(self):
+        """Test that a run whose contents do not match its manifest is not imported"""
+        raw = bytearray(gzip.decompress(self.bundle()))
+        at = raw.index(b"Surface codes")
+        raw[at:at + 7] = b"SURFACE"
+        counts = import_bundle(self.target, io.BytesIO(gzip.compress(bytes(raw))), "research_output")
+        self.assertEqual(counts['failed'], 1)
+        self.assertFalse(self.target.has_run("20260101_120000"))
+
+    def test_crafted_run_ids_are_rejected(self):
+        """Test that a run.json naming another run (or a path) is not imported, even with valid checksums"""
+        record = dict(self.source.export_record("20260101_120000"), run_id="../../escaped")
+        files = {'run.json': json.dumps(record).encode("utf-8"), 'report.html': b"<html></html>"}
+        manifest = {'run_id': "20260101_120000", 'updated_at': record['updated_at'],
+                    'files': {name: {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)} for name, data in files.items()}}
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+            members = [("runs/20260101_120000/manifest.json", json.dumps(manifest).encode("utf-8"))]
+            members += [(f"runs/20260101_120000/{name}", data) for name, data in files.items()]
+            members.append(("runs/../escaped/run.json", b"{}"))
+            for name, data in members:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        counts = import_bundle(self.target, io.BytesIO(buffer.getvalue()), "research_output")
+        self.assertEqual((counts['failed'], counts['ignored']), (1, 1))
+        self.assertEqual(self.target.count_runs(), 0)
+        self.assertEqual([p.name for p in Path(".").iterdir() if "escaped" in p.name], [])
+
+class TestMarkdownRenderer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = Path(self.tmp.name) / "render_cache.db"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fragments_are_cached_across_renderers(self):
+        """Test that a second process-like renderer reuses fragments from the disk cache"""
+        first = MarkdownRenderer(self.cache)
+        html = first.render_many(["# Findings\n\n| a | b |\n|---|---|\n| 1 | 2 |", "<script>x</script>", ""])
+        self.assertIn("<h1>Findings</h1>", html[0])
+        self.assertIn("<table>", html[0])
+        self.assertNotIn("<script>", html[1])
+        self.assertEqual(html[2], "")
+        first.close()
+        second = MarkdownRenderer(self.cache)
+        self.assertEqual(second.render("# Findings\n\n| a | b |\n|---|---|\n| 1 | 2 |"), html[0])
+        self.assertEqual(second.stats, {'hits': 1, 'rendered': 0})
+        second.close()
+
+    def test_report_embeds_prerendered_html(self):
+        """Test that generated reports no longer parse markdown in the browser"""
+        run = {'initial_query': "Qubits", 'responses': ["**Bold** finding"], 'research_prompts': ["Ask"],
+               'final_report': "## Synthesis", 'quality_history': []}
+        path = Path(self.tmp.name) / "report.html"
+        HTMLGenerator.generate(run, path)
+        HTMLGenerator.renderer_for(self.tmp.name).close()
+        page = path.read_text(encoding="utf-8")
+        self.assertIn('<div id="synthesis-md" class="report-body"><h2>Synthesis</h2>', page)
+        self.assertIn("<strong>Bold<\\/strong>", page)
+        self.assertNotIn("marked", page)
+
+    def test_reports_share_hashed_assets_unless_standalone(self):
+        """Test that reports link one content-hashed bundle and standalone pages inline it"""
+        run = {'initial_query': "Qubits", 'responses': ["finding"], 'research_prompts': [""],
+               'final_report': "done", 'quality_history': []}
+        HTMLGenerator.generate(run, Path(self.tmp.name) / "a.html")
+        HTMLGenerator.generate(run, Path(self.tmp.name) / "b.html")
+        HTMLGenerator.generate(run, Path(self.tmp.name) / "c.html", standalone=True)
+        HTMLGenerator.renderer_for(self.tmp.name).close()
+        css = list(Path(self.tmp.name, "assets").glob("report.*.css"))
+        self.assertEqual(len(css), 1)
+        linked = Path(self.tmp.name, "a.html").read_text(encoding="utf-8")
+        self.assertIn(f'href="assets/{css[0].name}"', linked)
+        self.assertNotIn("--surface: #0f172a", linked)
+        standalone = Path(self.tmp.name, "c.html").read_text(encoding="utf-8")
+        self.assertIn("--surface: #0f172a", standalone)
+        self.assertNotIn("assets/", standalone)
+
+    def test_compressed_payloads_round_trip(self):
+        """Test that gzip and sidecar payloads decode to the same report data"""
+        run = {'initial_query': "Qubits", 'responses': ["Surface codes need many qubits. " * 200],
+               'research_prompts': ["Ask"], 'final_report': "done", 'quality_history': []}
+        page = Path(self.tmp.name) / "report_1.html"
+        HTMLGenerator.generate(run, page, payload="gzip")
+        text = page.read_text(encoding="utf-8")
+        literal = json.loads(text.split("const PAYLOAD = ")[1].split(";\n")[0])
+        data = json.loads(gzip.decompress(base64.b64decode(literal['gzip'])))
+        self.assertIn("Surface codes", data['iterations'][0]['content_html'])
+        HTMLGenerator.generate(run, page, payload="sidecar")
+        HTMLGenerator.renderer_for(self.tmp.name).close()
+        sidecar = json.loads(gzip.decompress(Path(self.tmp.name, "report_1.json.gz").read_bytes()))
+        self.assertEqual(sidecar, data)
+        self.assertIn('{"src": "report_1.json.gz"}', page.read_text(encoding="utf-8"))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,98 @@
+import re
+from summarizer import content_words, MARKUP_RE, SENTENCE_END_RE
+
+
+class DedupResult:
+    """Deduplicated responses plus what was removed from each one"""
+
+    def __init__(self, responses, dropped, bytes_before, bytes_after):
+        self.responses = responses
+        self.dropped = dropped  # Per response: {earlier iteration number: sentences dropped}
+        self.bytes_before = bytes_before
+        self.bytes_after = bytes_after
+
+    @property
+    def bytes_saved(self):
+        return self.bytes_before - self.bytes_after
+
+    def attribution(self, index):
+        """Note for response `index` naming the iterations its dropped sentences repeat"""
+        dropped = self.dropped[index]
+        if not dropped:
+            return ""
+        total = sum(dropped.values())
+        sources = ", ".join(str(i) for i in sorted(dropped))
+        return f"[{total} sentence(s) repeating iteration(s) {sources} omitted]"
+
+
+def _shingles(words, size=3):
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def dedup_responses(responses, threshold=0.8, shingle_size=3):
+    """
+    Drops sentences that repeat (or nearly repeat) a sentence from an earlier response.
+    A sentence counts as a near-duplicate when at least `threshold` of its word
+    shingles were already seen. Markdown line structure, headings, code blocks
+    and sentences shorter than one shingle (short bullets, labels) are kept,
+    and each dropped sentence is attributed to the iteration it first appeared in.
+    """
+    seen_shingles = {}  # shingle -> 1-based iteration that introduced it
+    results = []
+    dropped = []
+
+    for iteration, response in enumerate(responses, 1):
+        kept_lines = []
+        dropped_here = {}
+        in_code = False
+        new_shingles = {}
+
+        for line in response.splitlines():
+            if line.strip().startswith("```"):
+                in_code = not in_code
+                kept_lines.append(line)
+                continue
+            if in_code or not line.strip() or line.lstrip().startswith("#"):
+                kept_lines.append(line)
+                continue
+
+            prefix = MARKUP_RE.match(line)
+            prefix = prefix.group(0) if prefix else ""
+            kept = []
+            for sentence in SENTENCE_END_RE.split(line[len(prefix):].strip()):
+                words = content_words(sentence)
+                shingles = _shingles(words, shingle_size)
+                known = [seen_shingles[s] for s in shingles if s in seen_shingles]
+                if len(words) >= shingle_size and len(known) >= threshold * len(shingles):
+                    source = min(known)
+                    dropped_here[source] = dropped_here.get(source, 0) + 1
+                    continue
+                kept.append(sentence)
+                for s in shingles:
+                    new_shingles.setdefault(s, iteration)
+
+            if kept:
+                kept_lines.append(prefix + " ".join(kept))
+
+        # Only later iterations are compared against this one, never itself
+        for s, it in new_shingles.items():
+            seen_shingles.setdefault(s, it)
+        results.append(re.sub(r"\n{3,}", "\n\n", "\n".join(kept_lines)).strip())
+        dropped.append(dropped_here)
+
+    bytes_before = sum(len(r.encode("utf-8")) for r in responses)
+    bytes_after = sum(len(r.encode("utf-8")) for r in results)
+    return DedupResult(results, dropped, bytes_before, bytes_after)
+
+
+def shingle_novelty(response, previous, shingle_size=3):
+    """Share of the response's word shingles (0-1) that no previous response contains"""
+    shingles = _shingles(content_words(response), shingle_size)
+    if not shingles:
+        return 0.0
+    seen = set()
+    for earlier in previous:
+        seen |= _shingles(content_words(earlier), shingle_size)
+    return len(shingles - seen) / len(shingles)
@@ -0,0 +1,122 @@
+import re
+
+# Words, single CJK characters and single punctuation marks
+_PIECE_RE = re.compile(r"[A-Za-z0-9_]+|[^\x00-\x7f]|[^\w\s]")
+_WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text):
+    """
+    Fast, dependency-free token estimate for DeepSeek prompts.
+    ASCII words cost roughly one token per 4 characters, every non-ASCII
+    character (CJK, emoji) and every punctuation mark costs one token.
+    Errs on the high side so budgets never overflow.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        if len(piece) > 1:
+            tokens += (len(piece) + 3) // 4
+        else:
+            tokens += 1
+    return tokens
+
+
+def truncate_to_tokens(text, max_tokens, suffix="..."):
+    """Cut text on a word boundary so that it fits within max_tokens"""
+    if max_tokens <= 0 or not text:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # Start from a chars-per-token guess, then shrink until it fits
+    ratio = len(text) / max(estimate_tokens(text), 1)
+    end = int(max_tokens * ratio)
+    while end > 0:
+        cut = text.rfind(" ", 0, end)
+        candidate = text[:cut if cut > 0 else end].rstrip()
+        if estimate_tokens(candidate) + estimate_tokens(suffix) <= max_tokens:
+            return candidate + suffix
+        end = int(end * 0.9)
+    return ""
+
+
+def novelty(text, seen_words):
+    """Fraction of the words in text that are not already in seen_words"""
+    words = set(w.lower() for w in _WORD_RE.findall(text))
+    if not words:
+        return 0.0
+    return len(words - seen_words) / len(words)
+
+
+class TokenBudget:
+    """
+    Splits a context window between fixed prompt parts and history items.
+    History items (oldest first) are weighted by recency and novelty so the
+    newest, least repetitive findings get the most room.
+    """
+
+    def __init__(self, context_tokens, reserve_tokens=0):
+        self.context_tokens = context_tokens
+        self.reserve_tokens = reserve_tokens
+
+    def available(self, *fixed_texts, used_tokens=0):
+        """Tokens left for history after the fixed parts and the model's answer"""
+        fixed = sum(estimate_tokens(t) for t in fixed_texts)
+        return max(self.context_tokens - self.reserve_tokens - used_tokens - fixed, 0)
+
+    @staticmethod
+    def weights(items, recency_weight=0.5):
+        """Score each item by recency and by how many new words it brings"""
+        n = len(items)
+        seen = set()
+        scores = []
+        for i, item in enumerate(items):
+            recency = (i + 1) / n
+            new = novelty(item, seen)
+            seen.update(w.lower() for w in _WORD_RE.findall(item))
+            # Small floor so nothing is dropped entirely
+            scores.append(0.05 + recency_weight * recency + (1 - recency_weight) * new)
+        return scores
+
+    def allocate(self, items, available, recency_weight=0.5):
+        """
+        Returns a token allowance per item. Allowances are proportional to
+        the item weights but never exceed an item's own size; whatever a
+        short item leaves unused is redistributed to the others.
+        """
+        if not items or available <= 0:
+            return [0] * len(items)
+
+        sizes = [estimate_tokens(item) for item in items]
+        weights = self.weights(items, recency_weight)
+        alloc = [0] * len(items)
+        open_items = set(i for i, size in enumerate(sizes) if size > 0)
+        remaining = available
+
+        while open_items and remaining > 0:
+            total_weight = sum(weights[i] for i in open_items)
+            capped = set()
+            for i in open_items:
+                share = int(remaining * weights[i] / total_weight)
+                if alloc[i] + share >= sizes[i]:
+                    capped.add(i)
+            if not capped:
+                for i in open_items:
+                    alloc[i] += int(remaining * weights[i] / total_weight)
+                break
+            for i in capped:
+                remaining -= sizes[i] - alloc[i]
+                alloc[i] = sizes[i]
+            open_items -= capped
+
+        return alloc
+
+    def fit(self, items, available, recency_weight=0.5, shrink=truncate_to_tokens):
+        """
+        Shrink every item to its allowance. shrink(text, max_tokens) defaults
+        to plain truncation; pass a summarizer to keep the best sentences instead.
+        """
+        alloc = self.allocate(items, available, recency_weight)
+        return [shrink(item, tokens) for item, tokens in zip(items, alloc)]
@@ -1,127 +1,107 @@
 import os
 import json
+import argparse
 import webbrowser
 from pathlib import Path
-from html_generator import HTMLGenerator
 from rich.console import Console
 from rich.table import Table
+from rich.markup import escape
+from run_store import RunStore
+from run_exports import export_run
 
 console = Console()
 
-def list_past_research():
-    output_dir = Path("research_output")
+def list_past_research(store, output_dir):
+    """Bring the run index up to date; only logs not yet in the store are opened"""
     if not output_dir.exists():
         console.print("[red]No research output directory found.[/red]")
-        return []
-        
-    data_files = list(output_dir.glob("research_data_*.txt"))
-    data_files.sort(reverse=True)
-    
-    if not data_files:
-        console.print("[yellow]No past research found.[/yellow]")
-        return []
-        
-    return data_files
-
-def parse_txt_to_data(filepath):
-    """Simple parser for the .txt logs back into raw data for the HTML generator"""
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
-        
-    topic_match = re.search(r"Topic: (.+)", content)
-    topic = topic_match.group(1) if topic_match else "Unknown Topic"
-    
-    # Extract iterations
-    iterations = []
-    # This is a bit complex for a regex, lets try a simple split
-    parts = content.split("ITERATION ")
-    for part in parts[1:]:
-        # Split into prompt and findings
-        # Iteration 1\n========\n\nRESEARCH PROMPT:\n...\n\nFINDINGS:\n...
-        lines = part.split("\n")
-        findings_start = part.find("FINDINGS:\n")
-        prompt_start = part.find("RESEARCH PROMPT:\n")
-        
-        prompt = ""
-        if prompt_start != -1:
-            end = findings_start if findings_start != -1 else len(part)
-            prompt = part[prompt_start + 16:end].strip()
-            
-        findings = ""
-        if findings_start != -1:
-            end = part.find("-" * 40)
-            if end == -1: end = part.find("=" * 40)
-            if end == -1: end = len(part)
-            findings = part[findings_start + 10:end].strip()
-            
-        iterations.append({
-            'prompt': prompt,
-            'response': findings
-        })
-    
-    # Extract final synthesis
-    synthesis = ""
-    syn_start = content.find("FINAL SYNTHESIS REPORT\n")
-    if syn_start != -1:
-        synthesis = content[syn_start + 23 + 40 + 2:].strip()
-        
-    return {
-        'initial_query': topic,
-        'responses': [i['response'] for i in iterations],
-        'research_prompts': [i['prompt'] for i in iterations],
-        'final_report': synthesis
-    }
-
-import re
+        return 0
 
-def main():
-    console.rule("[bold cyan]DeepSeek Research Viewer[/bold cyan]")
-    files = list_past_research()
-    
-    if not files:
-        return
+    imported = store.import_legacy(output_dir)
+    if imported:
+        console.print(f"[dim]Indexed {imported} new research logs.[/dim]")
 
-    table = Table(title="Select a report to view", show_header=True, header_style="bold magenta")
+    total = store.count_runs()
+    if not total:
+        console.print("[yellow]No past research found.[/yellow]")
+    return total
+
+def show_page(runs, page, pages, total, search):
+    title = f"Select a report to view (page {page + 1}/{pages}, {total} runs"
+    title += f" matching '{escape(search)}')" if search else ")"
+    table = Table(title=title, show_header=True, header_style="bold magenta")
     table.add_column("ID", justify="center", style="dim")
     table.add_column("Date/Time", style="cyan")
     table.add_column("Topic", style="green")
-    
-    for i, f in enumerate(files):
-        # research_data_20260226_085552.txt
-        timestamp = f.stem.replace("research_data_", "")
+    table.add_column("Iter", justify="right")
+    table.add_column("Quality", justify="right")
+
+    for run in runs:
+        # run ids are timestamps: 20260226_085552
+        timestamp = run['run_id']
         date_str = f"{timestamp[:4]}-{timestamp[4:6]}-{timestamp[6:8]} {timestamp[9:11]}:{timestamp[11:13]}"
-        
-        # Peek at topic
-        with open(f, "r", encoding="utf-8") as peek:
-            line = peek.readline()
-            line = peek.readline() # report
-            line = peek.readline() # topic
-            topic = line.replace("Topic: ", "").strip()
-            
-        table.add_row(str(i+1), date_str, topic[:60] + "..." if len(topic) > 60 else topic)
-        
+        topic = run['topic']
+        quality = f"{run['avg_quality']:.0%}" if run['avg_quality'] is not None else "-"
+        table.add_row(str(run['row']), date_str, escape(topic[:60] + "..." if len(topic) > 60 else topic),
+                      str(run['iterations']), quality)
+
     console.print(table)
-    
-    choice = input("\nEnter ID to open (or 'q' to quit): ")
-    if choice.lower() == 'q':
+
+def main():
+    parser = argparse.ArgumentParser(description="Browse past research runs")
+    parser.add_argument("--standalone", action="store_true", help="Inline all assets so the report can be shared as one file")
+    parser.add_argument("--page-size", type=int, default=20, help="Runs per page")
+    parser.add_argument("--search", default="", help="Only list runs whose topic contains this text")
+    args = parser.parse_args()
+
+    console.rule("[bold cyan]DeepSeek Research Viewer[/bold cyan]")
+    output_dir = Path("research_output")
+    store = RunStore(output_dir / "runs.db")
+    if not list_past_research(store, output_dir):
+        store.close()
         return
-        
-    try:
-        idx = int(choice) - 1
-        selected_file = files[idx]
-        
-        console.print(f"[yellow]Loading research from {selected_file.name}...[/yellow]")
-        data = parse_txt_to_data(selected_file)
-        
-        html_path = selected_file.parent / selected_file.name.replace(".txt", ".html").replace("research_data_", "report_")
-        HTMLGenerator.generate(data, html_path)
-        
+
+    search, page = args.search, 0
+    while True:
+        total = store.count_runs(search)
+        pages = max(1, -(-total // args.page_size))
+        page = min(page, pages - 1)
+        runs = store.list_runs(limit=args.page_size, offset=page * args.page_size, search=search or None)
+        for i, run in enumerate(runs):
+            run['row'] = page * args.page_size + i + 1
+        show_page(runs, page, pages, total, search)
+
+        choice = input("\nEnter ID to open, n/p for next/previous page, /text to filter (/ to clear), q to quit: ").strip()
+        if choice.lower() == 'q':
+            break
+        if choice.lower() == 'n':
+            page += 1
+            continue
+        if choice.lower() == 'p':
+            page = max(0, page - 1)
+            continue
+        if choice.startswith('/'):
+            search, page = choice[1:].strip(), 0
+            continue
+
+        try:
+            row = int(choice)
+            selected = store.list_runs(limit=1, offset=row - 1, search=search or None)[0] if row > 0 else None
+            if not selected:
+                raise IndexError(row)
+        except (ValueError, IndexError):
+            console.print("[red]Invalid choice.[/red]")
+            continue
+
+        console.print(f"[yellow]Loading research from run {selected['run_id']}...[/yellow]")
+        html_path = export_run(store, selected['run_id'], output_dir, kinds=("html",), standalone=args.standalone)['html']
+
         console.print(f"[green]DONE: Report generated:[/green] {html_path.name}")
         console.print("[cyan]Opening in browser...[/cyan]")
         webbrowser.open(f"file:///{html_path.absolute()}")
-        
-    except (ValueError, IndexError):
-        console.print("[red]Invalid choice.[/red]")
+        break
+
+    store.close()
 
 if __name__ == "__main__":
     main()